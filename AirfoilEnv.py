@@ -1,25 +1,67 @@
+import asyncio
+import time
 import numpy as np
 from scipy.spatial import ConvexHull
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import io
 from PIL import Image
 import torch
 import cv2
-from simulation import run_simulation
-from OPENFOAM_MAKER import make_block_mesh_dict
+from simulation import SIMULATION_DIRECTORY
+from evaluation import AirfoilEvaluator
 from utils import bezier_curve
 from scipy.interpolate import interp1d
 
+# 환경이 만들 수 있는 상태 표현 (CustomAirfoilEnv의 state_type)
+STATE_TYPES = ("sdf", "points")
+# SDF 상태의 기본 해상도 (높이, 너비). airfoil 그림(6.8 x 4.8 inch)을 50 DPI로 그린 크기
+SDF_RESOLUTION = (240, 340)
+# OpenFOAM 명령이 실패한 설계(record.failed)에 주는 양항비
+FAILED_LIFT_DRAG_RATIO = 0.0
+
 
 class CustomAirfoilEnv:
-    def __init__(self, num_points, angle_of_attack):
+    def __init__(
+        self,
+        num_points,
+        angle_of_attack,
+        case_directory=SIMULATION_DIRECTORY,
+        metrics_sink=None,
+        solver="openfoam",
+        evaluator=None,
+        state_type="sdf",
+        state_resolution=SDF_RESOLUTION,
+    ):
         self.num_points = num_points
         self.angle_of_attack = angle_of_attack
+        self.case_directory = case_directory
+        # 시뮬레이션 단계별 소요 시간 기록 (metrics.MetricsSink)
+        self.metrics_sink = metrics_sink
+        # "openfoam", OpenFOAM 없이 동작하는 "fake", 또는 프로세스 안의 패널법 solver "panel"
+        self.solver = solver
+        # airfoil 평가 방법 (evaluation.AirfoilEvaluator, MultiFidelityEvaluator 등)
+        if evaluator is None and solver == "panel":
+            from panel import PanelEvaluator
+
+            evaluator = PanelEvaluator()
+        self.evaluator = evaluator or AirfoilEvaluator(case_directory, solver)
+        # 상태 표현: 240x340 SDF 이미지 "sdf", 또는 그림 없이 만드는 airfoil 표면 보간점 (1, 36, 2) "points"
+        if state_type not in STATE_TYPES:
+            raise ValueError(f"state_type must be one of {STATE_TYPES}: {state_type}")
+        self.state_type = state_type
+        # SDF 상태의 (높이, 너비). 낮은 해상도는 그림도 낮은 DPI로 그려 거리 변환 비용을 줄임
+        self.state_resolution = tuple(state_resolution)
+        self.sdf_dpi = 50 * self.state_resolution[0] / SDF_RESOLUTION[0]
         self._initial_circles = [((0.02, 0), 0.02), ((1 - 0.02, 0), 0.02)]
         # 초기 상태 설정
         self.circles = self._initial_circles.copy()
         self.points, self.state, _ = self.get_airfoil(self.circles)
+        # TensorManager에 저장할 상태 하나의 모양 (채널 제외)
+        self.state_shape = tuple(self.state.shape[1:])
         self.prev_lift_drag_ratio = 4.5
+        # 마지막 step의 SimulationRecord ("airfoil" 단계에 원 추가와 상태 생성 시간 포함)
+        self.last_record = None
 
     def reset(self):
         self.circles = self._initial_circles.copy()
@@ -28,14 +70,39 @@ class CustomAirfoilEnv:
         return self.get_state()
 
     def step(self, action, t=None):
+        return asyncio.run(self.step_async(action, t=t))
+
+    async def step_async(self, action, t=None):
+        """
+        step과 동일하지만 시뮬레이션을 비동기로 실행합니다.
+        서로 다른 case_directory를 가진 여러 환경을 하나의 이벤트 루프에서 동시에 진행할 수 있습니다.
+        """
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        points, state, img = self.apply_action(action, t=t)
+        airfoil_wall_time = time.perf_counter() - wall_start
+        airfoil_cpu_time = time.process_time() - cpu_start
+        record = await self.evaluator.evaluate_async(points, self.angle_of_attack)
+        record.add_stage("airfoil", airfoil_wall_time, airfoil_cpu_time)
+        return self.finish_step(state, img, record)
+
+    def apply_action(self, action, t=None):
         self.circles.append(((action[0], action[1]), action[2]))  # add circle with x, r
         points, state, img = self.get_airfoil(self.circles, t=t)
         self.points = points
-        make_block_mesh_dict(
-            points[:, 0], points[:, 1], angle_of_attack=self.angle_of_attack
-        )
-        Cd, Cl = run_simulation()
-        lift_drag_ratio = self.calculate_reward(Cd, Cl)
+        return points, state, img
+
+    def finish_step(self, state, img, record):
+        if record.failed:
+            lift_drag_ratio = FAILED_LIFT_DRAG_RATIO
+        else:
+            lift_drag_ratio = self.calculate_reward(record.Cd, record.Cl)
+        if self.metrics_sink is not None:
+            self.metrics_sink.write(
+                record,
+                angle_of_attack=self.angle_of_attack,
+                num_circles=len(self.circles),
+                lift_drag_ratio=lift_drag_ratio,
+            )
 
         improvement = lift_drag_ratio - self.prev_lift_drag_ratio
         reward = improvement
@@ -43,6 +110,7 @@ class CustomAirfoilEnv:
             reward += 1
         self.prev_lift_drag_ratio = lift_drag_ratio
         self.state = state
+        self.last_record = record
 
         return state, reward, lift_drag_ratio, img
 
@@ -82,6 +150,50 @@ class CustomAirfoilEnv:
     def get_airfoil(self, circles, t=None, save_path="airfoil.png"):
         """
         주어진 원들을 사용하여 airfoil을 생성합니다.
+        state_type이 "points"이면 그림을 그리지 않고 이미지 대신 None을 반환합니다. (필요하면 airfoil_image)
+        """
+        if self.state_type == "points":
+            interpolated_points = self.airfoil_points(circles)
+            return interpolated_points, self.points_state(interpolated_points), None
+
+        interpolated_points, fig = self.draw_airfoil(circles)
+
+        img = None
+        if save_path is not None:
+            img = self.save_image(fig, save_path)
+
+        # 이미지 크기를 조정하지 않고 바로 반환
+        return interpolated_points, self.render_sdf(fig), img
+
+    def airfoil_image(self, circles, save_path="airfoil.png"):
+        """
+        원 목록으로 그린 airfoil 이미지를 저장하고 반환합니다.
+        """
+        return self.save_image(self.draw_airfoil(list(circles))[1], save_path)
+
+    def save_image(self, fig, save_path):
+        fig.savefig(save_path, format="png", dpi=50, bbox_inches="tight", pad_inches=0)
+        # 저장한 이미지를 다시 불러오기 (여러 환경이 같은 파일을 덮어쓰므로 바로 읽어 둠)
+        img = Image.open(save_path)
+        img.load()
+        return img
+
+    def render_state(self, circles):
+        """
+        원 목록으로 get_airfoil과 같은 상태를 다시 만듭니다. 파일을 쓰지 않고 pyplot을 쓰지 않으므로
+        학습 중 worker thread에서 호출할 수 있습니다.
+        """
+        return self.get_airfoil(list(circles), save_path=None)[1]
+
+    def points_state(self, interpolated_points):
+        """
+        표면 보간점 (윗면 뒷전 -> 앞전, 아랫면 앞전 -> 뒷전 순서)을 (1, 점 개수, 2) 상태로 만듭니다.
+        """
+        return torch.tensor(interpolated_points, dtype=torch.float32).unsqueeze(0)
+
+    def airfoil_points(self, circles):
+        """
+        원들의 convex hull을 보간한 airfoil 표면 좌표를 반환합니다.
         """
         all_points = self.generate_all_circle_points(circles)
         all_points = all_points[
@@ -90,48 +202,47 @@ class CustomAirfoilEnv:
         hull = ConvexHull(all_points)
         hull_points = all_points[hull.vertices]
 
-        interpolated_points = self.interpolate_linear_functions(hull_points)
+        return self.interpolate_linear_functions(hull_points)
+
+    def draw_airfoil(self, circles):
+        """
+        원들의 convex hull로 만든 airfoil 좌표와 airfoil을 채워 그린 Figure를 반환합니다.
+        """
+        interpolated_points = self.airfoil_points(circles)
 
         num_points = len(interpolated_points)
         airfoil = bezier_curve(interpolated_points, num=num_points)
 
-        # 단일 Figure 객체와 Axes 객체 생성
-        fig, ax = plt.subplots(
-            figsize=(6.8, 4.8)
-        )  # 인치 단위로 크기 설정 (6.8*50, 4.8*50 = 340, 240)
+        # pyplot에 등록하지 않는 Figure (thread-safe, 따로 닫지 않아도 해제됨)
+        # 인치 단위로 크기 설정 (6.8*50, 4.8*50 = 340, 240)
+        fig = Figure(figsize=(6.8, 4.8))
+        ax = fig.subplots()
         ax.fill(airfoil[:, 0], airfoil[:, 1], "k")
         ax.set_aspect("equal")
         ax.set_xlim(-0.2, 1.5)
         ax.set_ylim(-0.6, 0.6)
         ax.axis("off")
+        return interpolated_points, fig
 
-        if save_path is not None:
-            fig.savefig(
-                save_path, format="png", dpi=50, bbox_inches="tight", pad_inches=0
-            )
-
-        # 저장한 이미지를 다시 불러오기
-        img = Image.open(save_path)
-
+    def render_sdf(self, fig):
         # 메모리에 이미지 저장
         buf = io.BytesIO()
         fig.savefig(
-            buf, format="png", dpi=50, bbox_inches="tight", pad_inches=0
-        )  # 50 DPI로 저장
+            buf, format="png", dpi=self.sdf_dpi, bbox_inches="tight", pad_inches=0
+        )  # 기본 해상도에서 50 DPI로 저장
         buf.seek(0)
 
-        sdf = self.apply_sdf(buf)
+        # 거리는 DPI와 관계없이 50 DPI 픽셀 단위로 맞춤
+        sdf = self.apply_sdf(buf) * (50 / self.sdf_dpi)
 
         sdf_tensor = torch.tensor(sdf).unsqueeze(0).float()
         resized_sdf_tensor = torch.nn.functional.interpolate(
             sdf_tensor.unsqueeze(0),
-            size=(240, 340),
+            size=self.state_resolution,
             mode="bilinear",
             align_corners=False,
         ).squeeze(0)
-
-        # 이미지 크기를 조정하지 않고 바로 반환
-        return interpolated_points, resized_sdf_tensor, img
+        return resized_sdf_tensor
 
     def apply_sdf(self, buf):
         image = Image.open(buf).convert("L")
@@ -248,5 +359,23 @@ class CustomAirfoilEnv:
         return sampled_points
 
 
-def make_env(num_points=80, angle_of_attack=5.0):
-    return CustomAirfoilEnv(num_points=num_points, angle_of_attack=angle_of_attack)
+def make_env(
+    num_points=80,
+    angle_of_attack=5.0,
+    case_directory=SIMULATION_DIRECTORY,
+    metrics_sink=None,
+    solver="openfoam",
+    evaluator=None,
+    state_type="sdf",
+    state_resolution=SDF_RESOLUTION,
+):
+    return CustomAirfoilEnv(
+        num_points=num_points,
+        angle_of_attack=angle_of_attack,
+        case_directory=case_directory,
+        metrics_sink=metrics_sink,
+        solver=solver,
+        evaluator=evaluator,
+        state_type=state_type,
+        state_resolution=state_resolution,
+    )
@@ -1,5 +1,6 @@
 import argparse
 import math
+import os
 
 
 # 명령줄 인수 처리를 위한 Parser 설정
@@ -71,15 +72,25 @@ parser.add_argument(
     "--cell_size_in_middle", type=float, default=0.035, help="Cell size in middle"
 )
 
-# 인수 파싱
-args = parser.parse_args()
+# 인수 파싱 (이 모듈을 import하는 스크립트의 인수는 무시합니다)
+args, _ = parser.parse_known_args()
 
 
 def make_block_mesh_dict(
-    airfoil_x, airfoil_y, angle_of_attack=5, freestream_velocity=222.22
+    airfoil_x,
+    airfoil_y,
+    angle_of_attack=5,
+    freestream_velocity=222.22,
+    output_directory=".",
+    fidelity=1.0,
+    end_time=200,
 ):
+    """
+    fidelity는 기본 메시(fidelity=1.0)에 대한 셀 수의 배율입니다.
+    0.5이면 각 방향 셀 수가 절반인 coarse 메시를 만들어 빠른 1차 평가에 사용합니다.
+    """
     args.angle_of_response = angle_of_attack
-    number_of_mesh_on_boundary_layer = n_10 = 17
+    number_of_mesh_on_boundary_layer = n_10 = scale_cell_count(17, fidelity)
     inlet_expansion_ratio_1 = o_28 = (
         args.cell_size_at_trailing_edge / args.max_cell_size_in_inlet
     )
@@ -91,10 +102,10 @@ def make_block_mesh_dict(
     o_10 = args.expansion_ratio**number_of_mesh_on_boundary_layer
     o_13 = args.max_cell_size_in_inlet / last_layer_thickness
     o_16 = args.max_cell_size_in_outlet / args.cell_size_at_trailing_edge
-    number_of_mesh_out_of_boundary_layer = n_13 = 31
-    number_of_mesh_at_tail = n_16 = 74
-    number_of_mesh_in_leading = o_21 = 21
-    number_of_mesh_in_trailing = o_23 = 20
+    number_of_mesh_out_of_boundary_layer = n_13 = scale_cell_count(31, fidelity)
+    number_of_mesh_at_tail = n_16 = scale_cell_count(74, fidelity)
+    number_of_mesh_in_leading = o_21 = scale_cell_count(21, fidelity)
+    number_of_mesh_in_trailing = o_23 = scale_cell_count(20, fidelity)
     divide_point = o_20 = args.seperating_point_position
     expansion_ratio_in_leading = o_22 = (
         args.cell_size_in_middle / args.cell_size_at_leading_edge
@@ -435,8 +446,16 @@ mergePatchPairs
     from . import make_initial_condition, make_controlDict
 
     # blockMeshDict 파일 생성
-    with open("./blockMeshDict", "w") as f:
+    with open(os.path.join(output_directory, "blockMeshDict"), "w") as f:
         f.write(block_mesh_content)
 
-    make_controlDict(centroid_x, centroid_y, area, freestream_velocity)
-    make_initial_condition(args.angle_of_response, freestream_velocity)
+    make_controlDict(
+        centroid_x, centroid_y, area, freestream_velocity, output_directory, end_time
+    )
+    make_initial_condition(
+        args.angle_of_response, freestream_velocity, output_directory
+    )
+
+
+def scale_cell_count(number_of_cells, fidelity, minimum=3):
+    return max(minimum, int(round(number_of_cells * fidelity)))
@@ -1,4 +1,14 @@
-def make_controlDict(centroid_x, centroid_y, area, freestream_velocity):
+import os
+
+
+def make_controlDict(
+    centroid_x,
+    centroid_y,
+    area,
+    freestream_velocity,
+    output_directory=".",
+    end_time=200,
+):
     control_dict_content = f"""/*--------------------------------*- C++ -*----------------------------------*\\
   =========                 |
   \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox
@@ -25,7 +35,7 @@ startTime       0;
 
 stopAt          endTime;
 
-endTime         200;
+endTime         {end_time};
 
 deltaT          1;
 
@@ -90,5 +100,5 @@ residuals
     """
 
     # blockMeshDict 파일 생성
-    with open("./controlDict", "w") as f:
+    with open(os.path.join(output_directory, "controlDict"), "w") as f:
         f.write(control_dict_content)
@@ -1,7 +1,8 @@
 import math
+import os
 
 
-def make_initial_condition(angle_of_attack, freestream_velocity):
+def make_initial_condition(angle_of_attack, freestream_velocity, output_directory="."):
     x_dir_velocity = freestream_velocity * math.cos(math.radians(angle_of_attack))
     y_dir_velocity = freestream_velocity * math.sin(math.radians(angle_of_attack))
     initial_condition_content = f"""/*--------------------------------*- C++ -*----------------------------------*\\
@@ -53,5 +54,5 @@ boundaryField
     """
 
     # blockMeshDict 파일 생성
-    with open("./U", "w") as f:
+    with open(os.path.join(output_directory, "U"), "w") as f:
         f.write(initial_condition_content)
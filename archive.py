@@ -0,0 +1,234 @@
+import hashlib
+import io
+import json
+import os
+import random
+import tarfile
+import time
+
+import numpy as np
+
+from metrics import SimulationRecord
+
+
+def design_hash(points, angle_of_attack, freestream_velocity=222.22, fidelity=1.0):
+    """
+    airfoil 좌표(1e-6 단위로 양자화)와 유동 조건으로 설계를 식별하는 해시를 만듭니다.
+    """
+    digest = hashlib.sha1()
+    # 환경의 보간점은 전치로 만들어져 Fortran 순서일 수 있으므로 C 순서로 맞춤
+    quantized = np.round(np.asarray(points, dtype=np.float64) * 1e6).astype(np.int64)
+    digest.update(np.ascontiguousarray(quantized))
+    digest.update(
+        json.dumps(
+            [round(angle_of_attack, 6), round(freestream_velocity, 6), fidelity]
+        ).encode()
+    )
+    return digest.hexdigest()
+
+
+def history_file(
+    history_directory, points, angle_of_attack, freestream_velocity, fidelity, end_time
+):
+    """
+    history_directory 아래에 설계 해시와 endTime으로 이름 붙인 forceCoeffs 수렴 이력(.npz) 경로입니다.
+    """
+    key = design_hash(points, angle_of_attack, freestream_velocity, fidelity)
+    return os.path.join(os.path.expanduser(history_directory), f"{key}-{end_time}.npz")
+
+
+class CaseArchive:
+    """
+    계산이 끝난 케이스 디렉토리를 설계 해시별 tar.gz로 보관합니다.
+    양항비 상위 top_k개, sample_probability 비율의 무작위 표본, 실패한 케이스만 남기고,
+    전체 크기가 quota_gb를 넘으면 오래된 표본 -> 오래된 실패 -> 순위가 낮은 상위 케이스 순으로 지웁니다.
+    """
+
+    def __init__(
+        self,
+        root="results/archive",
+        top_k=20,
+        sample_probability=0.02,
+        max_failures=50,
+        quota_gb=20.0,
+        compresslevel=6,
+        seed=None,
+    ):
+        self.root = os.path.expanduser(root)
+        self.top_k = top_k
+        self.sample_probability = sample_probability
+        self.max_failures = max_failures
+        self.quota_bytes = int(quota_gb * 1024**3)
+        self.compresslevel = compresslevel
+        self.random = random.Random(seed)
+        self.index_path = os.path.join(self.root, "index.json")
+        os.makedirs(self.root, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.entries = json.load(f)
+        else:
+            self.entries = {}
+
+    @property
+    def size(self):
+        return sum(entry["size"] for entry in self.entries.values())
+
+    def add(self, case_directory, key, record=None, failed=False, **metadata):
+        """
+        보관 규칙에 해당하면 케이스를 압축하여 저장하고 보관 사유 목록을 반환합니다. (해당하지 않으면 빈 목록)
+        """
+        if key in self.entries:
+            return self.entries[key]["reasons"]
+        lift_drag_ratio = None
+        if not failed and record is not None and record.Cd:
+            lift_drag_ratio = record.Cl / record.Cd
+
+        reasons = []
+        if failed:
+            if self._count("failed") < self.max_failures:
+                reasons.append("failed")
+        else:
+            if self._is_top_k(lift_drag_ratio):
+                reasons.append("top_k")
+            if self.random.random() < self.sample_probability:
+                reasons.append("sample")
+        if not reasons:
+            return reasons
+
+        path = os.path.join(self.root, key[:2], f"{key}.tar.gz")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_tarball(path, case_directory, record)
+        self.entries[key] = {
+            "path": os.path.relpath(path, self.root),
+            "size": os.path.getsize(path),
+            "lift_drag_ratio": lift_drag_ratio,
+            "reasons": reasons,
+            "time": time.time(),
+            **metadata,
+        }
+        self._demote_top_k()
+        self._enforce_quota()
+        self._save_index()
+        return reasons
+
+    def extract(self, key, destination_directory):
+        """
+        보관한 케이스를 destination_directory에 풀어 다시 살펴볼 수 있게 합니다.
+        """
+        with tarfile.open(self._path(key), "r:gz") as tar:
+            tar.extractall(destination_directory, filter="data")
+        return destination_directory
+
+    def load_record(self, key):
+        with tarfile.open(self._path(key), "r:gz") as tar:
+            record = SimulationRecord.from_message(
+                json.load(tar.extractfile("record.json"))
+            )
+            if "history.npz" in tar.getnames():
+                with np.load(io.BytesIO(tar.extractfile("history.npz").read())) as data:
+                    record.columns = tuple(data.files)
+                    record.history = np.stack([data[name] for name in data.files], 1)
+        return record
+
+    def _path(self, key):
+        return os.path.join(self.root, self.entries[key]["path"])
+
+    def _write_tarball(self, path, case_directory, record):
+        # 중간에 중단되어도 깨진 파일이 남지 않도록 임시 이름으로 쓴 뒤 교체합니다.
+        temporary_path = path + ".tmp"
+        with tarfile.open(
+            temporary_path, "w:gz", compresslevel=self.compresslevel
+        ) as tar:
+            tar.add(
+                case_directory,
+                arcname="case",
+                filter=lambda info: (
+                    None
+                    if os.path.basename(info.name).startswith("processor")
+                    else info
+                ),
+            )
+            if record is not None:
+                self._add_bytes(
+                    tar, "record.json", json.dumps(record.to_message()).encode()
+                )
+                if record.history is not None:
+                    buffer = io.BytesIO()
+                    np.savez_compressed(
+                        buffer,
+                        **{
+                            name: record.history[:, i]
+                            for i, name in enumerate(record.columns)
+                        },
+                    )
+                    self._add_bytes(tar, "history.npz", buffer.getvalue())
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def _add_bytes(tar, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = time.time()
+        tar.addfile(info, io.BytesIO(data))
+
+    def _count(self, reason):
+        return sum(reason in entry["reasons"] for entry in self.entries.values())
+
+    def _ranked_top_k(self):
+        return sorted(
+            (key for key, entry in self.entries.items() if "top_k" in entry["reasons"]),
+            key=lambda key: self.entries[key]["lift_drag_ratio"],
+            reverse=True,
+        )
+
+    def _is_top_k(self, lift_drag_ratio):
+        if lift_drag_ratio is None or not np.isfinite(lift_drag_ratio):
+            return False
+        ranked = self._ranked_top_k()
+        return (
+            len(ranked) < self.top_k
+            or lift_drag_ratio > self.entries[ranked[-1]]["lift_drag_ratio"]
+        )
+
+    def _demote_top_k(self):
+        for key in self._ranked_top_k()[self.top_k :]:
+            self._drop_reason(key, "top_k")
+
+    def _drop_reason(self, key, reason):
+        entry = self.entries[key]
+        entry["reasons"].remove(reason)
+        if not entry["reasons"]:
+            path = self._path(key)
+            if os.path.exists(path):
+                os.remove(path)
+            del self.entries[key]
+
+    def _enforce_quota(self):
+        def oldest(reason):
+            return sorted(
+                (
+                    key
+                    for key, entry in self.entries.items()
+                    if entry["reasons"] == [reason]
+                ),
+                key=lambda key: self.entries[key]["time"],
+            )
+
+        while self.size > self.quota_bytes and self.entries:
+            candidates = (
+                oldest("sample") or oldest("failed") or self._ranked_top_k()[::-1]
+            )
+            if not candidates:
+                # 여러 사유로 보관 중인 케이스만 남은 경우 가장 오래된 것부터 지웁니다.
+                candidates = sorted(
+                    self.entries, key=lambda key: self.entries[key]["time"]
+                )
+            key = candidates[0]
+            for reason in list(self.entries[key]["reasons"]):
+                self._drop_reason(key, reason)
+
+    def _save_index(self):
+        temporary_path = self.index_path + ".tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(temporary_path, self.index_path)
@@ -0,0 +1,76 @@
+"""
+Actor와 Critic이 AirfoilCNN을 따로 가질 때와 공유할 때(Agent(shared_encoder=True))의
+rollout 추론 시간(상태 하나의 행동 분포와 가치)과 PPO 업데이트 시간(mini batch 하나의 forward, backward, optimizer step)을 비교합니다.
+
+    python -m benchmarks.bench_agent --mini_batch_size 32 --repeats 5
+"""
+
+import argparse
+import time
+
+import torch
+
+from model.agent import Agent
+
+
+def measure(function, repeats):
+    function()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark(shared_encoder, options):
+    torch.manual_seed(0)
+    agent = Agent(n_actions=3, shared_encoder=shared_encoder)
+    parameters = sum(parameter.numel() for parameter in agent.parameters())
+
+    state = torch.randn(1, 1, 240, 340, device=agent.device)
+    rollout = measure(
+        lambda: agent.choose_dists_and_values(state, use_grad=False),
+        options.repeats * 4,
+    )
+
+    states = torch.randn(options.mini_batch_size, 1, 240, 340, device=agent.device)
+    actions = torch.randn(options.mini_batch_size, 3, device=agent.device)
+    returns = torch.randn(options.mini_batch_size, device=agent.device)
+    advs = torch.randn(options.mini_batch_size, device=agent.device)
+    old_log_probs = torch.randn(options.mini_batch_size, device=agent.device)
+
+    def update():
+        dist, value = agent.choose_dists_and_values(states, use_grad=True)
+        critic_loss = (returns - value).pow(2).mean()
+        ratio = (dist.log_prob(actions).sum(dim=1) - old_log_probs).exp()
+        actor_loss = -torch.min(
+            advs * ratio, advs * torch.clamp(ratio, 1 - 0.2, 1 + 0.2)
+        ).mean()
+        agent.optimize(actor_loss, critic_loss)
+
+    return parameters, rollout, measure(update, options.repeats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mini_batch_size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=5)
+    options = parser.parse_args()
+
+    results = {
+        "separate": benchmark(False, options),
+        "shared": benchmark(True, options),
+    }
+    print(
+        f"mini batch {options.mini_batch_size}, {torch.get_num_threads()} threads,"
+        f" device {'cuda' if torch.cuda.is_available() else 'cpu'}"
+    )
+    print(f"{'encoder':<10}{'parameters':>12}{'rollout (ms)':>14}{'update (ms)':>13}")
+    for name, (parameters, rollout, update) in results.items():
+        print(
+            f"{name:<10}{parameters:>12,}{rollout * 1000:>14.2f}{update * 1000:>13.1f}"
+        )
+    separate, shared = results["separate"], results["shared"]
+    print(
+        f"speedup: rollout {separate[1] / shared[1]:.2f}x,"
+        f" update {separate[2] / shared[2]:.2f}x"
+    )
@@ -0,0 +1,110 @@
+"""
+Agent의 CPU 성능 옵션(channels_last, bfloat16, compile_encoder) 조합별로 AirfoilCNN이 포함된
+rollout 추론(상태 1개), mini batch forward/backward, PPO 업데이트(optimizer step 포함) 시간을 비교합니다.
+warmup은 첫 호출들(torch.compile의 컴파일 포함)에 걸린 시간이고, max error는 기본 설정 대비 가치 출력의 최대 차이입니다.
+
+    python -m benchmarks.bench_cpu_profile --mini_batch_size 32 --repeats 5
+"""
+
+import argparse
+import itertools
+import time
+
+import torch
+
+from model.agent import Agent
+from model.model import bfloat16_supported
+
+OPTIONS = ("channels_last", "bfloat16", "compile_encoder")
+
+
+def measure(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark(profile, reference, batch, options):
+    agent = Agent(n_actions=3, shared_encoder=options.shared_encoder, **profile)
+    agent.load_state_dict(reference.state_dict())
+    state = batch["states"][:1]
+
+    def rollout():
+        agent.choose_dists_and_values(state, use_grad=False)
+
+    def forward_backward():
+        dist, value = agent.choose_dists_and_values(batch["states"], use_grad=True)
+        loss = value.sum() - dist.log_prob(batch["actions"]).sum()
+        loss.backward()
+
+    def update():
+        dist, value = agent.choose_dists_and_values(batch["states"], use_grad=True)
+        critic_loss = (batch["returns"] - value[:, 0]).pow(2).mean()
+        actor_loss = -(
+            dist.log_prob(batch["actions"]).sum(dim=1) * batch["advs"]
+        ).mean()
+        agent.optimize(actor_loss, critic_loss)
+
+    start = time.perf_counter()
+    for function in (rollout, rollout, forward_backward, forward_backward):
+        function()
+    warmup = time.perf_counter() - start
+
+    with torch.no_grad():
+        _, value = agent.choose_dists_and_values(batch["states"])
+        _, expected = reference.choose_dists_and_values(batch["states"])
+    error = (value - expected).abs().max().item()
+
+    rollout_time = measure(rollout, options.repeats * 4)
+    forward_backward_time = measure(forward_backward, options.repeats)
+    update_time = measure(update, options.repeats)
+    return (
+        warmup,
+        error,
+        rollout_time,
+        forward_backward_time,
+        options.mini_batch_size / update_time,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mini_batch_size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--shared_encoder", action="store_true")
+    parser.add_argument(
+        "--skip_compile", action="store_true", help="compile_encoder 조합 제외"
+    )
+    options = parser.parse_args()
+
+    torch.manual_seed(0)
+    reference = Agent(n_actions=3, shared_encoder=options.shared_encoder)
+    size = options.mini_batch_size
+    batch = {
+        "states": torch.randn(size, 1, 240, 340, device=reference.device),
+        "actions": torch.randn(size, 3, device=reference.device),
+        "returns": torch.randn(size, device=reference.device),
+        "advs": torch.randn(size, device=reference.device),
+    }
+
+    print(
+        f"mini batch {size}, {torch.get_num_threads()} threads,"
+        f" bfloat16 supported: {bfloat16_supported(reference.device)}"
+    )
+    print(
+        f"{'channels_last':<14}{'bfloat16':<9}{'compile':<8}{'warmup (s)':>11}"
+        f"{'max error':>11}{'rollout (ms)':>14}{'fwd+bwd (ms)':>14}{'train/s':>9}"
+    )
+    for values in itertools.product((False, True), repeat=len(OPTIONS)):
+        profile = dict(zip(OPTIONS, values))
+        if options.skip_compile and profile["compile_encoder"]:
+            continue
+        warmup, error, rollout, forward_backward, throughput = benchmark(
+            profile, reference, batch, options
+        )
+        print(
+            f"{str(values[0]):<14}{str(values[1]):<9}{str(values[2]):<8}"
+            f"{warmup:>11.1f}{error:>11.1e}{rollout * 1000:>14.2f}"
+            f"{forward_backward * 1000:>14.1f}{throughput:>9.1f}"
+        )
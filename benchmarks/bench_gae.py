@@ -0,0 +1,114 @@
+"""
+Train.get_gae(환경 축 벡터화)와 환경/스텝마다 반복하던 이전 구현을 비교합니다.
+종료/중단이 없는 경우 두 결과가 비트 단위로 같은지, 종료/중단이 섞인 경우 스텝마다 분기하는 참조 구현과도 같은지 확인한 뒤
+환경 수와 horizon에 따른 소요 시간을 출력합니다.
+
+    python -m benchmarks.bench_gae --env_nums 16 256 1024 --horizons 5 128
+"""
+
+import argparse
+import time
+
+import torch
+
+from tensormanager import TensorManager
+from train import Train
+
+
+def loop_gae(tensor_manager, gamma=0.9, lam=0.95):
+    """
+    이전 Train.get_gae 구현입니다.
+    """
+    rewards = tensor_manager.rewards_tensor
+    values = tensor_manager.values_tensor
+    num_env, horizon = rewards.shape
+    advs = torch.zeros_like(rewards).to(rewards.device)
+
+    for env_idx in range(num_env):
+        gae = 0
+        for t in reversed(range(horizon)):
+            delta = (
+                rewards[env_idx, t]
+                + gamma * values[env_idx, t + 1]
+                - values[env_idx, t]
+            )
+            gae = delta + gamma * lam * gae
+            advs[env_idx, t] = gae
+    return advs
+
+
+def masked_loop_gae(tensor_manager, gamma=0.9, lam=0.95):
+    """
+    이전 구현에 종료/중단을 스텝마다 분기로 처리하도록 추가한 참조 구현입니다.
+    """
+    rewards = tensor_manager.rewards_tensor
+    values = tensor_manager.values_tensor
+    num_env, horizon = rewards.shape
+    advs = torch.zeros_like(rewards)
+
+    for env_idx in range(num_env):
+        gae = 0
+        for t in reversed(range(horizon)):
+            next_value = values[env_idx, t + 1]
+            if tensor_manager.dones_tensor[env_idx, t]:
+                next_value, gae = 0, 0
+            elif tensor_manager.truncations_tensor[env_idx, t]:
+                next_value = tensor_manager.bootstrap_values_tensor[env_idx, t]
+                gae = 0
+            delta = rewards[env_idx, t] + gamma * next_value - values[env_idx, t]
+            gae = delta + gamma * lam * gae
+            advs[env_idx, t] = gae
+    return advs
+
+
+def make_tensor_manager(env_num, horizon, episode_ends=0.0, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    tensor_manager = TensorManager(
+        env_num=env_num, horizon=horizon, state_shape=(1,), action_dim=3, device="cpu"
+    )
+    tensor_manager.rewards_tensor.normal_(generator=generator)
+    tensor_manager.values_tensor.normal_(generator=generator)
+    tensor_manager.bootstrap_values_tensor.normal_(generator=generator)
+    if episode_ends:
+        ends = torch.rand(env_num, horizon, generator=generator) < episode_ends
+        terminated = torch.rand(env_num, horizon, generator=generator) < 0.5
+        tensor_manager.dones_tensor[:] = ends & terminated
+        tensor_manager.truncations_tensor[:] = ends & ~terminated
+    return tensor_manager
+
+
+def measure(function, tensor_manager, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(tensor_manager)
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--env_nums", type=int, nargs="+", default=[16, 256, 1024])
+    parser.add_argument("--horizons", type=int, nargs="+", default=[5, 128])
+    parser.add_argument("--repeats", type=int, default=3)
+    options = parser.parse_args()
+
+    get_gae = lambda tensor_manager: Train.get_gae(None, tensor_manager)
+
+    tensor_manager = make_tensor_manager(64, 32)
+    assert torch.equal(get_gae(tensor_manager), loop_gae(tensor_manager))
+    tensor_manager = make_tensor_manager(64, 32, episode_ends=0.2)
+    assert torch.equal(get_gae(tensor_manager), masked_loop_gae(tensor_manager))
+    print("bit-for-bit match with the loop (with and without done/truncation masks)")
+
+    print(
+        f"{'envs':>6}{'horizon':>9}{'loop (ms)':>12}{'vectorized (ms)':>17}{'speedup':>9}"
+    )
+    for env_num in options.env_nums:
+        for horizon in options.horizons:
+            tensor_manager = make_tensor_manager(env_num, horizon)
+            vectorized = measure(get_gae, tensor_manager, options.repeats)
+            loop = measure(loop_gae, tensor_manager, 1)
+            assert torch.equal(get_gae(tensor_manager), loop_gae(tensor_manager))
+            print(
+                f"{env_num:>6}{horizon:>9}{loop * 1000:>12.1f}"
+                f"{vectorized * 1000:>17.3f}{loop / vectorized:>8.0f}x"
+            )
@@ -0,0 +1,124 @@
+"""
+OpenFOAM 없이 fake_openfoam.py로 시뮬레이션 주변의 오케스트레이션 오버헤드를 측정합니다.
+
+    python -m benchmarks.bench_orchestration --steps 20 --latency 0
+
+1. CustomAirfoilEnv.step 한 번에 드는 시간과 env.last_record의 단계별 시간
+   (airfoil/SDF 생성, dict 생성, 프로세스 실행, 결과 파싱, 그 밖의 step 오버헤드)
+2. Train.step 전체의 처리량 (env step/s)
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from AirfoilEnv import make_env
+from fake_openfoam import make_case
+from metrics import summarize
+
+
+def benchmark_env_step(case_directory, steps, num_points):
+    env = make_env(num_points=num_points, case_directory=case_directory, solver="fake")
+    rng = np.random.default_rng(0)
+    rows = []
+    for step in range(steps):
+        if step % 5 == 0:
+            env.reset()
+        action = (rng.uniform(0.12, 1.0), rng.uniform(-0.1, 0.1), rng.uniform(0, 0.12))
+
+        start = time.perf_counter()
+        env.step(action)
+        step_time = time.perf_counter() - start
+
+        record = env.last_record
+        row = {
+            "step_wall_time": step_time,
+            # asyncio.run, 보상 계산, 기록 등 단계에 속하지 않는 시간
+            "other_wall_time": step_time - record.wall_time,
+        }
+        row.update(
+            (f"{name}_wall_time", stage["wall_time"])
+            for name, stage in record.stages.items()
+        )
+        rows.append(row)
+    return summarize(rows)
+
+
+def benchmark_train_step(case_directory, trajectories, horizon, iterations, num_points):
+    from model.agent import Agent
+    from train import Train
+
+    env = make_env(num_points=num_points, case_directory=case_directory, solver="fake")
+    agent = Agent(n_actions=3, lr=1e-4)
+    trainer = Train(
+        env=env,
+        env_name="AirfoilEnv",
+        agent=agent,
+        horizon=horizon,
+        epochs=1,
+        mini_batch_size=min(32, trajectories * horizon),
+        n_iterations=iterations,
+        num_points=num_points,
+        number_of_trajectories=trajectories,
+        beta=0.03,
+        epsilon=0.2,
+    )
+    trainer.plot_and_save = lambda: None  # 그래프 저장은 측정에서 제외합니다.
+
+    start = time.perf_counter()
+    trainer.step()
+    elapsed = time.perf_counter() - start
+    return elapsed, trajectories * horizon * iterations / elapsed
+
+
+def print_summary(summary):
+    print(f"{'stage':<28}{'p50 (ms)':>12}{'p90 (ms)':>12}")
+    for key, stats in summary.items():
+        print(
+            f"{key.replace('_wall_time', ''):<28}"
+            f"{stats['p50'] * 1000:>12.2f}{stats['p90'] * 1000:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--solver_latency", type=float, default=None)
+    parser.add_argument("--trajectories", type=int, default=4)
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=1)
+    parser.add_argument("--num_points", type=int, default=49)
+    parser.add_argument("--skip_train", action="store_true")
+    options = parser.parse_args()
+
+    os.environ["FAKE_OPENFOAM_LATENCY"] = str(options.latency)
+    if options.solver_latency is not None:
+        os.environ["FAKE_OPENFOAM_SOLVER_LATENCY"] = str(options.solver_latency)
+
+    with tempfile.TemporaryDirectory(prefix="bench_orchestration_") as directory:
+        # airfoil.png, best_airfoil_*.png 등이 저장소에 생기지 않도록 임시 디렉토리에서 실행합니다.
+        os.chdir(directory)
+        case_directory = make_case(os.path.join(directory, "case"))
+
+        print(f"CustomAirfoilEnv.step ({options.steps} steps, fake solver)")
+        print_summary(
+            benchmark_env_step(case_directory, options.steps, options.num_points)
+        )
+
+        if not options.skip_train:
+            elapsed, throughput = benchmark_train_step(
+                case_directory,
+                options.trajectories,
+                options.horizon,
+                options.iterations,
+                options.num_points,
+            )
+            print(
+                f"\nTrain.step: {elapsed:.2f}s for "
+                f"{options.trajectories}x{options.horizon}x{options.iterations} "
+                f"env steps ({throughput:.2f} steps/s)"
+            )
@@ -0,0 +1,91 @@
+"""
+대기 중인 설계 여러 개를 순서대로 평가할 때와 PipelinedEvaluator로 평가할 때의 처리량을 비교합니다.
+
+    python -m benchmarks.bench_pipeline --designs 8 --latency 0.2 --solver_latency 1.0
+
+솔버 utilization은 전체 경과 시간 중 foamRun(솔버 slot)이 실행 중이던 시간의 비율입니다.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from AirfoilEnv import make_env
+from evaluation import AirfoilEvaluator
+from fake_openfoam import make_case
+from pipeline import PipelinedEvaluator
+
+
+def make_designs(count, num_points):
+    env = make_env(num_points=num_points, solver="fake")
+    rng = np.random.default_rng(0)
+    designs = []
+    for _ in range(count):
+        env.reset()
+        action = (rng.uniform(0.12, 1.0), rng.uniform(-0.1, 0.1), rng.uniform(0, 0.12))
+        points, _, _ = env.apply_action(action)
+        designs.append((points, env.angle_of_attack))
+    return designs
+
+
+def benchmark_serial(directory, designs):
+    evaluator = AirfoilEvaluator(make_case(os.path.join(directory, "serial")), "fake")
+
+    async def run():
+        return [await evaluator.evaluate_async(*design) for design in designs]
+
+    start = time.perf_counter()
+    records = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    solver_time = sum(record.stages["solve"]["wall_time"] for record in records)
+    return elapsed, solver_time / elapsed
+
+
+def benchmark_pipelined(directory, designs, mesh_workers, finish_workers):
+    evaluator = PipelinedEvaluator(
+        case_root=os.path.join(directory, "pipeline"),
+        solver="fake",
+        mesh_workers=mesh_workers,
+        finish_workers=finish_workers,
+    )
+    start = time.perf_counter()
+    evaluator.evaluate_many(designs)
+    elapsed = time.perf_counter() - start
+    return elapsed, evaluator.statistics()["solver_busy_time"] / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--designs", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--solver_latency", type=float, default=1.0)
+    parser.add_argument("--mesh_workers", type=int, default=1)
+    parser.add_argument("--finish_workers", type=int, default=1)
+    parser.add_argument("--num_points", type=int, default=49)
+    options = parser.parse_args()
+
+    os.environ["FAKE_OPENFOAM_LATENCY"] = str(options.latency)
+    os.environ["FAKE_OPENFOAM_SOLVER_LATENCY"] = str(options.solver_latency)
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as directory:
+        os.chdir(directory)
+        designs = make_designs(options.designs, options.num_points)
+        results = {
+            "serial": benchmark_serial(directory, designs),
+            "pipelined": benchmark_pipelined(
+                directory, designs, options.mesh_workers, options.finish_workers
+            ),
+        }
+
+    print(f"{options.designs} designs, fake solver")
+    print(f"{'executor':<12}{'wall (s)':>10}{'cases/s':>10}{'solver util':>13}")
+    for name, (elapsed, utilization) in results.items():
+        print(
+            f"{name:<12}{elapsed:>10.2f}{options.designs / elapsed:>10.2f}"
+            f"{utilization:>13.1%}"
+        )
+    print(f"speedup: {results['serial'][0] / results['pipelined'][0]:.2f}x")
@@ -0,0 +1,109 @@
+"""
+rollout 추론을 float32 Agent로 할 때와 int8 QuantizedPolicy로 할 때를 비교합니다.
+
+1. 배치 크기별 choose_dists_and_values 시간
+2. 업데이트마다 다시 양자화(refresh)하는 시간과, 보정에 쓰지 않은 상태에서 float32 대비 KL 평균/최댓값과 가치 오차
+
+상태는 fake solver 환경에서 무작위 행동으로 만든 SDF 이미지이고, 업데이트는 무작위 목표로 한 Agent.optimize입니다.
+
+    python -m benchmarks.bench_quantized --batch_sizes 1 16 --updates 3
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from AirfoilEnv import make_env
+from model.agent import Agent
+from model.quantization import QuantizedPolicy
+from train import CALIBRATION_STATES
+
+
+def make_states(count, num_points, seed):
+    env = make_env(num_points=num_points, solver="fake")
+    rng = np.random.default_rng(seed)
+    states = []
+    for _ in range(count):
+        state = env.reset()
+        for _ in range(rng.integers(0, 4)):
+            action = (
+                rng.uniform(0.12, 1.0),
+                rng.uniform(-0.1, 0.1),
+                rng.uniform(0, 0.12),
+            )
+            _, state, _ = env.apply_action(action)
+        states.append(state.float())
+    return torch.stack(states)
+
+
+def measure(function, repeats):
+    function()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def random_update(agent, states):
+    dist, value = agent.choose_dists_and_values(states, use_grad=True)
+    actions = torch.randn_like(dist.mean)
+    critic_loss = (torch.randn_like(value) - value).pow(2).mean()
+    actor_loss = -(dist.log_prob(actions).sum(dim=1) * torch.randn(len(states))).mean()
+    agent.optimize(actor_loss, critic_loss)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--updates", type=int, default=3)
+    parser.add_argument("--eval_states", type=int, default=16)
+    parser.add_argument("--num_points", type=int, default=49)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--shared_encoder", action="store_true")
+    options = parser.parse_args()
+
+    torch.manual_seed(0)
+    agent = Agent(n_actions=3, shared_encoder=options.shared_encoder)
+    calibration = make_states(CALIBRATION_STATES, options.num_points, seed=0)
+    evaluation = make_states(options.eval_states, options.num_points, seed=1)
+
+    start = time.perf_counter()
+    policy = QuantizedPolicy(agent, calibration)
+    quantize = time.perf_counter() - start
+
+    print(
+        f"{torch.get_num_threads()} threads, shared encoder {options.shared_encoder},"
+        f" quantized engine {policy.engine}"
+    )
+    print(f"{'batch':>6}{'float32 (ms)':>14}{'int8 (ms)':>11}{'speedup':>9}")
+    for batch_size in options.batch_sizes:
+        states = make_states(batch_size, options.num_points, seed=2)
+        float_time = measure(
+            lambda: agent.choose_dists_and_values(states, use_grad=False),
+            options.repeats,
+        )
+        int8_time = measure(
+            lambda: policy.choose_dists_and_values(states), options.repeats
+        )
+        print(
+            f"{batch_size:>6}{float_time * 1000:>14.2f}{int8_time * 1000:>11.2f}"
+            f"{float_time / int8_time:>8.2f}x"
+        )
+
+    print(
+        f"{'update':>6}{'refresh (s)':>13}{'KL mean':>10}{'KL max':>10}"
+        f"{'value error':>13}"
+    )
+    for update in range(options.updates + 1):
+        if update > 0:
+            random_update(agent, calibration[:8])
+            start = time.perf_counter()
+            policy.refresh(agent, calibration)
+            quantize = time.perf_counter() - start
+        divergence = policy.divergence(agent, evaluation)
+        print(
+            f"{update:>6}{quantize:>13.2f}{divergence['kl_mean']:>10.1e}"
+            f"{divergence['kl_max']:>10.1e}{divergence['value_error']:>13.1e}"
+        )
@@ -0,0 +1,158 @@
+"""
+SDF 상태 해상도(state_resolution)별 비용과 품질을 비교합니다.
+
+1. 비용: 상태 하나를 만드는 시간 (env.render_state), 상태 하나의 rollout 추론 시간,
+   mini batch 하나의 PPO 업데이트 시간, 상태 하나의 float32 크기
+2. SDF 오차: 기본 해상도로 bilinear 확대했을 때 기본 해상도 SDF와의 평균 절대 오차
+3. 품질: 무작위 airfoil의 패널법 양항비(학습 데이터의 5~95 백분위로 자름)를 Critic(AirfoilCNN + value head)으로
+   회귀했을 때 보류 데이터의 R^2. 가치 함수가 해상도에 따라 설계를 얼마나 구분할 수 있는지의 대리 지표입니다.
+
+    python -m benchmarks.bench_resolution --resolutions 60x85 120x170 240x340 --epochs 15
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from AirfoilEnv import SDF_RESOLUTION, make_env
+from model.agent import Agent
+from model.model import Critic, make_encoder
+from panel import panel_coefficients
+
+
+def parse_resolution(text):
+    height, width = text.split("x")
+    return int(height), int(width)
+
+
+def make_airfoils(count, seed, angle_of_attack):
+    """
+    무작위 원 목록과 패널법 양항비를 반환합니다.
+    """
+    rng = np.random.default_rng(seed)
+    env = make_env(solver="fake", state_type="points")
+    circle_lists = []
+    for _ in range(count):
+        circles = list(env._initial_circles)
+        for _ in range(rng.integers(1, 5)):
+            circles.append(
+                (
+                    (rng.uniform(0.12, 1.0), rng.uniform(-0.1, 0.1)),
+                    rng.uniform(0, 0.12),
+                )
+            )
+        circle_lists.append(circles)
+    points_list = [env.airfoil_points(circles) for circles in circle_lists]
+    Cl, Cd, _ = panel_coefficients(points_list, [angle_of_attack] * count)
+    return circle_lists, torch.tensor(Cl / Cd, dtype=torch.float32)
+
+
+def render(resolution, circle_lists):
+    env = make_env(solver="fake", state_resolution=resolution)
+    start = time.perf_counter()
+    states = torch.stack([env.render_state(circles) for circles in circle_lists])
+    return states, (time.perf_counter() - start) / len(circle_lists)
+
+
+def measure(function, repeats):
+    function()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def network_cost(resolution, states, options):
+    torch.manual_seed(0)
+    agent = Agent(n_actions=3, state_shape=resolution)
+    state = states[:1].to(agent.device)
+    rollout = measure(
+        lambda: agent.choose_dists_and_values(state, use_grad=False),
+        options.repeats * 4,
+    )
+    batch = states[torch.arange(options.mini_batch_size) % len(states)].to(agent.device)
+    actions = torch.randn(options.mini_batch_size, 3, device=agent.device)
+    returns = torch.randn(options.mini_batch_size, device=agent.device)
+    advs = torch.randn(options.mini_batch_size, device=agent.device)
+
+    def update():
+        dist, value = agent.choose_dists_and_values(batch, use_grad=True)
+        critic_loss = (returns - value[:, 0]).pow(2).mean()
+        actor_loss = -(dist.log_prob(actions).sum(dim=1) * advs).mean()
+        agent.optimize(actor_loss, critic_loss)
+
+    return rollout, measure(update, options.repeats)
+
+
+def value_fit(resolution, states, targets, options):
+    """
+    앞 train 개 상태로 Critic을 학습하고 나머지 상태에서 R^2를 반환합니다.
+    """
+    torch.manual_seed(0)
+    critic = Critic(make_encoder("sdf", resolution))
+    optimizer = torch.optim.Adam(critic.parameters(), lr=options.lr)
+    mean, std = targets[: options.train].mean(), targets[: options.train].std()
+    targets = (targets - mean) / std
+    train_states, test_states = states[: options.train], states[options.train :]
+    train_targets, test_targets = targets[: options.train], targets[options.train :]
+    for _ in range(options.epochs):
+        for indices in torch.randperm(options.train).split(options.mini_batch_size):
+            loss = (critic(train_states[indices])[:, 0] - train_targets[indices]).pow(2)
+            optimizer.zero_grad()
+            loss.mean().backward()
+            optimizer.step()
+    with torch.no_grad():
+        predictions = critic(test_states)[:, 0]
+    residual = (predictions - test_targets).pow(2).sum()
+    return (1 - residual / (test_targets - test_targets.mean()).pow(2).sum()).item()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--resolutions",
+        type=parse_resolution,
+        nargs="+",
+        default=[(60, 85), (120, 170), (240, 340)],
+    )
+    parser.add_argument("--train", type=int, default=128)
+    parser.add_argument("--test", type=int, default=64)
+    parser.add_argument("--epochs", type=int, default=15)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--mini_batch_size", type=int, default=16)
+    parser.add_argument("--angle_of_attack", type=float, default=5.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    options = parser.parse_args()
+
+    circle_lists, targets = make_airfoils(
+        options.train + options.test, 0, options.angle_of_attack
+    )
+    # 양항비는 꼬리가 길어 몇 개의 극단값이 R^2를 좌우하므로 학습 데이터의 분위수로 자름
+    low, high = targets[: options.train].quantile(torch.tensor([0.05, 0.95]))
+    targets = targets.clamp(low, high)
+    reference, _ = render(SDF_RESOLUTION, circle_lists)
+    print(
+        f"{torch.get_num_threads()} threads, {options.train} train / {options.test}"
+        f" test airfoils, {options.epochs} epochs, lift-drag ratio"
+        f" {targets.mean():.1f} +- {targets.std():.1f}"
+    )
+    print(
+        f"{'resolution':<11}{'state (ms)':>11}{'rollout (ms)':>14}{'update (ms)':>13}"
+        f"{'state (KB)':>12}{'SDF error':>11}{'value R^2':>11}"
+    )
+    for resolution in options.resolutions:
+        states, state_time = render(resolution, circle_lists)
+        upsampled = F.interpolate(
+            states, size=SDF_RESOLUTION, mode="bilinear", align_corners=False
+        )
+        error = (upsampled - reference).abs().mean().item()
+        rollout, update = network_cost(resolution, states, options)
+        r2 = value_fit(resolution, states, targets, options)
+        print(
+            f"{'x'.join(map(str, resolution)):<11}{state_time * 1000:>11.2f}"
+            f"{rollout * 1000:>14.2f}{update * 1000:>13.1f}"
+            f"{states[0].numel() * 4 / 1024:>12.1f}{error:>11.4f}{r2:>11.3f}"
+        )
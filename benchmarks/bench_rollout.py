@@ -0,0 +1,113 @@
+"""
+rollout의 정책 추론을 환경마다 따로 할 때와 모든 환경의 상태를 배치 하나로 할 때를 비교합니다.
+
+1. Agent.choose_dists_and_values + choose_actions + scale_actions의 env-step당 시간 (환경 수별)
+2. panel solver 환경으로 Train.step의 rollout(학습 제외) 처리량 (parallel_envs별)
+
+    python -m benchmarks.bench_rollout --env_nums 1 4 16 64 --parallel_envs 1 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import torch
+
+from AirfoilEnv import make_env
+from model.agent import Agent
+from train import Train
+
+
+class RolloutTrain(Train):
+    """
+    rollout만 실행하는 Train입니다. (PPO 업데이트와 그래프 저장 생략)
+    """
+
+    def train(self, tensor_manager):
+        return 0.0, 0.0
+
+    def print_logs(self, actor_loss, critic_loss, sum_of_last_rewards):
+        pass
+
+
+def infer(agent, states):
+    dists, values = agent.choose_dists_and_values(states, use_grad=False)
+    actions = agent.choose_actions(dists)
+    return agent.scale_actions(actions.cpu()).numpy(), values
+
+
+def benchmark_inference(agent, env_num, repeats):
+    states = torch.randn(env_num, 1, 240, 340, device=agent.device)
+    infer(agent, states)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for i in range(env_num):
+            infer(agent, states[i : i + 1])
+    separate = (time.perf_counter() - start) / repeats / env_num
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        infer(agent, states)
+    batched = (time.perf_counter() - start) / repeats / env_num
+    return separate, batched
+
+
+def benchmark_rollout(agent, parallel_envs, trajectories, horizon, num_points):
+    envs = [
+        make_env(num_points=num_points, solver="panel") for _ in range(parallel_envs)
+    ]
+    trainer = RolloutTrain(
+        env=envs[0],
+        envs=envs,
+        env_name="AirfoilEnv",
+        agent=agent,
+        epochs=1,
+        mini_batch_size=32,
+        n_iterations=1,
+        num_points=num_points,
+        horizon=horizon,
+        number_of_trajectories=trajectories,
+        epsilon=0.2,
+    )
+    start = time.perf_counter()
+    trainer.step()
+    return trajectories * horizon / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--env_nums", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--parallel_envs", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--trajectories", type=int, default=16)
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--num_points", type=int, default=49)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--shared_encoder", action="store_true")
+    options = parser.parse_args()
+
+    torch.manual_seed(0)
+    agent = Agent(n_actions=3, shared_encoder=options.shared_encoder)
+    print(f"{torch.get_num_threads()} threads, shared encoder {options.shared_encoder}")
+    print(f"{'envs':>6}{'per env (ms)':>14}{'batched (ms)':>14}{'speedup':>9}")
+    for env_num in options.env_nums:
+        separate, batched = benchmark_inference(agent, env_num, options.repeats)
+        print(
+            f"{env_num:>6}{separate * 1000:>14.2f}{batched * 1000:>14.2f}"
+            f"{separate / batched:>8.2f}x"
+        )
+
+    with tempfile.TemporaryDirectory(prefix="bench_rollout_") as directory:
+        # env가 airfoil.png와 best_airfoil_*.png를 현재 디렉토리에 씁니다.
+        os.chdir(directory)
+        print(f"{'parallel envs':>14}{'env steps/s':>13}")
+        for parallel_envs in options.parallel_envs:
+            steps = benchmark_rollout(
+                agent,
+                parallel_envs,
+                options.trajectories,
+                options.horizon,
+                options.num_points,
+            )
+            print(f"{parallel_envs:>14}{steps:>13.1f}")
@@ -0,0 +1,114 @@
+"""
+상태 표현 "sdf"(240x340 SDF 이미지와 AirfoilCNN)와 "points"(표면 보간점 36개와 PointEncoder)를 비교합니다.
+
+1. 상태 만들기: 무작위 원 목록으로 env.get_airfoil (airfoil.png 저장 포함)과 env.render_state (저장 없음)의 상태당 시간
+2. 네트워크: encoder 파라미터 수, 상태 하나의 rollout 추론 시간, mini batch 하나의 PPO 업데이트 시간
+3. 상태 하나의 float32 저장 크기
+
+    python -m benchmarks.bench_state --states 16 --mini_batch_size 32 --repeats 5
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from AirfoilEnv import STATE_TYPES, make_env
+from model.agent import Agent
+
+
+def make_circles(count, seed):
+    rng = np.random.default_rng(seed)
+    env = make_env(solver="fake")
+    circle_lists = []
+    for _ in range(count):
+        circles = list(env._initial_circles)
+        for _ in range(rng.integers(1, 5)):
+            circles.append(
+                (
+                    (rng.uniform(0.12, 1.0), rng.uniform(-0.1, 0.1)),
+                    rng.uniform(0, 0.12),
+                )
+            )
+        circle_lists.append(circles)
+    return circle_lists
+
+
+def measure(function, repeats):
+    function()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark(state_type, circle_lists, options):
+    env = make_env(num_points=options.num_points, solver="fake", state_type=state_type)
+    start = time.perf_counter()
+    for circles in circle_lists:
+        env.get_airfoil(circles)
+    step_state = (time.perf_counter() - start) / len(circle_lists)
+    start = time.perf_counter()
+    states = torch.stack([env.render_state(circles) for circles in circle_lists])
+    render_state = (time.perf_counter() - start) / len(circle_lists)
+
+    torch.manual_seed(0)
+    agent = Agent(n_actions=3, state_type=state_type)
+    parameters = sum(p.numel() for p in agent.actor.encoder.parameters())
+    state = states[:1].to(agent.device)
+    rollout = measure(
+        lambda: agent.choose_dists_and_values(state, use_grad=False),
+        options.repeats * 4,
+    )
+
+    batch = states[torch.arange(options.mini_batch_size) % len(states)].to(agent.device)
+    actions = torch.randn(options.mini_batch_size, 3, device=agent.device)
+    returns = torch.randn(options.mini_batch_size, device=agent.device)
+    advs = torch.randn(options.mini_batch_size, device=agent.device)
+
+    def update():
+        dist, value = agent.choose_dists_and_values(batch, use_grad=True)
+        critic_loss = (returns - value[:, 0]).pow(2).mean()
+        actor_loss = -(dist.log_prob(actions).sum(dim=1) * advs).mean()
+        agent.optimize(actor_loss, critic_loss)
+
+    state_bytes = states[0].numel() * states.element_size()
+    return (
+        step_state,
+        render_state,
+        parameters,
+        rollout,
+        measure(update, options.repeats),
+        state_bytes,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--states", type=int, default=16)
+    parser.add_argument("--mini_batch_size", type=int, default=32)
+    parser.add_argument("--num_points", type=int, default=49)
+    parser.add_argument("--repeats", type=int, default=5)
+    options = parser.parse_args()
+
+    circle_lists = make_circles(options.states, seed=0)
+    print(f"{torch.get_num_threads()} threads, mini batch {options.mini_batch_size}")
+    print(
+        f"{'state':<8}{'step (ms)':>11}{'render (ms)':>13}{'encoder params':>16}"
+        f"{'rollout (ms)':>14}{'update (ms)':>13}{'state (bytes)':>15}"
+    )
+    with tempfile.TemporaryDirectory(prefix="bench_state_") as directory:
+        # get_airfoil이 airfoil.png를 현재 디렉토리에 씁니다.
+        os.chdir(directory)
+        for state_type in STATE_TYPES:
+            step_state, render_state, parameters, rollout, update, state_bytes = (
+                benchmark(state_type, circle_lists, options)
+            )
+            print(
+                f"{state_type:<8}{step_state * 1000:>11.2f}{render_state * 1000:>13.2f}"
+                f"{parameters:>16,}{rollout * 1000:>14.2f}{update * 1000:>13.1f}"
+                f"{state_bytes:>15,}"
+            )
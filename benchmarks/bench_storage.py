@@ -0,0 +1,188 @@
+"""
+TensorManager의 상태 저장 형식(float32, float16, uint8, circles)별 메모리, 복원 오차, 처리량을 비교합니다.
+환경에서 만든 SDF 상태 몇 개를 반복해서 채우고, 상태 기록(update_tensors), mini batch 추출(복원 포함),
+Train.train(PPO 업데이트)의 처리량을 측정합니다. 버퍼를 새로 할당할 때와 reset()으로 재사용할 때의 시간도 출력합니다.
+circles는 mini batch마다 상태를 다시 그리므로 mini batch 추출 처리량이 렌더링(render_workers개 thread) 속도가 됩니다.
+
+    python -m benchmarks.bench_storage --env_num 64 --horizon 20 --train_env_num 8
+    python -m benchmarks.bench_storage --state_dtypes float32 circles --render_workers 2
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from AirfoilEnv import make_env
+from model.agent import Agent
+from tensormanager import STATE_DTYPES, TensorManager, dequantize_states
+from train import Train
+
+
+def make_states(count, num_points):
+    env = make_env(num_points=num_points, solver="fake")
+    rng = np.random.default_rng(0)
+    states, circles = [], []
+    for _ in range(count):
+        env.reset()
+        action = (rng.uniform(0.12, 1.0), rng.uniform(-0.1, 0.1), rng.uniform(0, 0.12))
+        _, state, _ = env.apply_action(action)
+        states.append(state)
+        circles.append(list(env.circles))
+    return env, states, circles
+
+
+def make_trainer(env, agent, env_num, horizon, state_dtype, render_workers):
+    return Train(
+        env=env,
+        env_name="AirfoilEnv",
+        agent=agent,
+        epochs=1,
+        mini_batch_size=32,
+        n_iterations=1,
+        num_points=49,
+        horizon=horizon,
+        number_of_trajectories=env_num,
+        epsilon=0.2,
+        state_dtype=state_dtype,
+        render_workers=render_workers,
+    )
+
+
+def fill(tensor_manager, states, circles):
+    """
+    모든 스텝에 상태를 기록하고 GAE를 계산한 뒤 flatten합니다. 상태 기록에 걸린 시간을 반환합니다.
+    """
+    action = torch.zeros(1, tensor_manager.action_dim)
+    zero = torch.zeros(())
+    start = time.perf_counter()
+    for n in range(tensor_manager.env_num):
+        for t in range(tensor_manager.horizon):
+            k = (n * tensor_manager.horizon + t) % len(states)
+            tensor_manager.update_tensors(
+                states[k], action, 0.0, zero, zero, n, t, circles=circles[k]
+            )
+    elapsed = time.perf_counter() - start
+    tensor_manager.rewards_tensor.normal_()
+    tensor_manager.values_tensor.normal_()
+    tensor_manager.advantages_tensor = Train.get_gae(None, tensor_manager)
+    tensor_manager.return_tensor = (
+        tensor_manager.advantages_tensor + tensor_manager.values_tensor[:, :-1]
+    )
+    tensor_manager.flatten_tensors()
+    return elapsed
+
+
+def stored_states(env, tensor_manager, count):
+    """
+    앞의 count개 스텝에 저장된 상태를 float32로 복원합니다.
+    """
+    if tensor_manager.state_circles is not None:
+        return torch.cat(
+            [
+                env.render_state(circles)
+                for circles in tensor_manager.state_circles[:count]
+            ]
+        )
+    if tensor_manager.state_scales_tensor is None:
+        return dequantize_states(tensor_manager.states_tensor[:count])
+    return dequantize_states(
+        tensor_manager.states_tensor[:count],
+        tensor_manager.state_scales_tensor[:count],
+        tensor_manager.state_offsets_tensor[:count],
+    )
+
+
+def benchmark(state_dtype, env, states, circles, agent, options):
+    trainer = make_trainer(
+        env,
+        agent,
+        options.env_num,
+        options.horizon,
+        state_dtype,
+        options.render_workers,
+    )
+    start = time.perf_counter()
+    tensor_manager = trainer.get_tensor_manager()
+    allocation = time.perf_counter() - start
+    start = time.perf_counter()
+    tensor_manager = trainer.get_tensor_manager()
+    reuse = time.perf_counter() - start
+
+    steps = options.env_num * options.horizon
+    store = steps / fill(tensor_manager, states, circles)
+    stored = stored_states(env, tensor_manager, len(states))
+    error = (stored - torch.cat(states)).abs().max().item()
+
+    start = time.perf_counter()
+    for _ in trainer.choose_mini_batch(
+        trainer.mini_batch_size,
+        trainer.stored_states(tensor_manager),
+        tensor_manager.actions_tensor,
+        tensor_manager.return_tensor,
+        tensor_manager.advantages_tensor,
+        tensor_manager.values_tensor,
+        tensor_manager.log_probs_tensor,
+        state_scales=tensor_manager.state_scales_tensor,
+        state_offsets=tensor_manager.state_offsets_tensor,
+        state_circles=tensor_manager.state_circles,
+    ):
+        pass
+    sampling = steps / (time.perf_counter() - start)
+    state_bytes = tensor_manager.state_bytes()
+    del tensor_manager, trainer
+
+    trainer = make_trainer(
+        env,
+        agent,
+        options.train_env_num,
+        options.horizon,
+        state_dtype,
+        options.render_workers,
+    )
+    tensor_manager = trainer.get_tensor_manager()
+    fill(tensor_manager, states, circles)
+    start = time.perf_counter()
+    trainer.train(tensor_manager)
+    training = options.train_env_num * options.horizon / (time.perf_counter() - start)
+    return state_bytes, error, allocation, reuse, store, sampling, training
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--env_num", type=int, default=64)
+    parser.add_argument("--horizon", type=int, default=20)
+    parser.add_argument("--train_env_num", type=int, default=8)
+    parser.add_argument("--states", type=int, default=8)
+    parser.add_argument("--num_points", type=int, default=49)
+    parser.add_argument("--render_workers", type=int, default=1)
+    parser.add_argument(
+        "--state_dtypes", nargs="+", default=list(STATE_DTYPES), choices=STATE_DTYPES
+    )
+    options = parser.parse_args()
+
+    env, states, circles = make_states(options.states, options.num_points)
+    torch.manual_seed(0)
+    agent = Agent(n_actions=3)
+    steps = options.env_num * options.horizon
+    print(
+        f"{options.env_num} x {options.horizon} steps,"
+        f" train on {options.train_env_num * options.horizon} samples,"
+        f" {torch.get_num_threads()} threads"
+    )
+    print(
+        f"{'dtype':<9}{'states (MB)':>12}{'256x20 (MB)':>13}{'max error':>11}"
+        f"{'alloc (ms)':>12}{'reuse (ms)':>12}{'store/s':>10}{'sample/s':>10}"
+        f"{'train/s':>9}"
+    )
+    for state_dtype in options.state_dtypes:
+        state_bytes, error, allocation, reuse, store, sampling, training = benchmark(
+            state_dtype, env, states, circles, agent, options
+        )
+        print(
+            f"{state_dtype:<9}{state_bytes / 1e6:>12.3f}"
+            f"{state_bytes / steps * 256 * 20 / 1e6:>13.2f}{error:>11.1e}"
+            f"{allocation * 1000:>12.1f}{reuse * 1000:>12.3f}{store:>10.0f}"
+            f"{sampling:>10.0f}{training:>9.1f}"
+        )
@@ -0,0 +1,156 @@
+"""
+Train.train(PPO 업데이트)의 처리량을 mini batch 샘플러별로 비교합니다.
+"randperm"은 이전 샘플러(mini batch마다 새 randperm, 매번 새 텐서로 복사 후 squeeze/unsqueeze),
+"epoch"은 에폭마다 한 번 섞어 미리 할당한 버퍼에 모으는 현재 샘플러입니다.
+OpenFOAM 없이 무작위 상태로 TensorManager를 채워 업데이트만 측정합니다.
+
+    python -m benchmarks.bench_train --env_num 16 --horizon 5 --epochs 2
+"""
+
+import argparse
+import time
+
+import torch
+
+from model.agent import Agent
+from tensormanager import TensorManager
+from train import Train
+
+
+class RandpermTrain(Train):
+    """
+    이전 choose_mini_batch를 사용하는 Train입니다.
+    """
+
+    def choose_mini_batch(
+        self,
+        mini_batch_size,
+        states,
+        actions,
+        returns,
+        advs,
+        values,
+        log_probs,
+        state_scales=None,
+        state_offsets=None,
+        state_circles=None,
+    ):
+        full_batch_size = states.size(0)
+        for _ in range(full_batch_size // mini_batch_size):
+            indices = torch.randperm(full_batch_size)[:mini_batch_size].to(
+                states.device
+            )
+            yield (
+                states[indices].squeeze().unsqueeze(1),
+                actions[indices].squeeze(),
+                returns[indices].squeeze(),
+                advs[indices].squeeze(),
+                values[indices].squeeze(),
+                log_probs[indices].squeeze(),
+            )
+
+
+def make_tensor_manager(env_num, horizon, state_shape, n_actions, device):
+    tensor_manager = TensorManager(
+        env_num=env_num,
+        horizon=horizon,
+        state_shape=state_shape,
+        action_dim=n_actions,
+        device=device,
+    )
+    for tensor in (
+        tensor_manager.states_tensor,
+        tensor_manager.actions_tensor,
+        tensor_manager.rewards_tensor,
+        tensor_manager.values_tensor,
+        tensor_manager.log_probs_tensor,
+    ):
+        tensor.normal_()
+    tensor_manager.advantages_tensor = Train.get_gae(None, tensor_manager)
+    tensor_manager.return_tensor = (
+        tensor_manager.advantages_tensor + tensor_manager.values_tensor[:, :-1]
+    )
+    tensor_manager.flatten_tensors()
+    return tensor_manager
+
+
+def benchmark(trainer_class, options):
+    torch.manual_seed(0)
+    agent = Agent(n_actions=3)
+    trainer = trainer_class(
+        env=None,
+        env_name="AirfoilEnv",
+        agent=agent,
+        epochs=options.epochs,
+        mini_batch_size=options.mini_batch_size,
+        n_iterations=1,
+        num_points=49,
+        horizon=options.horizon,
+        number_of_trajectories=options.env_num,
+        epsilon=0.2,
+    )
+    tensor_manager = make_tensor_manager(
+        options.env_num, options.horizon, (240, 340), 3, agent.device
+    )
+
+    # 한 에폭 동안 샘플러가 돌려준 서로 다른 샘플의 비율
+    # 버퍼를 재사용하므로 다음 mini batch를 받기 전에 복사합니다.
+    drawn = torch.cat(
+        [
+            batch[0].clone()
+            for batch in trainer.choose_mini_batch(
+                options.mini_batch_size,
+                torch.arange(tensor_manager.states_tensor.size(0)),
+                *[torch.zeros(tensor_manager.states_tensor.size(0))] * 5,
+            )
+        ]
+    )
+    coverage = len(torch.unique(drawn)) / tensor_manager.states_tensor.size(0)
+
+    start = time.perf_counter()
+    sampled = 0
+    for _ in range(options.epochs):
+        for batch in trainer.choose_mini_batch(
+            options.mini_batch_size,
+            tensor_manager.states_tensor.unsqueeze(1),
+            tensor_manager.actions_tensor,
+            tensor_manager.return_tensor,
+            tensor_manager.advantages_tensor,
+            tensor_manager.values_tensor,
+            tensor_manager.log_probs_tensor,
+        ):
+            sampled += batch[0].size(0)
+    sampling = time.perf_counter() - start
+
+    start = time.perf_counter()
+    trainer.train(tensor_manager)
+    training = time.perf_counter() - start
+    return coverage, sampled / sampling, sampled / training, training
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--env_num", type=int, default=16)
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--mini_batch_size", type=int, default=32)
+    options = parser.parse_args()
+
+    results = {
+        "randperm": benchmark(RandpermTrain, options),
+        "epoch": benchmark(Train, options),
+    }
+
+    print(
+        f"{options.env_num * options.horizon} samples, {options.epochs} epochs,"
+        f" mini batch {options.mini_batch_size}, {torch.get_num_threads()} threads"
+    )
+    print(
+        f"{'sampler':<10}{'coverage':>10}{'sampler (samples/s)':>21}"
+        f"{'train (samples/s)':>19}{'train (s)':>11}"
+    )
+    for name, (coverage, sampling, training, elapsed) in results.items():
+        print(
+            f"{name:<10}{coverage:>10.1%}{sampling:>21.0f}{training:>19.1f}"
+            f"{elapsed:>11.2f}"
+        )
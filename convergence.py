@@ -0,0 +1,195 @@
+import math
+import os
+import re
+
+import numpy as np
+
+RESIDUAL_TOLERANCE = 1e-4
+RESIDUAL_PATTERN = re.compile(
+    rb"^Time = (\S+?)s?\s*$"
+    rb"|Solving for (\w+), Initial residual = ([^,\s]+), Final residual = [^,\s]+,"
+    rb" No Iterations (\d+)",
+    re.MULTILINE,
+)
+
+
+def parse_residuals(log_path):
+    """
+    솔버 로그(log.foamRun)에서 시간 단계별 각 변수의 초기 잔차를 읽습니다.
+    한 시간 단계에서 같은 변수를 여러 번 풀면(압력 보정 등) 첫 번째 값을 사용합니다.
+    (시간 배열, {변수 이름: 잔차 배열})을 반환하며, 해당 단계에서 풀지 않은 변수는 NaN입니다.
+    """
+    with open(os.path.expanduser(log_path), "rb") as f:
+        log = f.read()
+
+    times = []
+    steps = []
+    for match in RESIDUAL_PATTERN.finditer(log):
+        time, field, initial, _ = match.groups()
+        if time is not None:
+            times.append(float(time))
+            steps.append({})
+        elif steps and field.decode() not in steps[-1]:
+            steps[-1][field.decode()] = float(initial)
+
+    fields = sorted({field for step in steps for field in step})
+    residuals = {
+        field: np.array([step.get(field, np.nan) for step in steps]) for field in fields
+    }
+    return np.array(times), residuals
+
+
+def iterations_to_convergence(times, residuals, tolerance=RESIDUAL_TOLERANCE):
+    """
+    모든 변수의 초기 잔차가 tolerance 아래로 내려가 그 뒤로 다시 넘지 않는 첫 시간 단계를 반환합니다.
+    끝까지 수렴하지 않으면 None입니다.
+    """
+    if len(times) == 0:
+        return None
+    first_converged = 0
+    for values in residuals.values():
+        above = np.flatnonzero(~(values < tolerance) & ~np.isnan(values))
+        if len(above):
+            first_converged = max(first_converged, above[-1] + 1)
+    if first_converged >= len(times):
+        return None
+    return int(times[first_converged])
+
+
+def geometry_descriptors(points, resolution=64):
+    """
+    닫힌 airfoil 좌표에서 시위 길이, 최대 두께/캠버(시위 대비), 면적(시위 제곱 대비)을 계산합니다.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    x = points[:, 0]
+    chord = x.max() - x.min()
+    start, end = points, np.roll(points, -1, axis=0)
+    area = 0.5 * abs(np.sum(start[:, 0] * end[:, 1] - end[:, 0] * start[:, 1]))
+
+    # 각 x 위치에서 윤곽선과 만나는 y 값 중 최대/최소를 윗면/아랫면으로 사용합니다.
+    grid = np.linspace(x.min(), x.max(), resolution + 2)[1:-1]
+    x0, x1 = start[:, 0, None], end[:, 0, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = (grid - x0) / (x1 - x0)
+        crossing = (fraction >= 0) & (fraction <= 1) & (x0 != x1)
+        heights = np.where(
+            crossing,
+            start[:, 1, None] + fraction * (end[:, 1, None] - start[:, 1, None]),
+            np.nan,
+        )
+    upper, lower = np.nanmax(heights, axis=0), np.nanmin(heights, axis=0)
+    # 캠버는 앞전과 뒷전을 잇는 시위선으로부터 평균선까지의 거리입니다.
+    leading_edge, trailing_edge = points[np.argmin(x)], points[np.argmax(x)]
+    chord_line = np.interp(
+        grid, [leading_edge[0], trailing_edge[0]], [leading_edge[1], trailing_edge[1]]
+    )
+    return {
+        "chord": float(chord),
+        "thickness": float(np.max(upper - lower) / chord),
+        "camber": float(np.max(np.abs((upper + lower) / 2 - chord_line)) / chord),
+        "area": float(area / chord**2),
+    }
+
+
+def case_descriptors(points, angle_of_attack, freestream_velocity, fidelity=1.0):
+    """
+    반복 수 예측과 분석에 사용할 형상 및 유동 조건 기술자입니다.
+    """
+    return {
+        **geometry_descriptors(points),
+        "angle_of_attack": float(angle_of_attack),
+        "freestream_velocity": float(freestream_velocity),
+        "fidelity": float(fidelity),
+    }
+
+
+class IterationBudget:
+    """
+    형상/유동 기술자로 수렴에 필요한 반복 수를 예측해 케이스별 endTime을 정합니다.
+    log(반복 수)에 대한 ridge 회귀를 사용하며, 예측값에 잔차 표준편차의 z배를 더해 여유를 둡니다.
+    관측이 min_samples개 모이기 전에는 default_end_time을 사용합니다.
+    수렴하지 못한 케이스는 실제 필요 반복 수를 모르므로 사용한 endTime의 2배로 기록합니다.
+    (max_end_time으로 자르지 않아야 상한에서 수렴하지 못한 관측이 예측을 끌어내리지 않으며, 상한은 예측에만 적용)
+    """
+
+    def __init__(
+        self,
+        default_end_time=200,
+        min_end_time=50,
+        max_end_time=400,
+        min_samples=10,
+        z=1.64,
+        ridge=1e-3,
+    ):
+        self.default_end_time = default_end_time
+        self.min_end_time = min_end_time
+        self.max_end_time = max_end_time
+        self.min_samples = min_samples
+        self.z = z
+        self.ridge = ridge
+        self.features = []
+        self.targets = []
+        self.coefficients = None
+        self.residual_std = 0.0
+
+    def _features(self, descriptors):
+        return [
+            1.0,
+            descriptors["thickness"],
+            descriptors["camber"],
+            descriptors["area"],
+            abs(math.radians(descriptors["angle_of_attack"])),
+            math.log(descriptors["freestream_velocity"]),
+            descriptors.get("fidelity", 1.0),
+        ]
+
+    def predict(self, descriptors):
+        if self.coefficients is None:
+            return self.default_end_time
+        prediction = np.dot(self._features(descriptors), self.coefficients)
+        end_time = math.ceil(math.exp(prediction + self.z * self.residual_std))
+        return int(np.clip(end_time, self.min_end_time, self.max_end_time))
+
+    def observe(self, descriptors, iterations, end_time):
+        """
+        iterations가 None이면 end_time 안에 수렴하지 못한 케이스입니다.
+        """
+        if iterations is None:
+            iterations = 2 * end_time
+        self.features.append(self._features(descriptors))
+        self.targets.append(math.log(max(iterations, 1)))
+        if len(self.targets) >= self.min_samples:
+            self.fit()
+
+    def fit(self):
+        features = np.array(self.features)
+        targets = np.array(self.targets)
+        # 평균과 스케일이 다른 기술자를 함께 쓰므로 절편을 제외한 계수에만 ridge 항을 둡니다.
+        penalty = self.ridge * np.eye(features.shape[1])
+        penalty[0, 0] = 0.0
+        self.coefficients = np.linalg.solve(
+            features.T @ features + penalty, features.T @ targets
+        )
+        self.residual_std = float(np.std(targets - features @ self.coefficients))
+
+    @classmethod
+    def from_records(cls, records, **kwargs):
+        """
+        MetricsSink 기록(load_records)에서 지난 관측을 불러와 예측을 이어서 시작합니다.
+        실패한 케이스(failed)는 수렴 반복 수에 대한 정보가 없으므로 건너뜁니다.
+        """
+        budget = cls(**kwargs)
+        for record in records:
+            if record.get("thickness") is None or record.get("end_time") is None:
+                continue
+            # AdaptiveBudgetEvaluator와 같이 실패한 케이스는 학습하지 않습니다.
+            # (CSV에서 읽은 값은 문자열 "True"/"False")
+            if record.get("failed") in (True, "True"):
+                continue
+            iterations = record.get("residual_iterations")
+            budget.observe(
+                record,
+                None if iterations in (None, "") else iterations,
+                int(record["end_time"]),
+            )
+        return budget
@@ -0,0 +1,465 @@
+import asyncio
+import copy
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from archive import design_hash, history_file
+from convergence import IterationBudget, case_descriptors
+from simulation import (
+    ARTIFACTS,
+    SIMULATION_DIRECTORY,
+    evaluate_airfoil_async,
+    scratch_case_directory,
+)
+
+
+class AirfoilEvaluator:
+    """
+    하나의 케이스 디렉토리에서 airfoil을 OpenFOAM(또는 fake solver)으로 평가합니다.
+    케이스 디렉토리를 공유하므로 한 evaluator로 동시에 여러 평가를 실행하지 않습니다.
+    scratch_root를 지정하면 케이스를 그 아래(예: /dev/shm)에서 실행하고 artifacts만 되돌려 복사합니다.
+    history_directory를 지정하면 케이스마다 forceCoeffs 수렴 이력을 그 아래에 .npz로 저장합니다.
+    """
+
+    def __init__(
+        self,
+        case_directory=SIMULATION_DIRECTORY,
+        solver="openfoam",
+        fidelity=1.0,
+        end_time=200,
+        scratch_root=None,
+        artifacts=ARTIFACTS,
+        history_directory=None,
+    ):
+        self.case_directory = case_directory
+        self.solver = solver
+        self.fidelity = fidelity
+        self.end_time = end_time
+        self.scratch_root = scratch_root
+        self.artifacts = artifacts
+        self.history_directory = history_directory
+
+    @property
+    def run_directory(self):
+        """
+        실제로 케이스가 실행되는 디렉토리입니다. (scratch_root를 쓰면 그 아래의 케이스)
+        """
+        if self.scratch_root is None:
+            return self.case_directory
+        return scratch_case_directory(self.case_directory, self.scratch_root)
+
+    def evaluate(self, points, angle_of_attack, freestream_velocity=222.22, **options):
+        return asyncio.run(
+            self.evaluate_async(points, angle_of_attack, freestream_velocity, **options)
+        )
+
+    async def evaluate_async(
+        self,
+        points,
+        angle_of_attack,
+        freestream_velocity=222.22,
+        fidelity=None,
+        end_time=None,
+    ):
+        fidelity = self.fidelity if fidelity is None else fidelity
+        end_time = self.end_time if end_time is None else end_time
+        history_path = None
+        if self.history_directory is not None:
+            history_path = history_file(
+                self.history_directory,
+                points,
+                angle_of_attack,
+                freestream_velocity,
+                fidelity,
+                end_time,
+            )
+        return await evaluate_airfoil_async(
+            points,
+            angle_of_attack,
+            freestream_velocity=freestream_velocity,
+            case_directory=self.case_directory,
+            solver=self.solver,
+            history_path=history_path,
+            fidelity=fidelity,
+            end_time=end_time,
+            scratch_root=self.scratch_root,
+            artifacts=self.artifacts,
+        )
+
+
+class ArchivingEvaluator:
+    """
+    평가가 끝난 직후(다음 평가의 Allclean 전에) 케이스 디렉토리를 CaseArchive에 넘겨
+    보관 규칙에 해당하는 설계의 유동장을 남깁니다. 실패한 케이스(record.failed 또는 예외)도 실패로 보관하며,
+    예외는 보관한 뒤 다시 발생시킵니다.
+    run_directory를 가진 로컬 evaluator(AirfoilEvaluator)를 감싸야 합니다.
+    압축은 이벤트 루프를 막지 않도록 thread에서 실행하고, CaseArchive의 색인은 lock으로 한 번에 하나씩 갱신합니다.
+    """
+
+    def __init__(self, evaluator, archive):
+        self.evaluator = evaluator
+        self.archive = archive
+        self._lock = threading.Lock()
+
+    def evaluate(self, points, angle_of_attack, freestream_velocity=222.22, **options):
+        return asyncio.run(
+            self.evaluate_async(points, angle_of_attack, freestream_velocity, **options)
+        )
+
+    async def evaluate_async(
+        self,
+        points,
+        angle_of_attack,
+        freestream_velocity=222.22,
+        fidelity=None,
+        end_time=None,
+    ):
+        key = design_hash(
+            points,
+            angle_of_attack,
+            freestream_velocity,
+            self.evaluator.fidelity if fidelity is None else fidelity,
+        )
+        try:
+            record = await self.evaluator.evaluate_async(
+                points,
+                angle_of_attack,
+                freestream_velocity,
+                fidelity=fidelity,
+                end_time=end_time,
+            )
+        except Exception as error:
+            await asyncio.to_thread(
+                self.add,
+                self.evaluator.run_directory,
+                key,
+                failed=True,
+                error=repr(error),
+            )
+            raise
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if record.failed:
+            await asyncio.to_thread(
+                self.add,
+                self.evaluator.run_directory,
+                key,
+                failed=True,
+                error=record.error,
+            )
+        else:
+            await asyncio.to_thread(
+                self.add,
+                self.evaluator.run_directory,
+                key,
+                record,
+                angle_of_attack=angle_of_attack,
+            )
+        record.add_stage(
+            "archive", time.perf_counter() - wall_start, time.process_time() - cpu_start
+        )
+        return record
+
+    def add(self, case_directory, key, record=None, failed=False, **metadata):
+        with self._lock:
+            return self.archive.add(
+                case_directory, key, record, failed=failed, **metadata
+            )
+
+
+class AdaptiveBudgetEvaluator:
+    """
+    IterationBudget으로 케이스마다 필요한 반복 수를 예측해 endTime으로 사용하고,
+    결과의 수렴 반복 수(record.residual_iterations)로 예측 모델을 갱신합니다.
+    호출자가 end_time을 지정하면(MultiFidelityEvaluator 등) 그 값을 상한으로 사용합니다.
+    """
+
+    def __init__(self, evaluator, budget=None):
+        self.evaluator = evaluator
+        self.budget = budget or IterationBudget()
+        self.runs = 0
+        self.converged_runs = 0
+        self.total_end_time = 0
+
+    def evaluate(self, points, angle_of_attack, freestream_velocity=222.22, **options):
+        return asyncio.run(
+            self.evaluate_async(points, angle_of_attack, freestream_velocity, **options)
+        )
+
+    async def evaluate_async(
+        self,
+        points,
+        angle_of_attack,
+        freestream_velocity=222.22,
+        fidelity=None,
+        end_time=None,
+    ):
+        descriptors = case_descriptors(
+            points,
+            angle_of_attack,
+            freestream_velocity,
+            getattr(self.evaluator, "fidelity", 1.0) if fidelity is None else fidelity,
+        )
+        budget = self.budget.predict(descriptors)
+        if end_time is not None:
+            budget = min(budget, end_time)
+        record = await self.evaluator.evaluate_async(
+            points,
+            angle_of_attack,
+            freestream_velocity,
+            fidelity=fidelity,
+            end_time=budget,
+        )
+        if record.failed:
+            # 솔버가 끝까지 돌지 못한 케이스는 수렴 반복 수에 대한 정보가 없습니다.
+            return record
+        self.budget.observe(descriptors, record.residual_iterations, budget)
+        self.runs += 1
+        self.converged_runs += record.residual_iterations is not None
+        self.total_end_time += budget
+        return record
+
+    def statistics(self):
+        return {
+            "runs": self.runs,
+            "converged_fraction": self.converged_runs / max(self.runs, 1),
+            "mean_end_time": self.total_end_time / max(self.runs, 1),
+        }
+
+
+class MultiFidelityEvaluator:
+    """
+    모든 후보를 coarse 메시와 짧은 반복으로 먼저 평가하고,
+    양항비가 threshold(없으면 지금까지의 최고 fine 결과)에 margin 이내로 근접한 후보만
+    기본 메시로 다시 평가합니다. 나머지는 coarse 결과(record.fidelity < 1)를 반환하되,
+    보상이 fine과 coarse 사이의 메시 편향을 포함하지 않도록 최근 확인한 설계들의 (coarse, fine) 쌍으로
+    추정한 편향만큼 Cl(더하기)과 Cd(곱하기)를 보정한 복사본을 반환합니다. (record.bias_correction에 보정값 기록)
+    편향을 추정할 쌍이 calibration_pairs개 모이기 전에는 모든 후보를 fine으로 확인합니다.
+    coarse나 fine의 Cd가 유한한 양수가 아닌 쌍은 편향 추정에 사용하지 않습니다.
+    fidelity, end_time을 지정하면 (AdaptiveBudgetEvaluator 등) fine 평가의 fidelity와 두 평가의 endTime 상한으로 사용합니다.
+    coarse나 fine 평가가 실패하면(record.failed) 그 record를 그대로 반환합니다.
+    """
+
+    def __init__(
+        self,
+        evaluator,
+        coarse_fidelity=0.5,
+        coarse_end_time=80,
+        fine_fidelity=1.0,
+        fine_end_time=200,
+        threshold=None,
+        margin=0.1,
+        calibration_pairs=4,
+        bias_window=20,
+    ):
+        self.evaluator = evaluator
+        self.coarse_fidelity = coarse_fidelity
+        self.coarse_end_time = coarse_end_time
+        self.fine_fidelity = fine_fidelity
+        self.fine_end_time = fine_end_time
+        self.threshold = threshold
+        self.margin = margin  # coarse 결과의 편향을 고려한 상대 허용 오차
+        self.best_lift_drag_ratio = -np.inf
+        self.coarse_runs = 0
+        self.fine_runs = 0
+        self.calibration_pairs = calibration_pairs
+        # 최근 확인한 설계의 (fine Cl - coarse Cl, log(fine Cd / coarse Cd))
+        self.bias_pairs = deque(maxlen=bias_window)
+
+    def evaluate(self, points, angle_of_attack, freestream_velocity=222.22, **options):
+        return asyncio.run(
+            self.evaluate_async(points, angle_of_attack, freestream_velocity, **options)
+        )
+
+    async def evaluate_async(
+        self,
+        points,
+        angle_of_attack,
+        freestream_velocity=222.22,
+        fidelity=None,
+        end_time=None,
+    ):
+        coarse = await self.evaluator.evaluate_async(
+            points,
+            angle_of_attack,
+            freestream_velocity,
+            fidelity=self.coarse_fidelity,
+            end_time=self.capped(self.coarse_end_time, end_time),
+        )
+        self.coarse_runs += 1
+        if coarse.failed:
+            return coarse
+        corrected = self.correct(coarse)
+        calibrated = len(self.bias_pairs) >= self.calibration_pairs
+        # coarse 계수로 양항비를 구할 수 없으면 fine으로 확인합니다.
+        if (
+            calibrated
+            and valid_coefficients(corrected)
+            and not self.should_confirm(corrected.Cl / corrected.Cd)
+        ):
+            return corrected
+
+        fine = await self.evaluator.evaluate_async(
+            points,
+            angle_of_attack,
+            freestream_velocity,
+            fidelity=self.fine_fidelity if fidelity is None else fidelity,
+            end_time=self.capped(self.fine_end_time, end_time),
+        )
+        self.fine_runs += 1
+        if fine.failed:
+            return fine
+        # 덜 수렴한 coarse 메시는 Cd가 0 이하나 NaN일 수 있으며, 그 쌍은 log 비율을 모든 보정에 퍼뜨립니다.
+        if valid_coefficients(coarse) and valid_coefficients(fine):
+            self.bias_pairs.append((fine.Cl - coarse.Cl, np.log(fine.Cd / coarse.Cd)))
+        if valid_coefficients(fine):
+            self.best_lift_drag_ratio = max(
+                self.best_lift_drag_ratio, fine.Cl / fine.Cd
+            )
+        return fine
+
+    @staticmethod
+    def capped(default_end_time, end_time):
+        return default_end_time if end_time is None else min(default_end_time, end_time)
+
+    def correct(self, coarse):
+        """
+        coarse 결과에 추정한 메시 편향을 적용한 복사본입니다. 쌍이 없으면 그대로 반환합니다.
+        """
+        if not self.bias_pairs:
+            return coarse
+        cl_offset, log_cd_ratio = np.mean(self.bias_pairs, axis=0)
+        corrected = copy.copy(coarse)
+        corrected.Cl = coarse.Cl + cl_offset
+        corrected.Cd = coarse.Cd * np.exp(log_cd_ratio)
+        corrected.bias_correction = {
+            "Cl": float(cl_offset),
+            "Cd": float(np.exp(log_cd_ratio)),
+        }
+        return corrected
+
+    def should_confirm(self, lift_drag_ratio):
+        target = (
+            self.threshold if self.threshold is not None else self.best_lift_drag_ratio
+        )
+        return lift_drag_ratio >= target - self.margin * abs(target)
+
+    def statistics(self):
+        return {
+            "coarse_runs": self.coarse_runs,
+            "fine_runs": self.fine_runs,
+            "confirmed_fraction": self.fine_runs / max(self.coarse_runs, 1),
+        }
+
+
+def valid_coefficients(record):
+    """
+    Cl이 유한하고 Cd가 유한한 양수인지 확인합니다. (Cd 비율의 log와 양항비를 계산할 수 있는 결과)
+    """
+    return bool(np.isfinite(record.Cl) and np.isfinite(record.Cd) and record.Cd > 0)
+
+
+def coalesced_copy(record):
+    """
+    다른 요청의 solver 실행 결과를 공유하는 record의 복사본입니다. 단계 시간은 실행한 요청의 record에만 남깁니다.
+    """
+    record = copy.deepcopy(record)
+    record.coalesced = True
+    record.stages = {}
+    return record
+
+
+class CoalescingEvaluator:
+    """
+    기하 형상과 유동 조건을 양자화한 값이 같은 평가 요청이 동시에 들어오면 하나의 케이스만 실행하고
+    기다리던 모든 요청에 같은 결과를 돌려줍니다. 완료된 결과는 저장하지 않으므로 캐시가 아닙니다.
+    기다리던 요청은 각자 record의 복사본(record.coalesced가 True이고 solver 단계 시간이 없는)을 받으므로
+    같은 solver 실행의 시간이 기록에 여러 번 더해지지 않습니다.
+    여러 스레드의 서로 다른 이벤트 루프에서 호출해도 동작합니다.
+    """
+
+    def __init__(
+        self,
+        evaluator,
+        point_resolution=1e-4,
+        angle_resolution=1e-3,
+        velocity_resolution=1e-3,
+    ):
+        self.evaluator = evaluator
+        self.point_resolution = point_resolution
+        self.angle_resolution = angle_resolution
+        self.velocity_resolution = velocity_resolution
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.solver_runs = 0
+        self.coalesced = 0  # 절약한 solver 실행 수
+
+    def evaluate(self, points, angle_of_attack, freestream_velocity=222.22, **options):
+        return asyncio.run(
+            self.evaluate_async(points, angle_of_attack, freestream_velocity, **options)
+        )
+
+    def key(self, points, angle_of_attack, freestream_velocity, fidelity, end_time):
+        points = np.round(np.asarray(points) / self.point_resolution).astype(np.int64)
+        return (
+            points.shape,
+            points.tobytes(),
+            round(angle_of_attack / self.angle_resolution),
+            round(freestream_velocity / self.velocity_resolution),
+            fidelity,
+            end_time,
+        )
+
+    async def evaluate_async(
+        self,
+        points,
+        angle_of_attack,
+        freestream_velocity=222.22,
+        fidelity=None,
+        end_time=None,
+    ):
+        key = self.key(points, angle_of_attack, freestream_velocity, fidelity, end_time)
+        with self.lock:
+            self.requests += 1
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                self.in_flight[key] = Future()
+                self.solver_runs += 1
+        if future is not None:
+            # 기다리던 요청이 취소되어도 공유 Future는 취소하지 않습니다.
+            return coalesced_copy(await asyncio.shield(asyncio.wrap_future(future)))
+
+        future = self.in_flight[key]
+        try:
+            record = await self.evaluator.evaluate_async(
+                points,
+                angle_of_attack,
+                freestream_velocity,
+                fidelity=fidelity,
+                end_time=end_time,
+            )
+        except BaseException as error:
+            if not future.done():
+                future.set_exception(error)
+            raise
+        else:
+            # 호출자가 record에 단계를 추가하기 전의 상태를 기다리던 요청들에게 넘깁니다.
+            if not future.done():
+                future.set_result(copy.deepcopy(record))
+            return record
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def statistics(self):
+        return {
+            "requests": self.requests,
+            "solver_runs": self.solver_runs,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,166 @@
+"""
+OpenFOAM이 설치되지 않은 환경에서 blockMesh, decomposePar, foamRun, reconstructPar를 흉내 냅니다.
+simulation.py의 solver="fake" 모드에서 케이스 디렉토리를 작업 디렉토리로 하여 실행됩니다.
+
+    python fake_openfoam.py blockMesh
+    python fake_openfoam.py foamRun -solver incompressibleFluid -parallel
+
+forceCoeffs.dat는 blockMeshDict의 airfoil 좌표와 0/U의 유입 속도로부터 결정론적으로 계산되며,
+각 유틸리티의 지연 시간은 환경 변수로 조절합니다.
+    FAKE_OPENFOAM_LATENCY          모든 유틸리티의 지연 시간(초), 기본값 0
+    FAKE_OPENFOAM_SOLVER_LATENCY   foamRun의 지연 시간(초), 기본값 FAKE_OPENFOAM_LATENCY
+"""
+
+import math
+import os
+import re
+import sys
+import time
+
+ALLCLEAN = """#!/bin/sh
+cd "${0%/*}" || exit 1
+rm -rf constant/polyMesh processor* postProcessing [1-9]*
+"""
+
+
+def make_case(case_directory):
+    """
+    fake 모드에서 사용할 최소한의 케이스 디렉토리(Allclean, system, constant, 0)를 만듭니다.
+    """
+    case_directory = os.path.expanduser(case_directory)
+    for directory in ("system", "constant", "0"):
+        os.makedirs(os.path.join(case_directory, directory), exist_ok=True)
+    with open(os.path.join(case_directory, "Allclean"), "w") as f:
+        f.write(ALLCLEAN)
+    with open(os.path.join(case_directory, "system", "decomposeParDict"), "w") as f:
+        f.write("numberOfSubdomains 20;\n")
+    return case_directory
+
+
+def block_mesh():
+    """
+    blockMeshDict의 hex 블록 셀 수를 합하여 owner 헤더에 기록하고 airfoil 좌표를 points로 저장합니다.
+    """
+    with open(os.path.join("system", "blockMeshDict")) as f:
+        content = f.read()
+    cells = sum(
+        int(nx) * int(ny) * int(nz)
+        for nx, ny, nz in re.findall(
+            r"hex\s*\([^)]*\)\s*\(\s*(\d+)\s+(\d+)\s+(\d+)\s*\)", content
+        )
+    )
+    os.makedirs(os.path.join("constant", "polyMesh"), exist_ok=True)
+    with open(os.path.join("constant", "polyMesh", "points"), "w") as f:
+        f.writelines(f"({x} {y} 0)\n" for x, y in read_airfoil_points(content))
+    with open(os.path.join("constant", "polyMesh", "owner"), "w") as f:
+        f.write(
+            f'FoamFile\n{{\n    note        "nPoints:{2 * cells} nCells:{cells}";\n}}\n'
+        )
+    print(f"nCells: {cells}")
+
+
+def decompose_par():
+    """
+    decomposeParDict의 numberOfSubdomains만큼 processor 디렉토리를 만듭니다.
+    """
+    subdomains = 2
+    dict_path = os.path.join("system", "decomposeParDict")
+    if os.path.exists(dict_path):
+        with open(dict_path) as f:
+            match = re.search(r"numberOfSubdomains\s+(\d+)", f.read())
+        if match:
+            subdomains = int(match.group(1))
+    for i in range(subdomains):
+        os.makedirs(os.path.join(f"processor{i}", "constant"), exist_ok=True)
+
+
+def foam_run():
+    """
+    얇은 익형 이론으로 구한 계수에 수렴하는 forceCoeffs.dat와 잔차 로그를 작성합니다.
+    """
+    with open(os.path.join("system", "blockMeshDict")) as f:
+        points = read_airfoil_points(f.read())
+    with open(os.path.join("system", "controlDict")) as f:
+        end_time = int(float(re.search(r"endTime\s+([\d.eE+-]+);", f.read()).group(1)))
+    with open(os.path.join("0", "U")) as f:
+        ux, uy = map(
+            float,
+            re.search(
+                r"internalField\s+uniform\s+\(\s*(\S+)\s+(\S+)", f.read()
+            ).groups(),
+        )
+
+    angle_of_attack = math.atan2(uy, ux)
+    Cm, Cd, Cl = airfoil_coefficients(points, angle_of_attack)
+    # 셀 간격의 제곱(셀 수에 반비례)에 비례하는 이산화 오차를 흉내 냅니다.
+    with open(os.path.join("constant", "polyMesh", "owner")) as f:
+        cells = int(re.search(r"nCells:\s*(\d+)", f.read()).group(1))
+    discretization_error = 500 / max(cells, 1)
+    Cd *= 1 + discretization_error
+    Cl *= 1 - 0.3 * discretization_error
+    # 두께와 받음각이 클수록 천천히 수렴하도록 잔차 감소 시간 상수를 정합니다.
+    ys = [y for _, y in points] or [0.0]
+    decay = 10 + 60 * abs(angle_of_attack) + 100 * (max(ys) - min(ys))
+
+    directory = os.path.join("postProcessing", "forceCoeffs", "0")
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "forceCoeffs.dat"), "w") as f:
+        f.write("# Force coefficients\n# Time\tCm\tCd\tCl\tCl(f)\tCl(r)\n")
+        for t in range(1, end_time + 1):
+            settle = 1 - math.exp(-t / decay)
+            wobble = math.exp(-t / 80) * math.sin(t / 3)
+            cm, cd, cl = (
+                Cm * settle + 0.02 * wobble,
+                Cd * settle + 0.01 * wobble,
+                Cl * settle + 0.1 * wobble,
+            )
+            f.write(f"{t}\t{cm:.6g}\t{cd:.6g}\t{cl:.6g}\t{cl / 2:.6g}\t{cl / 2:.6g}\n")
+            residual = 0.1 * math.exp(-t / decay)
+            print(f"Time = {t}s")
+            for field in ("Ux", "Uy", "p"):
+                print(
+                    f"smoothSolver:  Solving for {field}, Initial residual = {residual:.6g}, "
+                    f"Final residual = {residual / 100:.6g}, No Iterations 2"
+                )
+    print("End")
+
+
+def read_airfoil_points(content):
+    """
+    blockMeshDict의 spline 좌표 중 z = 0 평면의 점만 읽어옵니다.
+    """
+    return [
+        (float(x), float(y)) for x, y in re.findall(r"\(\t(\S+)\t(\S+)\t0\t\)", content)
+    ]
+
+
+def airfoil_coefficients(points, angle_of_attack):
+    """
+    평균 캠버와 두께로 Cm, Cd, Cl을 근사합니다. (angle_of_attack 단위: rad)
+    """
+    if not points:
+        return 0.0, 0.01, 0.0
+    ys = [y for _, y in points]
+    camber = (max(ys) + min(ys)) / 2
+    thickness = max(ys) - min(ys)
+    Cl = 2 * math.pi * (angle_of_attack + 2 * camber)
+    Cd = 0.008 + 0.1 * thickness**2 + 0.01 * Cl**2
+    Cm = -math.pi / 2 * camber
+    return Cm, Cd, Cl
+
+
+UTILITIES = {
+    "blockMesh": block_mesh,
+    "decomposePar": decompose_par,
+    "foamRun": foam_run,
+    "reconstructPar": lambda: None,
+}
+
+
+if __name__ == "__main__":
+    utility = sys.argv[1]
+    latency = float(os.environ.get("FAKE_OPENFOAM_LATENCY", 0))
+    if utility == "foamRun":
+        latency = float(os.environ.get("FAKE_OPENFOAM_SOLVER_LATENCY", latency))
+    time.sleep(latency)
+    UTILITIES[utility]()
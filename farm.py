@@ -0,0 +1,463 @@
+"""
+여러 머신에서 CFD 케이스를 실행하기 위한 job server와 worker입니다.
+메시지는 TCP(또는 Unix socket) 위의 줄 단위 JSON으로 주고받습니다.
+
+    # 학습 프로세스에서 server를 띄우고 FarmEvaluator로 평가
+    # (기본값은 127.0.0.1에서만 접속을 받으므로 다른 머신의 worker를 쓰려면 host를 지정)
+    export FARM_TOKEN=<공유 토큰>
+    server = JobServer(host="0.0.0.0", port=5555).start()
+    env = make_env(evaluator=FarmEvaluator(server))
+
+    # 각 계산 노드에서 같은 FARM_TOKEN으로 worker 실행 (40코어, 케이스당 20코어 -> 동시에 2케이스)
+    python farm.py worker --host <server> --port 5555 --cores 40 --cores_per_case 20
+
+server는 register 메시지의 token이 공유 토큰과 같은 worker에게만 job을 보내고 결과를 받습니다.
+토큰은 암호화 없이 전송되므로 신뢰할 수 있는 네트워크에서만 host를 넓혀야 합니다.
+worker는 HEARTBEAT_INTERVAL마다 heartbeat를 보내며, server는 HEARTBEAT_TIMEOUT 동안 소식이 없거나
+연결이 끊긴 worker의 진행 중인 job을 다른 worker에게 다시 배정합니다.
+"""
+
+import argparse
+import asyncio
+import hmac
+import itertools
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+
+from convergence import case_descriptors
+from metrics import SimulationRecord
+from simulation import (
+    NUMBER_OF_PROCESSORS,
+    SIMULATION_DIRECTORY,
+    make_case_files,
+    prepare_case_directory,
+    run_simulation_async,
+)
+
+HEARTBEAT_INTERVAL = 5.0
+HEARTBEAT_TIMEOUT = 20.0
+MAX_ATTEMPTS = 3
+MESSAGE_LIMIT = 2**24
+# server와 worker가 공유하는 토큰을 담은 환경 변수
+TOKEN_VARIABLE = "FARM_TOKEN"
+
+
+def default_token():
+    token = os.environ.get(TOKEN_VARIABLE)
+    if not token:
+        raise ValueError(
+            f"set {TOKEN_VARIABLE} or pass token to share with the workers"
+        )
+    return token
+
+
+async def send_message(writer, message):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+async def read_message(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+class WorkerConnection:
+    def __init__(self, name, slots, writer):
+        self.name = name
+        self.slots = slots
+        self.writer = writer
+        self.free_slots = asyncio.Semaphore(slots)
+        self.in_flight = {}  # job id -> job
+        self.last_seen = time.monotonic()
+
+
+class JobServer:
+    """
+    worker들에게 job을 나누어 주는 server입니다. start()를 호출하면 별도 스레드의 이벤트 루프에서 동작하므로
+    학습 코드처럼 매 step마다 asyncio.run을 호출하는 곳에서도 submit을 사용할 수 있습니다.
+    token이 없으면 FARM_TOKEN 환경 변수를 사용하며, register 메시지의 token이 다른 연결은 닫습니다.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=5555,
+        unix_socket=None,
+        heartbeat_timeout=HEARTBEAT_TIMEOUT,
+        max_attempts=MAX_ATTEMPTS,
+        token=None,
+    ):
+        self.token = token or default_token()
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.workers = {}
+        self.redispatched = 0
+        self.loop = None
+        self._jobs = None
+        self._job_ids = itertools.count()
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self._start_server())
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._stop_server(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    async def _stop_server(self):
+        self.server.close()
+        self._monitor.cancel()
+        # 연결을 닫으면 _handle_worker가 EOF를 받고 스스로 종료합니다.
+        for worker in list(self.workers.values()):
+            worker.writer.close()
+        await asyncio.sleep(0.1)
+
+    @property
+    def capacity(self):
+        return sum(worker.slots for worker in list(self.workers.values()))
+
+    async def _start_server(self):
+        self._jobs = asyncio.Queue()
+        if self.unix_socket is not None:
+            self.server = await asyncio.start_unix_server(
+                self._handle_worker, self.unix_socket, limit=MESSAGE_LIMIT
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self._handle_worker, self.host, self.port, limit=MESSAGE_LIMIT
+            )
+            self.port = self.server.sockets[0].getsockname()[1]
+        self._monitor = self.loop.create_task(self._monitor_heartbeats())
+
+    async def submit(self, files):
+        """
+        케이스 파일({파일 이름: 내용})을 worker에게 보내고 결과 메시지를 기다립니다.
+        어느 이벤트 루프에서든 호출할 수 있습니다.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._submit(files), self.loop)
+        return await asyncio.wrap_future(future)
+
+    async def _submit(self, files):
+        job = {
+            "id": next(self._job_ids),
+            "files": files,
+            "attempts": 0,
+            "future": self.loop.create_future(),
+        }
+        await self._jobs.put(job)
+        return await job["future"]
+
+    async def _handle_worker(self, reader, writer):
+        try:
+            message = await read_message(reader)
+        except (ConnectionError, ValueError):
+            message = None
+        if (
+            not isinstance(message, dict)
+            or message.get("type") != "register"
+            or not hmac.compare_digest(
+                str(message.get("token", "")).encode(), self.token.encode()
+            )
+        ):
+            # 토큰을 확인하기 전에는 job을 보내거나 결과를 받지 않습니다.
+            writer.close()
+            return
+        worker = WorkerConnection(message["name"], message["slots"], writer)
+        self.workers[worker.name] = worker
+        print(f"worker {worker.name} registered ({worker.slots} slots)")
+
+        dispatcher = self.loop.create_task(self._dispatch(worker))
+        try:
+            while (message := await read_message(reader)) is not None:
+                worker.last_seen = time.monotonic()
+                if message["type"] in ("result", "error"):
+                    self._finish_job(worker, message)
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            dispatcher.cancel()
+            self._lose_worker(worker)
+
+    async def _dispatch(self, worker):
+        """
+        worker의 빈 slot 수만큼 대기열에서 job을 꺼내 보냅니다.
+        """
+        while True:
+            await worker.free_slots.acquire()
+            job = await self._jobs.get()
+            if job["future"].done():
+                worker.free_slots.release()
+                continue
+            job["attempts"] += 1
+            worker.in_flight[job["id"]] = job
+            try:
+                await send_message(
+                    worker.writer,
+                    {"type": "job", "id": job["id"], "files": job["files"]},
+                )
+            except ConnectionError:
+                return  # 연결 종료는 _handle_worker에서 처리합니다.
+
+    def _finish_job(self, worker, message):
+        job = worker.in_flight.pop(message["id"], None)
+        if job is None:
+            return
+        worker.free_slots.release()
+        if job["future"].done():
+            return
+        if message["type"] == "result":
+            job["future"].set_result(message["record"])
+        else:
+            job["future"].set_exception(
+                RuntimeError(f"worker {worker.name}: {message['message']}")
+            )
+
+    def _lose_worker(self, worker):
+        """
+        연결이 끊기거나 heartbeat가 끊긴 worker의 job을 대기열에 다시 넣습니다.
+        """
+        if self.workers.get(worker.name) is worker:
+            del self.workers[worker.name]
+            print(f"worker {worker.name} lost ({len(worker.in_flight)} jobs re-queued)")
+        worker.writer.close()
+        for job in worker.in_flight.values():
+            if job["future"].done():
+                continue
+            if job["attempts"] >= self.max_attempts:
+                job["future"].set_exception(
+                    ConnectionError(f"job {job['id']} lost {job['attempts']} times")
+                )
+            else:
+                self.redispatched += 1
+                self._jobs.put_nowait(job)
+        worker.in_flight.clear()
+
+    async def _monitor_heartbeats(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_timeout / 4)
+            now = time.monotonic()
+            for worker in list(self.workers.values()):
+                if now - worker.last_seen > self.heartbeat_timeout:
+                    self._lose_worker(worker)
+
+
+class FarmWorker:
+    """
+    server에 접속하여 job을 받아 실행합니다. cores // cores_per_case개의 slot마다
+    case_root/slot<i> 케이스 디렉토리를 두고 동시에 실행합니다.
+    token이 없으면 FARM_TOKEN 환경 변수를 사용합니다.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=5555,
+        unix_socket=None,
+        name=None,
+        cores=os.cpu_count(),
+        cores_per_case=NUMBER_OF_PROCESSORS,
+        case_root="~/farm_cases",
+        template_directory=SIMULATION_DIRECTORY,
+        solver="openfoam",
+        heartbeat_interval=HEARTBEAT_INTERVAL,
+        scratch_root=None,
+        token=None,
+    ):
+        self.token = token or default_token()
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        # 케이스마다 cores_per_case개 MPI rank (decomposeParDict의 numberOfSubdomains도 같은 값)
+        self.cores_per_case = cores_per_case
+        self.slots = max(1, cores // cores_per_case)
+        self.case_root = os.path.expanduser(case_root)
+        self.template_directory = template_directory
+        self.solver = solver
+        self.heartbeat_interval = heartbeat_interval
+        self.scratch_root = scratch_root
+
+    def prepare_case_directories(self):
+        case_directories = []
+        for slot in range(self.slots):
+            case_directory = os.path.join(self.case_root, f"slot{slot}")
+            if self.solver == "fake":
+                from fake_openfoam import make_case
+
+                make_case(case_directory)
+            else:
+                prepare_case_directory(case_directory, self.template_directory)
+            case_directories.append(case_directory)
+        return case_directories
+
+    async def run(self):
+        self.free_cases = asyncio.Queue()
+        for case_directory in self.prepare_case_directories():
+            self.free_cases.put_nowait(case_directory)
+
+        if self.unix_socket is not None:
+            reader, self.writer = await asyncio.open_unix_connection(
+                self.unix_socket, limit=MESSAGE_LIMIT
+            )
+        else:
+            reader, self.writer = await asyncio.open_connection(
+                self.host, self.port, limit=MESSAGE_LIMIT
+            )
+        self.write_lock = asyncio.Lock()
+        await self.send(
+            {
+                "type": "register",
+                "name": self.name,
+                "slots": self.slots,
+                "token": self.token,
+            }
+        )
+
+        heartbeat = asyncio.create_task(self._heartbeat())
+        jobs = set()
+        try:
+            while (message := await read_message(reader)) is not None:
+                if message["type"] == "job":
+                    job = asyncio.create_task(self._run_job(message))
+                    jobs.add(job)
+                    job.add_done_callback(jobs.discard)
+        finally:
+            heartbeat.cancel()
+            for job in jobs:
+                job.cancel()
+            self.writer.close()
+
+    async def send(self, message):
+        async with self.write_lock:
+            await send_message(self.writer, message)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            await self.send({"type": "heartbeat"})
+
+    async def _run_job(self, job):
+        case_directory = await self.free_cases.get()
+        try:
+            with tempfile.TemporaryDirectory(
+                prefix="farm_job_", dir=self.scratch_root
+            ) as source_directory:
+                for file_name, content in job["files"].items():
+                    with open(os.path.join(source_directory, file_name), "w") as f:
+                        f.write(content)
+                record = SimulationRecord(case_directory)
+                try:
+                    await run_simulation_async(
+                        case_directory,
+                        source_directory,
+                        solver=self.solver,
+                        scratch_root=self.scratch_root,
+                        processors=self.cores_per_case,
+                        record=record,
+                    )
+                except subprocess.CalledProcessError as error:
+                    # 실패한 OpenFOAM 명령은 재시도하지 않고 실패한 record로 돌려줍니다.
+                    record.fail(error)
+            await self.send(
+                {"type": "result", "id": job["id"], "record": record.to_message()}
+            )
+        except Exception as error:
+            await self.send({"type": "error", "id": job["id"], "message": repr(error)})
+        finally:
+            self.free_cases.put_nowait(case_directory)
+
+
+class FarmEvaluator:
+    """
+    JobServer에 연결된 worker에서 airfoil을 평가합니다. AirfoilEvaluator와 같은 방식으로 사용합니다.
+    """
+
+    def __init__(self, server, fidelity=1.0, end_time=200):
+        self.server = server
+        self.fidelity = fidelity
+        self.end_time = end_time
+
+    def evaluate(self, points, angle_of_attack, freestream_velocity=222.22, **options):
+        return asyncio.run(
+            self.evaluate_async(points, angle_of_attack, freestream_velocity, **options)
+        )
+
+    async def evaluate_async(
+        self,
+        points,
+        angle_of_attack,
+        freestream_velocity=222.22,
+        fidelity=None,
+        end_time=None,
+    ):
+        fidelity = self.fidelity if fidelity is None else fidelity
+        end_time = self.end_time if end_time is None else end_time
+        files = make_case_files(
+            points,
+            angle_of_attack,
+            freestream_velocity,
+            fidelity=fidelity,
+            end_time=end_time,
+        )
+        record = SimulationRecord.from_message(await self.server.submit(files))
+        record.fidelity = fidelity
+        record.end_time = end_time
+        record.descriptors = case_descriptors(
+            points, angle_of_attack, freestream_velocity, fidelity
+        )
+        return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CFD worker farm")
+    parser.add_argument("role", choices=["worker"])
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--unix_socket", type=str, default=None)
+    parser.add_argument("--name", type=str, default=None)
+    parser.add_argument("--cores", type=int, default=os.cpu_count())
+    parser.add_argument("--cores_per_case", type=int, default=NUMBER_OF_PROCESSORS)
+    parser.add_argument("--case_root", type=str, default="~/farm_cases")
+    parser.add_argument("--template", type=str, default=SIMULATION_DIRECTORY)
+    parser.add_argument("--solver", choices=["openfoam", "fake"], default="openfoam")
+    parser.add_argument("--scratch_root", type=str, default=None)
+    parser.add_argument("--token", type=str, default=None)  # 기본값: FARM_TOKEN
+    options = parser.parse_args()
+
+    worker = FarmWorker(
+        host=options.host,
+        port=options.port,
+        unix_socket=options.unix_socket,
+        name=options.name,
+        cores=options.cores,
+        cores_per_case=options.cores_per_case,
+        case_root=options.case_root,
+        template_directory=options.template,
+        solver=options.solver,
+        scratch_root=options.scratch_root,
+        token=options.token,
+    )
+    asyncio.run(worker.run())
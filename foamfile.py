@@ -0,0 +1,493 @@
+"""
+OpenFOAM 메시(constant/polyMesh)와 volume field 파일을 foamToVTK, sample 같은 별도 프로세스 없이
+NumPy 배열로 읽습니다. ascii와 binary 형식, gzip으로 압축된 파일(.gz)을 지원하며,
+압축하지 않은 binary 파일의 리스트는 파일을 메모리 매핑한 배열로 반환합니다.
+
+    python foamfile.py <케이스 디렉토리> p walls
+"""
+
+import functools
+import gzip
+import mmap
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+COMPONENTS = {
+    "scalar": 1,
+    "label": 1,
+    "vector": 3,
+    "symmTensor": 6,
+    "tensor": 9,
+    "sphericalTensor": 1,
+}
+PUNCTUATION = b"{}()[];"
+NESTED_LIST_END = re.compile(rb"\)\s*\)")
+
+
+class FoamFileParser:
+    """
+    바이트 버퍼(bytes 또는 mmap)를 토큰 단위로 읽으며 FoamFile 헤더, dictionary, 리스트를 파싱합니다.
+    binary 리스트는 헤더의 arch 항목에 따라 label/scalar 크기와 byte order를 정합니다.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.position = 0
+        self.header = {}
+        self.binary = False
+        self.label_dtype = np.dtype("<i4")
+        self.scalar_dtype = np.dtype("<f8")
+
+    def parse(self):
+        if self.peek() == "FoamFile":
+            self.token()
+            self.expect("{")
+            self.header = self.parse_dict()
+            self._set_format(self.header)
+
+        element = self._element_type(self.header.get("class", ""))
+        if self.peek_is_count():
+            if self.header.get("class") == "polyBoundaryMesh":
+                return self.parse_boundary()
+            if self.header.get("class") == "faceCompactList":
+                offsets = self.parse_list("label")
+                return offsets, self.parse_list("label")
+            if self.header.get("class") == "faceList":
+                return self.parse_list("face")
+            return self.parse_list(element)
+        return self.parse_dict()
+
+    def _set_format(self, header):
+        self.binary = header.get("format") == "binary"
+        arch = header.get("arch", "LSB;label=32;scalar=64")
+        byte_order = ">" if "MSB" in arch else "<"
+        label_bits = re.search(r"label=(\d+)", arch)
+        scalar_bits = re.search(r"scalar=(\d+)", arch)
+        self.label_dtype = np.dtype(
+            f"{byte_order}i{int(label_bits.group(1)) // 8 if label_bits else 4}"
+        )
+        self.scalar_dtype = np.dtype(
+            f"{byte_order}f{int(scalar_bits.group(1)) // 8 if scalar_bits else 8}"
+        )
+
+    @staticmethod
+    def _element_type(name):
+        if name.startswith("List<"):
+            name = name[5:-1]
+        for element in ("symmTensor", "sphericalTensor", "tensor", "vector", "label"):
+            if element.lower() in name.lower():
+                return element
+        return "scalar"
+
+    def skip_space(self):
+        buffer, position = self.buffer, self.position
+        length = len(buffer)
+        while position < length:
+            character = buffer[position : position + 1]
+            if character.isspace():
+                position += 1
+            elif buffer[position : position + 2] == b"//":
+                end = buffer.find(b"\n", position)
+                position = length if end < 0 else end + 1
+            elif buffer[position : position + 2] == b"/*":
+                end = buffer.find(b"*/", position + 2)
+                position = length if end < 0 else end + 2
+            else:
+                break
+        self.position = position
+
+    def token(self):
+        self.skip_space()
+        buffer, start = self.buffer, self.position
+        if start >= len(buffer):
+            return None
+        character = buffer[start : start + 1]
+        if character in PUNCTUATION:
+            self.position = start + 1
+            return character.decode()
+        if character == b'"':
+            end = buffer.find(b'"', start + 1)
+            self.position = end + 1
+            return buffer[start + 1 : end].decode()
+        end = start
+        length = len(buffer)
+        while end < length:
+            character = buffer[end : end + 1]
+            if character.isspace() or character in PUNCTUATION or character == b'"':
+                break
+            end += 1
+        self.position = end
+        return buffer[start:end].decode()
+
+    def peek(self):
+        position = self.position
+        token = self.token()
+        self.position = position
+        return token
+
+    def peek_is_count(self):
+        token = self.peek()
+        return token is not None and token.isdigit()
+
+    def expect(self, expected):
+        token = self.token()
+        if token != expected:
+            raise ValueError(
+                f"expected {expected!r} but found {token!r} at byte {self.position}"
+            )
+
+    def parse_dict(self):
+        entries = {}
+        while True:
+            key = self.token()
+            if key is None or key == "}":
+                return entries
+            if key == ";":
+                continue
+            if key.startswith("#"):
+                # #include, #includeEtc 등의 지시문은 인자 하나를 건너뜁니다.
+                self.token()
+                continue
+            if self.peek() == "{":
+                self.token()
+                entries[key] = self.parse_dict()
+            else:
+                entries[key] = self.parse_value()
+
+    def parse_value(self):
+        """
+        ';'까지의 값을 읽습니다. uniform/nonuniform 값은 NumPy 배열(또는 float)로 변환합니다.
+        """
+        tokens = []
+        element = "scalar"
+        while True:
+            token = self.peek()
+            if token is None or token == "}":
+                break
+            if token == ";":
+                self.token()
+                break
+            if token.startswith("List<"):
+                element = self._element_type(token)
+                self.token()
+            elif token.isdigit() and self._first_word(tokens) == "nonuniform":
+                tokens.append(self.parse_list(element))
+            elif token in ("(", "["):
+                self.token()
+                tokens.append(self.parse_tuple("]" if token == "[" else ")"))
+            else:
+                tokens.append(self.token())
+
+        if len(tokens) == 2 and self._first_word(tokens) in ("uniform", "nonuniform"):
+            value = tokens[1]
+            return float(value) if isinstance(value, str) else value
+        return tokens[0] if len(tokens) == 1 else tokens
+
+    @staticmethod
+    def _first_word(tokens):
+        return tokens[0] if tokens and isinstance(tokens[0], str) else None
+
+    def parse_tuple(self, closing):
+        """
+        여는 괄호 다음부터 closing까지 읽습니다. 숫자로만 이루어져 있으면 배열로 반환합니다.
+        """
+        items = []
+        while (token := self.token()) != closing:
+            if token is None:
+                raise ValueError("unterminated tuple")
+            items.append(self.parse_tuple(")") if token == "(" else token)
+        try:
+            return np.array(items, dtype=np.float64)
+        except (TypeError, ValueError):
+            return items
+
+    def parse_list(self, element):
+        """
+        `N(...)` 또는 `N{value}` 형식의 리스트를 읽습니다. element가 "face"이면 (offsets, labels)를 반환합니다.
+        """
+        count = int(self.token())
+        opening = self.token()
+        components = COMPONENTS.get(element, 1)
+        dtype = self.label_dtype if element in ("label", "face") else self.scalar_dtype
+        shape = (count,) if components == 1 else (count, components)
+
+        if opening == "{":
+            if self.binary:
+                value = self._read_binary(dtype, components)
+            else:
+                value = self.parse_value_token(components)
+            self.expect("}")
+            return np.broadcast_to(np.asarray(value, dtype=dtype), shape)
+        if opening != "(":
+            raise ValueError(f"expected list at byte {self.position}")
+
+        if self.binary and element != "face":
+            values = self._read_binary(dtype, count * components)
+            self.expect(")")
+            return values.reshape(shape)
+        return self._read_ascii_list(element, count, dtype, shape)
+
+    def parse_value_token(self, components):
+        if components == 1:
+            return float(self.token())
+        self.expect("(")
+        return self.parse_tuple(")")
+
+    def _read_binary(self, dtype, count):
+        # 파일을 mmap으로 열었으면 복사 없이 파일 내용을 가리키는 배열이 됩니다.
+        values = np.frombuffer(self.buffer, dtype, count, self.position)
+        self.position += count * dtype.itemsize
+        return values
+
+    def _read_ascii_list(self, element, count, dtype, shape):
+        if count == 0:
+            self.expect(")")
+            return np.empty(shape, dtype)
+        if COMPONENTS.get(element, 1) == 1 and element != "face":
+            end = self.buffer.find(b")", self.position)
+        else:
+            end = NESTED_LIST_END.search(self.buffer, self.position).end() - 1
+        data = self.buffer[self.position : end]
+        self.position = end + 1
+        if element == "face":
+            return self._faces_from_ascii(
+                np.array(data.replace(b"(", b" ").replace(b")", b" ").split(), dtype),
+                count,
+            )
+        return np.array(data.translate(None, b"()").split(), dtype).reshape(shape)
+
+    @staticmethod
+    def _faces_from_ascii(values, count):
+        """
+        `n(v0 v1 ...)` 목록을 faceCompactList와 같은 (offsets, labels) 형식으로 바꿉니다.
+        """
+        size = int(values[0])
+        if len(values) == count * (size + 1) and np.all(values[:: size + 1] == size):
+            # 모든 면의 꼭짓점 수가 같은 경우 (2D 메시의 사각형 면)
+            labels = values.reshape(count, size + 1)[:, 1:].ravel()
+            return np.arange(0, count * size + 1, size, dtype=values.dtype), labels
+
+        offsets = np.empty(count + 1, values.dtype)
+        offsets[0] = 0
+        keep = np.ones(len(values), bool)
+        position = 0
+        for face in range(count):
+            size = int(values[position])
+            keep[position] = False
+            offsets[face + 1] = offsets[face] + size
+            position += size + 1
+        return offsets, values[keep]
+
+    def parse_boundary(self):
+        count = int(self.token())
+        self.expect("(")
+        patches = {}
+        for _ in range(count):
+            name = self.token()
+            self.expect("{")
+            patch = self.parse_dict()
+            patch["nFaces"] = int(patch["nFaces"])
+            patch["startFace"] = int(patch["startFace"])
+            patches[name] = patch
+        self.expect(")")
+        return patches
+
+
+def read_foam_file(path):
+    """
+    OpenFOAM 파일을 읽어 (헤더, 내용)을 반환합니다. 내용은 파일 종류에 따라 dict, 배열,
+    (offsets, labels) 또는 patch 정보 dict입니다. path가 없고 path.gz가 있으면 압축 파일을 읽습니다.
+    """
+    path = os.path.expanduser(path)
+    if not os.path.exists(path) and os.path.exists(path + ".gz"):
+        path += ".gz"
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            buffer = f.read()
+    else:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    parser = FoamFileParser(buffer)
+    content = parser.parse()
+    return parser.header, content
+
+
+def read_field(path):
+    """
+    volume field 파일을 읽어 {"class", "internalField", "boundaryField"} dict를 반환합니다.
+    """
+    header, content = read_foam_file(path)
+    for patch in content.get("boundaryField", {}).values():
+        value = patch.get("value") if isinstance(patch, dict) else None
+        # 초기 조건 파일의 `value $internalField;` 같은 참조를 풀어 줍니다.
+        if isinstance(value, str) and value.startswith("$"):
+            patch["value"] = content.get(value[1:])
+    return {
+        "class": header.get("class"),
+        "internalField": content.get("internalField"),
+        "boundaryField": content.get("boundaryField", {}),
+    }
+
+
+def latest_time(case_directory):
+    """
+    케이스 디렉토리에서 가장 늦은 시간 디렉토리 이름을 반환합니다. (0 제외, 없으면 None)
+    """
+    times = []
+    for name in os.listdir(os.path.expanduser(case_directory)):
+        try:
+            value = float(name)
+        except ValueError:
+            continue
+        if value > 0:
+            times.append((value, name))
+    return max(times)[1] if times else None
+
+
+class FoamMesh:
+    """
+    constant/polyMesh를 필요한 파일만 읽어 캐시합니다.
+    """
+
+    def __init__(self, case_directory):
+        self.directory = os.path.join(
+            os.path.expanduser(case_directory), "constant", "polyMesh"
+        )
+
+    def _read(self, name):
+        return read_foam_file(os.path.join(self.directory, name))[1]
+
+    @functools.cached_property
+    def points(self):
+        return self._read("points")
+
+    @functools.cached_property
+    def faces(self):
+        """
+        (offsets, labels): i번째 면의 꼭짓점은 labels[offsets[i]:offsets[i + 1]]입니다.
+        """
+        return self._read("faces")
+
+    @functools.cached_property
+    def owner(self):
+        return self._read("owner")
+
+    @functools.cached_property
+    def neighbour(self):
+        return self._read("neighbour")
+
+    @functools.cached_property
+    def boundary(self):
+        return self._read("boundary")
+
+    @property
+    def n_cells(self):
+        return int(self.owner.max()) + 1
+
+    def patch_slice(self, patch):
+        start = self.boundary[patch]["startFace"]
+        return slice(start, start + self.boundary[patch]["nFaces"])
+
+    def face_centres(self, patch=None):
+        """
+        면 꼭짓점의 평균 위치입니다. patch를 주면 해당 patch의 면만 계산합니다.
+        """
+        offsets, labels = self._face_labels(patch)
+        sizes = np.diff(offsets)
+        sums = np.add.reduceat(self.points[labels], offsets[:-1] - offsets[0])
+        return sums / sizes[:, None]
+
+    def face_area_vectors(self, patch=None):
+        """
+        면의 법선 방향 면적 벡터입니다. (중심점 기준 삼각형 분할의 외적 합)
+        """
+        offsets, labels = self._face_labels(patch)
+        centres = self.face_centres(patch)
+        sizes = np.diff(offsets)
+        face_index = np.repeat(np.arange(len(sizes)), sizes)
+        # 각 꼭짓점의 다음 꼭짓점 (마지막 꼭짓점은 첫 꼭짓점으로 이어짐)
+        local = np.arange(len(labels)) - np.repeat(offsets[:-1] - offsets[0], sizes)
+        following = np.arange(len(labels)) + 1
+        last = local == sizes[face_index] - 1
+        following[last] -= sizes[face_index][last]
+        current = self.points[labels] - centres[face_index]
+        nxt = self.points[labels[following]] - centres[face_index]
+        return 0.5 * np.add.reduceat(np.cross(current, nxt), offsets[:-1] - offsets[0])
+
+    def _face_labels(self, patch):
+        offsets, labels = self.faces
+        if patch is not None:
+            faces = self.patch_slice(patch)
+            offsets = offsets[faces.start : faces.stop + 1]
+            labels = labels[offsets[0] : offsets[-1]]
+        return np.asarray(offsets), np.asarray(labels)
+
+
+# value 항목 없이 면 값이 정해지는 경계 조건
+ZERO_GRADIENT_TYPES = ("zeroGradient",)  # 면에 접한 셀의 값
+ZERO_VALUE_TYPES = ("noSlip",)  # 0
+# 스칼라는 셀 값, 벡터는 셀 값에서 면 법선 성분을 뺀 값
+SLIP_TYPES = ("slip", "symmetry", "symmetryPlane")
+
+
+def patch_values(case_directory, field, patch="walls", time_directory=None, mesh=None):
+    """
+    time_directory(기본값: 마지막 시간) 디렉토리의 field 값을 patch의 면마다 반환합니다.
+    boundaryField에 value가 없으면 경계 조건 type에 따라 면 값을 정합니다.
+    zeroGradient는 면에 접한 셀의 값, noSlip은 0, slip/symmetry/symmetryPlane은 셀 값의 접선 성분이며,
+    그 밖의 type은 값을 추측하지 않고 ValueError를 발생시킵니다.
+    """
+    case_directory = os.path.expanduser(case_directory)
+    time_directory = time_directory or latest_time(case_directory)
+    mesh = mesh or FoamMesh(case_directory)
+    data = read_field(os.path.join(case_directory, str(time_directory), field))
+    n_faces = mesh.boundary[patch]["nFaces"]
+    components = COMPONENTS[FoamFileParser._element_type(data["class"] or "")]
+    value_shape = () if components == 1 else (components,)
+
+    condition = data["boundaryField"].get(patch)
+    if not isinstance(condition, dict):
+        raise ValueError(f"{field} has no boundaryField entry for patch {patch}")
+    value = condition.get("value")
+    if value is not None:
+        value = np.asarray(value)
+        if value.shape == value_shape:
+            return np.broadcast_to(value, (n_faces, *value_shape))
+        return value
+
+    patch_type = condition.get("type")
+    if patch_type in ZERO_VALUE_TYPES:
+        return np.zeros((n_faces, *value_shape))
+    if patch_type not in ZERO_GRADIENT_TYPES + SLIP_TYPES:
+        raise ValueError(
+            f"{field} on {patch}: cannot evaluate boundary type {patch_type}"
+            " without a value entry"
+        )
+    internal = np.asarray(data["internalField"])
+    if internal.shape == value_shape:
+        values = np.broadcast_to(internal, (n_faces, *value_shape))
+    else:
+        values = internal[mesh.owner[mesh.patch_slice(patch)]]
+    if patch_type in SLIP_TYPES and components != 1:
+        if components != 3:
+            raise ValueError(f"{field} on {patch}: {patch_type} needs a vector field")
+        normals = mesh.face_area_vectors(patch)
+        normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+        values = values - np.sum(values * normals, axis=1, keepdims=True) * normals
+    return values
+
+
+if __name__ == "__main__":
+    case_directory, field = sys.argv[1], sys.argv[2]
+    patch = sys.argv[3] if len(sys.argv) > 3 else "walls"
+    start = time.perf_counter()
+    values = patch_values(case_directory, field, patch)
+    elapsed = time.perf_counter() - start
+    print(f"{field} on {patch}: {values.shape} in {elapsed * 1000:.2f} ms")
+    print(
+        f"min={values.min(axis=0)} max={values.max(axis=0)} mean={values.mean(axis=0)}"
+    )
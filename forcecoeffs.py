@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+
+DEFAULT_COLUMNS = ("Time", "Cm", "Cd", "Cl")
+
+
+class ForceCoeffsReader:
+    """
+    forceCoeffs.dat를 마지막으로 읽은 위치부터 이어서 읽어 NumPy 배열에 누적합니다.
+    솔버가 실행 중일 때 여러 번 poll()을 호출해도 새로 추가된 줄만 파싱합니다.
+    """
+
+    def __init__(self, path, dtype=np.float32):
+        self.path = os.path.expanduser(path)
+        self.dtype = dtype
+        self.columns = None
+        self.offset = 0
+        self._buffer = None
+        self._count = 0
+
+    @property
+    def history(self):
+        if self._buffer is None:
+            return np.empty((0, len(self.columns or DEFAULT_COLUMNS)), self.dtype)
+        return self._buffer[: self._count]
+
+    def poll(self):
+        """
+        새로 기록된 완전한 줄만 읽어 history에 추가하고, 추가된 행 수를 반환합니다.
+        """
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        # 아직 쓰는 중인 마지막 줄은 다음 poll에서 읽습니다.
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return 0
+        self.offset += end
+
+        values = []
+        for line in chunk[:end].splitlines():
+            if line.startswith(b"#"):
+                names = line[1:].split()
+                if names and names[0] == b"Time":
+                    self.columns = tuple(name.decode() for name in names)
+            elif line.strip():
+                values.append(line)
+        if not values:
+            return 0
+
+        rows = np.array(b" ".join(values).split(), dtype=np.float64).reshape(
+            len(values), -1
+        )
+        if self.columns is None:
+            self.columns = DEFAULT_COLUMNS + tuple(
+                f"column{i}" for i in range(len(DEFAULT_COLUMNS), rows.shape[1])
+            )
+        self._append(rows.astype(self.dtype))
+        return len(rows)
+
+    def _append(self, rows):
+        if self._buffer is None:
+            self._buffer = np.empty((max(256, len(rows)), rows.shape[1]), self.dtype)
+        required = self._count + len(rows)
+        if required > len(self._buffer):
+            grown = np.empty(
+                (max(required, 2 * len(self._buffer)), rows.shape[1]), self.dtype
+            )
+            grown[: self._count] = self._buffer[: self._count]
+            self._buffer = grown
+        self._buffer[self._count : required] = rows
+        self._count = required
+
+    def column(self, name):
+        return self.history[:, self.columns.index(name)]
+
+
+def tail_statistics(history, columns, window=50):
+    """
+    마지막 window개 반복에서 각 계수의 평균, 표준편차, drift(반복당 선형 추세 기울기)를 계산합니다.
+    진동하는 유동에서도 마지막 한 줄보다 안정적인 값을 얻을 수 있습니다.
+    """
+    tail = np.asarray(history[-window:], dtype=np.float64)
+    time = tail[:, 0]
+    statistics = {}
+    for index, name in enumerate(columns[1:], start=1):
+        values = tail[:, index]
+        drift = np.polyfit(time, values, 1)[0] if len(values) > 1 else 0.0
+        statistics[name] = {
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "drift": float(drift),
+        }
+    return statistics
+
+
+def save_history(path, history, columns):
+    """
+    수렴 이력을 float32 .npz로 저장합니다. 열 이름이 배열 이름이 됩니다.
+    """
+    history = np.asarray(history, dtype=np.float32)
+    np.savez_compressed(
+        os.path.expanduser(path),
+        **{name: history[:, i] for i, name in enumerate(columns)},
+    )
+
+
+def load_history(path):
+    with np.load(os.path.expanduser(path)) as data:
+        return {name: data[name] for name in data.files}
@@ -1,7 +1,22 @@
+import os
+
 from model.agent import Agent
 from AirfoilEnv import make_env
 from train import Train
 from utils import set_seed
+from metrics import MetricsSink, load_records
+from archive import CaseArchive
+from convergence import IterationBudget
+from evaluation import (
+    AdaptiveBudgetEvaluator,
+    AirfoilEvaluator,
+    ArchivingEvaluator,
+    CoalescingEvaluator,
+    MultiFidelityEvaluator,
+)
+from farm import FarmEvaluator, JobServer
+from pipeline import PipelinedEvaluator
+from resources import CorePartition
 
 
 ENV_NAME = "AirfoilEnv"
@@ -19,13 +34,125 @@ learning_rate = 1e-4
 number_of_trajectories = 16
 n_actions = 3
 angle_of_attack = 5.0
+metrics_path = "results/simulation_metrics.jsonl"
+# 케이스마다 forceCoeffs 수렴 이력(.npz)을 저장할 디렉토리 (None이면 tail 평균만 남김, farm 케이스는 저장하지 않음)
+history_directory = "results/force_history"
+# coarse 메시로 먼저 평가하고 유망한 설계만 기본 메시로 재평가
+use_multi_fidelity = False
+# 지정하면 `python farm.py worker`로 접속한 원격 worker에서 케이스를 실행
+# (server와 worker 모두 FARM_TOKEN 환경 변수에 같은 토큰이 필요)
+farm_port = None
+# farm server가 접속을 받을 주소. 다른 머신의 worker를 쓰려면 "0.0.0.0" 등으로 명시적으로 넓힘
+farm_host = "127.0.0.1"
+# 동시에 들어온 같은 설계의 평가 요청을 하나의 케이스로 합침
+coalesce_duplicates = True
+# 예: "/dev/shm". 케이스를 tmpfs에서 실행하고 forceCoeffs만 케이스 디렉토리로 복사
+scratch_root = None
+# 양항비 상위, 무작위 표본, 실패한 케이스의 유동장을 압축하여 보관 (None이면 보관하지 않음)
+archive_path = None
+# 지난 기록의 수렴 반복 수로 케이스별 endTime을 예측 (기록이 쌓이기 전에는 200)
+adaptive_end_time = False
+# 여러 설계를 동시에 평가할 때 다음 케이스의 메시 생성과 이전 케이스의 후처리를 솔버 실행과 겹침
+pipelined_cases = False
+# torch, 형상/SDF(및 직렬 OpenFOAM 유틸리티), MPI rank가 쓸 코어를 나눔 (None이면 나누지 않음)
+# 예: {"torch_cores": None, "geometry_cores": 1}. torch_cores가 None이면 솔버용 NUMBER_OF_PROCESSORS개
+# 코어를 남긴 나머지를 torch에 배정 (farm_port를 쓰면 솔버 코어를 남기지 않음)
+core_partition = None
+# rollout 상태(SDF) 저장 형식: "float32", "float16", 상태별 scale로 양자화한 "uint8",
+# 또는 원 목록만 저장하고 mini batch마다 상태를 다시 그리는 "circles"
+state_dtype = "float32"
+# "circles" 형식에서 다음 mini batch의 상태를 미리 그릴 thread 수
+render_workers = 1
+# 상태 표현: 240x340 SDF 이미지와 AirfoilCNN "sdf", 또는 airfoil 표면 보간점 36개와 PointEncoder "points"
+# ("points"는 상태를 만들 때 그림을 그리지 않고, 최고 기록의 airfoil만 그림)
+state_type = "sdf"
+# SDF 상태의 해상도 (높이, 너비). 환경의 SDF 생성, 상태 버퍼, AirfoilCNN이 모두 이 값을 따름
+# (예: (60, 85), (120, 170)은 상태 생성과 학습이 더 빠름, benchmarks.bench_resolution 참고)
+state_resolution = (240, 340)
+# Actor와 Critic이 AirfoilCNN 하나를 공유 (상태당 forward 한 번, 업데이트당 backward 한 번)
+shared_encoder = False
+# AirfoilCNN의 CPU 성능 옵션 (NHWC 메모리 형식, 지원하는 CPU에서 bfloat16 autocast, torch.compile)
+cpu_performance = {"channels_last": False, "bfloat16": False, "compile_encoder": False}
+# rollout 추론에 int8로 양자화한 정책 복사본을 사용 (CPU 전용, 업데이트마다 최근 상태로 다시 양자화)
+quantized_rollout = False
+# 함께 진행할 환경 수. 상태를 배치로 한 번에 추론하고 CFD 평가를 동시에 실행
+# (1보다 크면 동시 평가가 가능한 farm_port 또는 pipelined_cases가 필요)
+parallel_envs = 1
 
 if __name__ == "__main__":
     set_seed(42)  # 시드 고정
-    env = make_env(num_points=num_points, angle_of_attack=angle_of_attack)
-    agent = Agent(n_actions=n_actions, lr=learning_rate)
+    if parallel_envs > 1 and farm_port is None and not pipelined_cases:
+        raise ValueError(
+            "parallel_envs > 1 requires farm_port or pipelined_cases"
+            " (AirfoilEvaluator runs one case directory at a time)"
+        )
+    if archive_path is not None and (farm_port is not None or pipelined_cases):
+        raise ValueError(
+            "archive_path requires the local AirfoilEvaluator"
+            " (ArchivingEvaluator needs a single run directory),"
+            " unset farm_port and pipelined_cases"
+        )
+    if scratch_root is not None and farm_port is not None:
+        raise ValueError(
+            "scratch_root is not used with farm_port"
+            " (pass --scratch_root to `python farm.py worker` instead)"
+        )
+    if quantized_rollout and state_type != "sdf":
+        raise ValueError(
+            "quantized_rollout requires state_type='sdf'"
+            " (only AirfoilCNN can be quantized)"
+        )
+    if core_partition is not None:
+        partition = dict(core_partition)
+        if farm_port is not None:
+            # 케이스는 원격 worker에서 실행되므로 이 호스트에 MPI rank용 코어를 남기지 않음
+            partition.setdefault("solver_cores", 0)
+            partition.setdefault("ranks", 0)
+        print(CorePartition(**partition).apply().report())
+    if farm_port is not None:
+        evaluator = FarmEvaluator(JobServer(host=farm_host, port=farm_port).start())
+    elif pipelined_cases:
+        evaluator = PipelinedEvaluator(
+            scratch_root=scratch_root, history_directory=history_directory
+        )
+    else:
+        evaluator = AirfoilEvaluator(
+            scratch_root=scratch_root, history_directory=history_directory
+        )
+        if archive_path is not None:
+            evaluator = ArchivingEvaluator(evaluator, CaseArchive(archive_path))
+    if adaptive_end_time:
+        budget = IterationBudget()
+        if os.path.exists(metrics_path):
+            budget = IterationBudget.from_records(load_records(metrics_path))
+        evaluator = AdaptiveBudgetEvaluator(evaluator, budget)
+    if coalesce_duplicates:
+        evaluator = CoalescingEvaluator(evaluator)
+    if use_multi_fidelity:
+        evaluator = MultiFidelityEvaluator(evaluator)
+    metrics_sink = MetricsSink(metrics_path)
+    envs = [
+        make_env(
+            num_points=num_points,
+            angle_of_attack=angle_of_attack,
+            metrics_sink=metrics_sink,
+            evaluator=evaluator,
+            state_type=state_type,
+            state_resolution=state_resolution,
+        )
+        for _ in range(parallel_envs)
+    ]
+    agent = Agent(
+        n_actions=n_actions,
+        lr=learning_rate,
+        shared_encoder=shared_encoder,
+        state_type=state_type,
+        state_shape=envs[0].state_shape,
+        **cpu_performance,
+    )
     trainer = Train(
-        env=env,
+        env=envs[0],
+        envs=envs,
         env_name=ENV_NAME,
         agent=agent,
         horizon=T,
@@ -36,5 +163,8 @@ if __name__ == "__main__":
         number_of_trajectories=number_of_trajectories,
         beta=beta,
         epsilon=clip_range,
+        state_dtype=state_dtype,
+        render_workers=render_workers,
+        quantized_rollout=quantized_rollout,
     )
     trainer.step()
@@ -7,6 +7,7 @@ from NACA import naca0012, naca4412, data_0012, data_4412
 from utils import bezier_curve
 from simulation import run_simulation
 from OPENFOAM_MAKER import make_block_mesh_dict
+from metrics import MetricsSink
 
 num_points = 36
 
@@ -150,6 +151,7 @@ AOA_4412 = data_4412["AOA"]
 
 simulation_results_0012_file = "simulation/simulation_results_0012.json"
 simulation_results_4412_file = "simulation/simulation_results_4412.json"
+metrics_sink = MetricsSink("simulation/simulation_metrics.jsonl")
 
 # Load or run simulations for NACA 0012
 simulation_results_0012 = load_simulation_results(simulation_results_0012_file)
@@ -164,7 +166,9 @@ if not simulation_results_0012:
                 angle_of_attack=aoa,
                 freestream_velocity=freestream_velocity,
             )
-            Cm, Cd, Cl = run_simulation(verbose=False)
+            record = run_simulation(verbose=False)
+            metrics_sink.write(record, airfoil="0012", RN=rn, angle_of_attack=aoa)
+            Cm, Cd, Cl = record
             print(
                 f"Re = {rn:.1e}, AOA = {aoa}, CM = {Cm}, CL = {Cl}, CD = {Cd}, freestream_velocity = {freestream_velocity:.2f}m/s"
             )
@@ -188,7 +192,9 @@ if not simulation_results_4412:
                 angle_of_attack=aoa,
                 freestream_velocity=freestream_velocity,
             )
-            Cm, Cd, Cl = run_simulation(verbose=False)
+            record = run_simulation(verbose=False)
+            metrics_sink.write(record, airfoil="4412", RN=rn, angle_of_attack=aoa)
+            Cm, Cd, Cl = record
             print(
                 f"Re = {rn:.1e}, AOA = {aoa}, CL = {Cl}, CD = {Cd}, freestream_velocity = {freestream_velocity:.2f}m/s"
             )
@@ -0,0 +1,254 @@
+"""
+NACA 0012/4412에 대해 여러 메시 해상도(fidelity)를 병렬로 실행하여 메시 독립성을 확인합니다.
+각 경우의 Cl, Cd를 Richardson 외삽(f(h) = f_inf + C h^p)하여 메시 무한 세분화 값을 추정하고,
+모든 경우에서 외삽값과의 상대 오차가 tolerance 이내인 가장 성긴 메시와 단계별 비용을 보고합니다.
+fidelity로 모든 방향의 셀 수를 함께 바꾸는 전역 세분화만 연구합니다. first_layer_thickness, cell_size_* 같은
+blockMeshDict 기본값은 고정된 채로 남으며, 이 값들의 적절성은 이 연구로 확인되지 않습니다.
+
+    python mesh_study.py --fidelities 0.5 0.71 1 1.41 2 --angles 4 --tolerance 0.01
+    python mesh_study.py --solver fake   # OpenFOAM 없이 동작 확인
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+import numpy as np
+
+from NACA import naca0012, naca4412
+from simulation import (
+    NUMBER_OF_PROCESSORS,
+    SIMULATION_DIRECTORY,
+    evaluate_airfoil_async,
+    prepare_case_directory,
+)
+
+AIRFOILS = {"0012": naca0012, "4412": naca4412}
+
+
+def richardson_extrapolation(spacings, values, orders=np.linspace(0.5, 4.0, 71)):
+    """
+    f(h) = f_inf + C h^p를 최소제곱으로 맞춰 (f_inf, p)를 반환합니다.
+    p는 orders 중 잔차가 가장 작은 값이며, 해상도가 2개뿐이면 2차 정확도(p=2)를 가정합니다.
+    """
+    spacings = np.asarray(spacings, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    spacings = spacings / spacings.min()
+    if len(values) < 3:
+        orders = [2.0]
+
+    best = None
+    for order in orders:
+        design = np.stack([np.ones_like(spacings), spacings**order], axis=1)
+        coefficients = np.linalg.lstsq(design, values, rcond=None)[0]
+        error = np.sum((design @ coefficients - values) ** 2)
+        if best is None or error < best[0]:
+            best = (error, float(order), float(coefficients[0]))
+    _, order, extrapolated = best
+    return extrapolated, order
+
+
+async def run_levels(
+    fidelities,
+    airfoils,
+    angles,
+    freestream_velocity,
+    case_root,
+    template_directory,
+    solver,
+    end_time,
+    max_concurrency,
+):
+    """
+    (airfoil, 받음각, fidelity)마다 별도의 케이스 디렉토리에서 동시에 실행합니다.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    jobs = [
+        (name, angle, fidelity)
+        for name in airfoils
+        for angle in angles
+        for fidelity in fidelities
+    ]
+
+    async def run(index, name, angle, fidelity):
+        case_directory = os.path.join(case_root, f"case{index}")
+        if solver == "fake":
+            from fake_openfoam import make_case
+
+            make_case(case_directory)
+        else:
+            prepare_case_directory(case_directory, template_directory)
+        airfoil = AIRFOILS[name]
+        points = np.array([airfoil["x"], airfoil["y"]], dtype=np.float64).T
+        async with semaphore:
+            record = await evaluate_airfoil_async(
+                points,
+                angle,
+                freestream_velocity=freestream_velocity,
+                case_directory=case_directory,
+                solver=solver,
+                fidelity=fidelity,
+                end_time=end_time,
+            )
+        if record.failed:
+            # 한 단계라도 빠지면 외삽할 수 없으므로 연구 전체를 중단합니다.
+            raise RuntimeError(
+                f"{name} at {angle} deg, fidelity {fidelity} failed: {record.error}"
+            )
+        if record.cells is None:
+            # 격자 간격을 셀 수로 정하므로 셀 수 없이는 외삽할 수 없습니다.
+            raise RuntimeError(
+                f"{name} at {angle} deg, fidelity {fidelity}: could not read the cell"
+                f" count from {case_directory}/constant/polyMesh/owner"
+            )
+        return {
+            "airfoil": name,
+            "angle_of_attack": angle,
+            "fidelity": fidelity,
+            "cells": record.cells,
+            "Cl": record.Cl,
+            "Cd": record.Cd,
+            "wall_time": record.wall_time,
+            "cpu_time": sum(stage["cpu_time"] for stage in record.stages.values()),
+            "iterations": record.iterations,
+        }
+
+    return await asyncio.gather(*(run(index, *job) for index, job in enumerate(jobs)))
+
+
+def analyze(results, tolerance):
+    """
+    경우별로 Cl, Cd를 외삽하고 fidelity별 최대 상대 오차와 평균 비용을 계산합니다.
+    """
+    cases = {}
+    for result in results:
+        cases.setdefault((result["airfoil"], result["angle_of_attack"]), []).append(
+            result
+        )
+
+    for levels in cases.values():
+        levels.sort(key=lambda result: result["fidelity"])
+        # 2D 메시이므로 대표 격자 간격은 셀 수의 -1/2 제곱에 비례합니다.
+        spacings = [result["cells"] ** -0.5 for result in levels]
+        for name in ("Cl", "Cd"):
+            extrapolated, order = richardson_extrapolation(
+                spacings, [result[name] for result in levels]
+            )
+            for result in levels:
+                result[f"{name}_extrapolated"] = extrapolated
+                result[f"{name}_order"] = order
+                result[f"{name}_error"] = abs(result[name] - extrapolated) / max(
+                    abs(extrapolated), 1e-12
+                )
+
+    summary = {}
+    for fidelity in sorted({result["fidelity"] for result in results}):
+        levels = [result for result in results if result["fidelity"] == fidelity]
+        summary[fidelity] = {
+            "cells": float(np.mean([result["cells"] for result in levels])),
+            "max_error": max(
+                max(result["Cl_error"], result["Cd_error"]) for result in levels
+            ),
+            "wall_time": float(np.mean([result["wall_time"] for result in levels])),
+            "cpu_time": float(np.mean([result["cpu_time"] for result in levels])),
+        }
+    adequate = [
+        fidelity
+        for fidelity, level in summary.items()
+        if level["max_error"] <= tolerance
+    ]
+    recommended = min(adequate) if adequate else None
+    return cases, summary, recommended
+
+
+def print_report(cases, summary, recommended, tolerance):
+    for (name, angle), levels in cases.items():
+        print(f"\nNACA {name}, AoA {angle}")
+        print(
+            f"{'fidelity':>9}{'cells':>9}{'Cl':>11}{'err':>8}{'Cd':>11}{'err':>8}"
+            f"{'wall (s)':>10}{'cpu (s)':>10}"
+        )
+        for result in levels:
+            print(
+                f"{result['fidelity']:>9.3g}{result['cells']:>9}"
+                f"{result['Cl']:>11.5f}{result['Cl_error']:>8.2%}"
+                f"{result['Cd']:>11.5f}{result['Cd_error']:>8.2%}"
+                f"{result['wall_time']:>10.2f}{result['cpu_time']:>10.2f}"
+            )
+        print(
+            f"{'extrapolated':>18}{levels[0]['Cl_extrapolated']:>11.5f}"
+            f" (p={levels[0]['Cl_order']:.2f})"
+            f"{levels[0]['Cd_extrapolated']:>11.5f} (p={levels[0]['Cd_order']:.2f})"
+        )
+
+    print(
+        f"\n{'fidelity':>9}{'cells':>9}{'max err':>10}{'wall (s)':>10}{'cpu (s)':>10}"
+    )
+    for fidelity, level in summary.items():
+        print(
+            f"{fidelity:>9.3g}{level['cells']:>9.0f}{level['max_error']:>10.2%}"
+            f"{level['wall_time']:>10.2f}{level['cpu_time']:>10.2f}"
+        )
+    if recommended is None:
+        print(f"\nNo level is within {tolerance:.1%} of the extrapolated values.")
+    else:
+        print(
+            f"\nRecommended fidelity: {recommended:g} "
+            f"(coarsest level within {tolerance:.1%} of the extrapolated Cl/Cd)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mesh independence study")
+    parser.add_argument(
+        "--fidelities", type=float, nargs="+", default=[0.5, 0.71, 1.0, 1.41, 2.0]
+    )
+    parser.add_argument(
+        "--airfoils", nargs="+", choices=list(AIRFOILS), default=list(AIRFOILS)
+    )
+    parser.add_argument("--angles", type=float, nargs="+", default=[4.0])
+    parser.add_argument("--freestream_velocity", type=float, default=222.22)
+    parser.add_argument("--tolerance", type=float, default=0.01)
+    parser.add_argument("--end_time", type=int, default=200)
+    parser.add_argument("--case_root", type=str, default="~/mesh_study_cases")
+    parser.add_argument("--template", type=str, default=SIMULATION_DIRECTORY)
+    parser.add_argument("--solver", choices=["openfoam", "fake"], default="openfoam")
+    parser.add_argument(
+        "--max_concurrency",
+        type=int,
+        default=max(1, (os.cpu_count() or 1) // NUMBER_OF_PROCESSORS),
+    )
+    parser.add_argument("--output", type=str, default="results/mesh_study.json")
+    options = parser.parse_args()
+
+    results = asyncio.run(
+        run_levels(
+            options.fidelities,
+            options.airfoils,
+            options.angles,
+            options.freestream_velocity,
+            os.path.expanduser(options.case_root),
+            options.template,
+            options.solver,
+            options.end_time,
+            options.max_concurrency,
+        )
+    )
+    cases, summary, recommended = analyze(results, options.tolerance)
+    print_report(cases, summary, recommended, options.tolerance)
+
+    os.makedirs(os.path.dirname(options.output) or ".", exist_ok=True)
+    with open(options.output, "w") as f:
+        json.dump(
+            {
+                "results": results,
+                "summary": {
+                    str(fidelity): level for fidelity, level in summary.items()
+                },
+                "recommended_fidelity": recommended,
+                "tolerance": options.tolerance,
+            },
+            f,
+            indent=2,
+        )
@@ -0,0 +1,239 @@
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+from convergence import iterations_to_convergence
+from forcecoeffs import tail_statistics
+
+
+class SimulationRecord:
+    """
+    한 번의 시뮬레이션 결과와 단계별 소요 시간/자원 사용량을 담습니다.
+    기존 코드와의 호환을 위해 `Cm, Cd, Cl = record` 형태로 풀어 쓸 수 있습니다.
+    """
+
+    def __init__(self, case_directory):
+        self.case_directory = case_directory
+        self.Cm = None
+        self.Cd = None
+        self.Cl = None
+        self.iterations = None
+        self.cells = None
+        self.fidelity = None
+        self.end_time = None
+        self.residual_iterations = None  # 모든 초기 잔차가 허용 오차 아래로 내려간 반복
+        self.final_residuals = {}
+        self.descriptors = {}  # 형상/유동 조건 기술자
+        self.stages = {}
+        self.history = None  # forceCoeffs 수렴 이력 (float32, 반복 x 열)
+        self.history_path = None  # 수렴 이력을 저장한 .npz 경로
+        self.columns = None
+        self.coefficients = {}  # 계수별 tail 평균, 표준편차, drift
+        # MultiFidelityEvaluator가 coarse 계수를 fine 기준으로 보정했으면 {"Cl": 더한 값, "Cd": 곱한 값}
+        self.bias_correction = None
+        # 동시에 들어온 같은 설계의 평가(CoalescingEvaluator)를 공유한 복사본이면 True
+        self.coalesced = False
+        self.failed = False
+        self.error = None  # 실패한 단계의 오류 메시지
+
+    def __iter__(self):
+        return iter((self.Cm, self.Cd, self.Cl))
+
+    def set_force_history(self, history, columns, window):
+        """
+        forceCoeffs 이력을 저장하고 마지막 window개 반복의 평균을 Cm, Cd, Cl로 사용합니다.
+        솔버가 한 줄도 쓰지 않았으면 실패한 케이스로 표시합니다.
+        """
+        self.history = history
+        self.columns = columns
+        if len(history) == 0:
+            self.fail("forceCoeffs.dat has no rows")
+            return
+        self.coefficients = tail_statistics(history, columns, window)
+        self.Cm = self.coefficients["Cm"]["mean"]
+        self.Cd = self.coefficients["Cd"]["mean"]
+        self.Cl = self.coefficients["Cl"]["mean"]
+        self.iterations = int(history[-1, 0])
+
+    def fail(self, error):
+        """
+        OpenFOAM 명령이 실패한 케이스로 표시합니다. 계수는 None으로 남깁니다.
+        """
+        self.failed = True
+        self.error = str(error)
+        self.Cm = self.Cd = self.Cl = None
+
+    def set_residuals(self, times, residuals, tolerance):
+        """
+        솔버 로그의 잔차 이력으로 수렴까지의 반복 수와 마지막 초기 잔차를 기록합니다.
+        """
+        self.residual_iterations = iterations_to_convergence(
+            times, residuals, tolerance
+        )
+        self.final_residuals = {
+            field: float(values[~np.isnan(values)][-1])
+            for field, values in residuals.items()
+            if np.any(~np.isnan(values))
+        }
+
+    def add_stage(self, name, wall_time, cpu_time, peak_rss_mb=None):
+        self.stages[name] = {
+            "wall_time": wall_time,
+            "cpu_time": cpu_time,
+            "peak_rss_mb": peak_rss_mb,
+        }
+
+    @property
+    def wall_time(self):
+        return sum(stage["wall_time"] for stage in self.stages.values())
+
+    def to_message(self):
+        """
+        다른 프로세스로 전송할 수 있도록 JSON 직렬화 가능한 dict로 변환합니다. (수렴 이력 제외)
+        """
+        return {
+            "case_directory": self.case_directory,
+            "Cm": self.Cm,
+            "Cd": self.Cd,
+            "Cl": self.Cl,
+            "iterations": self.iterations,
+            "cells": self.cells,
+            "fidelity": self.fidelity,
+            "end_time": self.end_time,
+            "residual_iterations": self.residual_iterations,
+            "final_residuals": self.final_residuals,
+            "descriptors": self.descriptors,
+            "stages": self.stages,
+            "coefficients": self.coefficients,
+            "failed": self.failed,
+            "error": self.error,
+            "coalesced": self.coalesced,
+        }
+
+    @classmethod
+    def from_message(cls, message):
+        record = cls(message["case_directory"])
+        for key, value in message.items():
+            setattr(record, key, value)
+        return record
+
+    def to_dict(self):
+        """
+        CSV/JSONL로 기록할 수 있도록 단계별 값을 `<단계>_<항목>` 형태로 펼칩니다.
+        """
+        record = {
+            "case_directory": self.case_directory,
+            "Cm": self.Cm,
+            "Cd": self.Cd,
+            "Cl": self.Cl,
+            "iterations": self.iterations,
+            "cells": self.cells,
+            "fidelity": self.fidelity,
+            "end_time": self.end_time,
+            "residual_iterations": self.residual_iterations,
+            "history_path": self.history_path,
+            "wall_time": self.wall_time,
+            "failed": self.failed,
+            "error": self.error,
+            "coalesced": self.coalesced,
+            **self.descriptors,
+        }
+        for name in ("Cm", "Cd", "Cl"):
+            if name in self.coefficients:
+                record[f"{name}_std"] = self.coefficients[name]["std"]
+                record[f"{name}_drift"] = self.coefficients[name]["drift"]
+        for field, value in self.final_residuals.items():
+            record[f"final_residual_{field}"] = value
+        for name, stage in self.stages.items():
+            for key, value in stage.items():
+                record[f"{name}_{key}"] = value
+        return record
+
+
+class MetricsSink:
+    """
+    SimulationRecord를 파일에 한 줄씩 추가합니다. 확장자가 .csv이면 CSV, 그 외에는 JSONL로 기록합니다.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self.fieldnames = None
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, record, **context):
+        row = {**context, **record.to_dict()}
+        if self.path.endswith(".csv"):
+            self._write_csv(row)
+        else:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(row) + "\n")
+
+    def _write_csv(self, row):
+        if self.fieldnames is None:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                with open(self.path, "r", newline="") as f:
+                    self.fieldnames = next(csv.reader(f))
+            else:
+                self.fieldnames = list(row)
+                with open(self.path, "w", newline="") as f:
+                    csv.writer(f).writerow(self.fieldnames)
+        with open(self.path, "a", newline="") as f:
+            csv.DictWriter(f, self.fieldnames, extrasaction="ignore").writerow(row)
+
+
+def load_records(path):
+    """
+    MetricsSink가 기록한 파일을 dict 리스트로 읽어옵니다.
+    """
+    path = os.path.expanduser(path)
+    with open(path, "r", newline="") as f:
+        if path.endswith(".csv"):
+            return [
+                {key: _to_float(value) for key, value in row.items()}
+                for row in csv.DictReader(f)
+            ]
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records, percentiles=(50, 90, 99)):
+    """
+    숫자형 항목마다 백분위수를 계산합니다. 어떤 단계가 병목인지 확인하는 데 사용합니다.
+    """
+    summary = {}
+    keys = {key for record in records for key in record}
+    for key in sorted(keys):
+        values = [
+            record[key]
+            for record in records
+            if isinstance(record.get(key), (int, float))
+            and not isinstance(record.get(key), bool)
+        ]
+        if not values:
+            continue
+        summary[key] = {
+            f"p{p}": float(value)
+            for p, value in zip(percentiles, np.percentile(values, percentiles))
+        }
+        summary[key]["count"] = len(values)
+    return summary
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+if __name__ == "__main__":
+    # 사용법: python metrics.py results/simulation_metrics.jsonl
+    for key, stats in summarize(load_records(sys.argv[1])).items():
+        print(
+            f"{key:<32}"
+            + " ".join(f"{name}={value:.4g}" for name, value in stats.items())
+        )
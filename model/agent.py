@@ -1,25 +1,99 @@
+import warnings
+
 import torch
 import torch.nn as nn
 from torch.optim import Adam
-from model.model import Actor, Critic
+from model.model import AirfoilCNN, Actor, Critic, bfloat16_supported, make_encoder
 
 
 class Agent(nn.Module):
-    def __init__(self, n_actions=2, lr=1e-4):
+    def __init__(
+        self,
+        n_actions=2,
+        lr=1e-4,
+        shared_encoder=False,
+        value_coef=0.5,
+        channels_last=False,
+        bfloat16=False,
+        compile_encoder=False,
+        state_type="sdf",
+        state_shape=None,
+    ):
         super().__init__()
         self.n_actions = n_actions
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # Actor와 Critic이 하나의 AirfoilCNN을 공유하면 상태마다 한 번만 인코딩하고
+        # actor_loss + value_coef * critic_loss로 한 번만 역전파합니다.
+        self.shared_encoder = shared_encoder
+        self.value_coef = value_coef
+        # 상태 표현 ("sdf": SDF 이미지와 AirfoilCNN, "points": 표면 보간점과 PointEncoder)
+        # state_shape는 env.state_shape (None이면 기본 해상도)
+        self.state_type = state_type
+        self.state_shape = state_shape
         # Actor
-        self.actor = Actor(n_actions).to(self.device)
+        self.actor = Actor(n_actions, make_encoder(state_type, state_shape)).to(
+            self.device
+        )
         # Critic
-        self.critic = Critic().to(self.device)
+        self.critic = Critic(
+            self.actor.encoder
+            if shared_encoder
+            else make_encoder(state_type, state_shape)
+        ).to(self.device)
+        self.configure_encoders(channels_last, bfloat16, compile_encoder)
 
-        self.actor_optimizer = Adam(self.actor.parameters(), lr=lr, eps=1e-8)
-        self.critic_optimizer = Adam(self.critic.parameters(), lr=lr * 5, eps=1e-8)
+        if shared_encoder:
+            # 공유 encoder와 policy head는 lr, value head는 lr * 5 (분리된 경우의 Critic과 같은 비율)
+            self.optimizer = Adam(
+                [
+                    {"params": self.actor.parameters()},
+                    {"params": self.critic.value.parameters(), "lr": lr * 5},
+                ],
+                lr=lr,
+                eps=1e-8,
+            )
+        else:
+            self.actor_optimizer = Adam(self.actor.parameters(), lr=lr, eps=1e-8)
+            self.critic_optimizer = Adam(self.critic.parameters(), lr=lr * 5, eps=1e-8)
 
         self.critic_loss = torch.nn.MSELoss()
 
+    def configure_encoders(self, channels_last, bfloat16, compile_encoder):
+        """
+        AirfoilCNN에 CPU 성능 옵션을 적용합니다. (기본값은 모두 꺼짐)
+        channels_last: NHWC 메모리 형식으로 oneDNN convolution의 layout 변환을 줄입니다.
+        bfloat16: 하드웨어가 지원하면 convolution을 bfloat16 autocast로 실행합니다.
+        compile_encoder: torch.compile로 encoder를 컴파일합니다. (첫 호출과 새 batch 크기에서 컴파일 시간 발생)
+        channels_last와 bfloat16은 AirfoilCNN에만 적용됩니다.
+        """
+        if bfloat16 and not bfloat16_supported(self.device):
+            warnings.warn(
+                f"bfloat16 is not supported on this {self.device}, using float32"
+            )
+            bfloat16 = False
+        encoders = [self.actor.encoder]
+        if self.critic.encoder is not self.actor.encoder:
+            encoders.append(self.critic.encoder)
+        for encoder in encoders:
+            if not isinstance(encoder, AirfoilCNN):
+                if compile_encoder:
+                    encoder.compile()
+                continue
+            if channels_last:
+                encoder.to(memory_format=torch.channels_last)
+                encoder.memory_format = torch.channels_last
+            if bfloat16:
+                encoder.autocast_dtype = torch.bfloat16
+            if compile_encoder:
+                encoder.compile()
+
     def optimize(self, actor_loss, critic_loss):
+        if self.shared_encoder:
+            self.optimizer.zero_grad()
+            (actor_loss + self.value_coef * critic_loss).backward()
+            self.optimizer.step()
+            return
+
         self.actor_optimizer.zero_grad()
         actor_loss.backward()
         self.actor_optimizer.step()
@@ -48,19 +122,34 @@ class Agent(nn.Module):
                 value = self.critic(state)
         return value
 
+    def choose_dists_and_values(self, state, use_grad=True):
+        """
+        행동 분포와 가치를 함께 계산합니다. encoder를 공유하면 상태를 한 번만 인코딩합니다.
+        """
+        with torch.set_grad_enabled(use_grad):
+            if not self.shared_encoder:
+                return self.actor(state), self.critic(state)
+            features = self.actor.encoder(state)
+            return self.actor.head(features), self.critic.head(features)
+
     def choose_actions(self, dist):
         action = dist.sample()
         return action
 
     def scale_actions(self, actions):
+        """
+        (환경 수, 3) 모양의 행동을 환경마다 (x, y, r) 범위로 변환합니다.
+        """
         actions = nn.Sigmoid()(actions)
-        scaled_actions = torch.zeros_like(actions)
         a = 0.12
-        # x 값을 0.2 ~ 0.8로 스케일링
-        scaled_actions[0][0] = actions[0][0] * (1-a) + a
-        # y 값을 -0.1 ~ 0.1로 스케일링
-        scaled_actions[0][1] = actions[0][1] * 0.2 - 0.1
-        # r 값을 0~0.2로 스케일링
-        scaled_actions[0][2] = actions[0][2] * a
-
-        return scaled_actions
+        return torch.stack(
+            [
+                # x 값을 0.12 ~ 1로 스케일링
+                actions[:, 0] * (1 - a) + a,
+                # y 값을 -0.1 ~ 0.1로 스케일링
+                actions[:, 1] * 0.2 - 0.1,
+                # r 값을 0~0.12로 스케일링
+                actions[:, 2] * a,
+            ],
+            dim=1,
+        )
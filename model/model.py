@@ -2,36 +2,138 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+# AirfoilCNN의 convolution 층 (출력 채널, kernel, stride). kernel은 240x340 입력에 맞춘 값
+AIRFOIL_CNN_LAYERS = [
+    (16, (4, 8), 2),
+    (32, (5, 7), 2),
+    (64, (4, 7), 2),
+    (128, (4, 8), 2),
+    (256, (3, 4), 2),
+    (512, (2, 3), 1),
+]
+
 
 class AirfoilCNN(nn.Module):
-    def __init__(self):
+    def __init__(self, state_shape=(240, 340)):
         super(AirfoilCNN, self).__init__()
-        self.conv1 = nn.Conv2d(in_channels=1, out_channels=16, kernel_size=(4, 8), stride=2)
-        self.conv2 = nn.Conv2d(in_channels=16, out_channels=32, kernel_size=(5, 7), stride=2)
-        self.conv3 = nn.Conv2d(in_channels=32, out_channels=64, kernel_size=(4, 7), stride=2)
-        self.conv4 = nn.Conv2d(in_channels=64, out_channels=128, kernel_size=(4, 8), stride=2)
-        self.conv5 = nn.Conv2d(in_channels=128, out_channels=256, kernel_size=(3, 4), stride=2)
-        self.conv6 = nn.Conv2d(in_channels=256, out_channels=512, kernel_size=(2, 3), stride=1)
+        # 입력 (높이, 너비). feature map이 kernel보다 작아진 방향은 kernel 1, stride 1로 더 줄이지 않고
+        # 같은 6개 층과 512차원 출력을 유지합니다. (240x340에서는 모든 층이 원래 kernel과 stride)
+        self.state_shape = tuple(state_shape)
+        size = self.state_shape
+        in_channels = 1
+        for index, (out_channels, kernel_size, stride) in enumerate(
+            AIRFOIL_CNN_LAYERS, 1
+        ):
+            kernel_size = tuple(k if k <= n else 1 for k, n in zip(kernel_size, size))
+            strides = tuple(stride if k > 1 else 1 for k in kernel_size)
+            conv = nn.Conv2d(in_channels, out_channels, kernel_size, stride=strides)
+            setattr(self, f"conv{index}", conv)
+            next_size = tuple(
+                (n - k) // s + 1 for n, k, s in zip(size, kernel_size, strides)
+            )
+            if any(m > n for m, n in zip(next_size, size)):
+                raise ValueError(
+                    f"conv{index} would grow the feature map from {size} to {next_size}"
+                )
+            size = next_size
+            in_channels = out_channels
         self.adaptive_pool = nn.AdaptiveAvgPool2d((1, 1))
+        # CPU 성능 옵션 (Agent가 설정): 입력 메모리 형식과 autocast dtype (None이면 float32)
+        self.memory_format = torch.contiguous_format
+        self.autocast_dtype = None
 
     def forward(self, x):
         if len(x.shape) == 3:
             x = x.unsqueeze(1)
+        x = x.contiguous(memory_format=self.memory_format)
+        with torch.autocast(
+            x.device.type,
+            dtype=self.autocast_dtype or torch.bfloat16,
+            enabled=self.autocast_dtype is not None,
+        ):
+            x = F.relu(self.conv1(x))
+            x = F.relu(self.conv2(x))
+            x = F.relu(self.conv3(x))
+            x = F.relu(self.conv4(x))
+            x = F.relu(self.conv5(x))
+            x = F.relu(self.conv6(x))
+            x = self.adaptive_pool(x)
+        # head와 행동 분포는 항상 float32로 계산
+        x = x.reshape(x.size(0), -1).float()
+        return x
+
+
+class PointEncoder(nn.Module):
+    """
+    airfoil 표면 보간점 (N, 1, 점 개수, 2)을 AirfoilCNN과 같은 512차원 특징으로 인코딩합니다.
+    점은 닫힌 윤곽선 순서이므로 circular padding의 1D convolution을 사용합니다.
+    """
+
+    def __init__(self, num_points=36):
+        super(PointEncoder, self).__init__()
+        self.conv1 = nn.Conv1d(
+            in_channels=2,
+            out_channels=32,
+            kernel_size=5,
+            padding=2,
+            padding_mode="circular",
+        )
+        self.conv2 = nn.Conv1d(
+            in_channels=32,
+            out_channels=64,
+            kernel_size=5,
+            stride=2,
+            padding=2,
+            padding_mode="circular",
+        )
+        self.conv3 = nn.Conv1d(
+            in_channels=64,
+            out_channels=128,
+            kernel_size=3,
+            stride=2,
+            padding=1,
+            padding_mode="circular",
+        )
+        self.fc = nn.Linear(128 * ((num_points + 3) // 4), 512)
+
+    def forward(self, x):
+        x = x.reshape(x.size(0), x.size(-2), 2).transpose(1, 2)
         x = F.relu(self.conv1(x))
         x = F.relu(self.conv2(x))
         x = F.relu(self.conv3(x))
-        x = F.relu(self.conv4(x))
-        x = F.relu(self.conv5(x))
-        x = F.relu(self.conv6(x))
-        x = self.adaptive_pool(x)
-        x = x.view(x.size(0), -1) 
+        x = F.relu(self.fc(x.flatten(1)))
         return x
 
 
+def make_encoder(state_type="sdf", state_shape=None):
+    """
+    환경의 state_type에 맞는 상태 encoder를 만듭니다. ("sdf": AirfoilCNN, "points": PointEncoder)
+    state_shape는 env.state_shape이며, None이면 기본 모양 (240, 340) 또는 (36, 2)입니다.
+    """
+    if state_type == "sdf":
+        return AirfoilCNN() if state_shape is None else AirfoilCNN(state_shape)
+    if state_type == "points":
+        return PointEncoder() if state_shape is None else PointEncoder(state_shape[0])
+    raise ValueError(f"unknown state_type: {state_type}")
+
+
+def bfloat16_supported(device):
+    """
+    device에서 bfloat16 연산을 하드웨어가 지원하는지 확인합니다. (CPU는 oneDNN의 AVX512-BF16/AMX 지원 여부)
+    """
+    if device == "cuda":
+        return torch.cuda.is_bf16_supported()
+    try:
+        return torch.ops.mkldnn._is_mkldnn_bf16_supported()
+    except (AttributeError, RuntimeError):
+        return False
+
+
 class Actor(nn.Module):
-    def __init__(self, n_action):
+    def __init__(self, n_action, encoder=None):
         super(Actor, self).__init__()
-        self.encoder = AirfoilCNN()  # 상태를 인코딩하는 네트워크
+        # 상태를 인코딩하는 네트워크 (encoder를 주면 Critic 등과 공유)
+        self.encoder = encoder or AirfoilCNN()
         self.policy_mean = nn.Sequential(
             nn.Linear(512, 64), nn.ReLU(), nn.Linear(64, n_action)
         )
@@ -39,7 +141,12 @@ class Actor(nn.Module):
         self._initialize_weights()
 
     def forward(self, state):
-        x = self.encoder(state)
+        return self.head(self.encoder(state))
+
+    def head(self, x):
+        """
+        인코딩된 상태에서 행동 분포를 계산합니다.
+        """
         action_mean = self.policy_mean(x)
         action_std = torch.exp(self.policy_std).expand_as(action_mean)
         dist = torch.distributions.Normal(action_mean, action_std)
@@ -56,16 +163,21 @@ class Actor(nn.Module):
 
 
 class Critic(nn.Module):
-    def __init__(self):
+    def __init__(self, encoder=None):
         super(Critic, self).__init__()
-        self.encoder = AirfoilCNN()  # 상태를 인코딩하는 네트워크
+        # 상태를 인코딩하는 네트워크 (encoder를 주면 Actor 등과 공유)
+        self.encoder = encoder or AirfoilCNN()
         self.value = nn.Sequential(nn.Linear(512, 64), nn.ReLU(), nn.Linear(64, 1))
         self._initialize_weights()
 
     def forward(self, state):
-        x = self.encoder(state)
-        value = self.value(x)
-        return value
+        return self.head(self.encoder(state))
+
+    def head(self, x):
+        """
+        인코딩된 상태에서 가치를 계산합니다.
+        """
+        return self.value(x)
 
     def _initialize_weights(self):
         for m in self.modules():
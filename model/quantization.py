@@ -0,0 +1,159 @@
+"""
+rollout 전용 int8 정책입니다. Agent의 AirfoilCNN은 최근 rollout 상태로 보정(calibration)한 정적 int8 convolution으로,
+policy/value head의 Linear는 동적 int8로 양자화합니다. PyTorch의 동적 양자화는 Linear/LSTM만 지원하므로
+convolution은 정적 양자화를 사용합니다. 학습(업데이트)은 항상 float32 Agent로 하고, 업데이트가 끝날 때마다 refresh로 다시 만듭니다.
+
+    policy = QuantizedPolicy(agent, calibration_states)
+    dists, values = policy.choose_dists_and_values(states)
+    policy.refresh(agent, calibration_states)  # agent.optimize 이후
+"""
+
+import contextlib
+import copy
+import warnings
+
+import torch
+import torch.nn as nn
+from torch.ao.quantization import (
+    DeQuantStub,
+    QuantStub,
+    convert,
+    fuse_modules,
+    get_default_qconfig,
+    prepare,
+    quantize_dynamic,
+)
+
+from model.model import AirfoilCNN
+
+# 선호 순서대로 시도할 양자화 엔진
+QUANTIZED_ENGINES = ("x86", "fbgemm", "qnnpack")
+
+
+def select_engine():
+    """
+    이 PyTorch 빌드가 지원하는 양자화 엔진 중 QUANTIZED_ENGINES 순서로 처음 찾은 것입니다.
+    """
+    supported = torch.backends.quantized.supported_engines
+    for engine in QUANTIZED_ENGINES:
+        if engine in supported:
+            return engine
+    raise RuntimeError(f"no supported quantized engine: {supported}")
+
+
+@contextlib.contextmanager
+def quantized_engine(engine):
+    """
+    양자화 중에만 engine을 사용하고 프로세스 전역 설정을 원래대로 되돌립니다.
+    변환된 모듈의 가중치는 engine 형식으로 packing되므로 추론에는 전역 설정이 필요 없습니다.
+    """
+    previous = torch.backends.quantized.engine
+    torch.backends.quantized.engine = engine
+    try:
+        yield
+    finally:
+        torch.backends.quantized.engine = previous
+
+
+def quantize_encoder(encoder, calibration_states, backend=None):
+    """
+    AirfoilCNN과 같은 연산(conv + ReLU 6개, adaptive pooling)을 int8로 실행하는 복사본을 만듭니다.
+    활성값의 양자화 범위는 calibration_states (N, 1, H, W)로 정합니다.
+    backend가 없으면 select_engine()으로 고릅니다.
+    """
+    if not isinstance(encoder, AirfoilCNN):
+        raise ValueError(f"only AirfoilCNN can be quantized: {type(encoder).__name__}")
+    layers = [QuantStub()]
+    for index in range(1, 7):
+        conv = copy.deepcopy(getattr(encoder, f"conv{index}")).float()
+        layers += [conv.to(memory_format=torch.contiguous_format), nn.ReLU()]
+    layers += [copy.deepcopy(encoder.adaptive_pool), DeQuantStub(), nn.Flatten()]
+    model = nn.Sequential(*layers).cpu().eval()
+    backend = backend or select_engine()
+
+    with warnings.catch_warnings(), quantized_engine(backend):
+        # torch.ao.quantization의 torchao 이전 안내 (torchao가 없는 환경에서도 동작하도록 torch.ao 사용)
+        warnings.simplefilter("ignore", DeprecationWarning)
+        warnings.simplefilter("ignore", UserWarning)
+        fuse_modules(
+            model, [[str(i), str(i + 1)] for i in range(1, 13, 2)], inplace=True
+        )
+        model.qconfig = get_default_qconfig(backend)
+        prepare(model, inplace=True)
+        with torch.no_grad():
+            model(calibration_states.float().cpu().contiguous())
+        convert(model, inplace=True)
+    return model
+
+
+def quantize_head(head, backend=None):
+    with warnings.catch_warnings(), quantized_engine(backend or select_engine()):
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return quantize_dynamic(
+            copy.deepcopy(head).cpu().eval(), {nn.Linear}, dtype=torch.qint8
+        )
+
+
+class QuantizedPolicy:
+    """
+    Agent.choose_dists_and_values, get_value와 같은 인터페이스의 CPU int8 추론 전용 정책입니다.
+    입력은 CPU에서 계산하고 결과는 agent.device로 돌려줍니다.
+    """
+
+    def __init__(self, agent, calibration_states):
+        self.refresh(agent, calibration_states)
+
+    def refresh(self, agent, calibration_states):
+        """
+        agent의 현재 가중치로 양자화된 복사본을 다시 만듭니다.
+        """
+        self.device = agent.device
+        self.engine = select_engine()
+        if calibration_states.dim() == 3:
+            calibration_states = calibration_states.unsqueeze(1)
+        self.actor_encoder = quantize_encoder(
+            agent.actor.encoder, calibration_states, self.engine
+        )
+        self.critic_encoder = self.actor_encoder
+        if agent.critic.encoder is not agent.actor.encoder:
+            self.critic_encoder = quantize_encoder(
+                agent.critic.encoder, calibration_states, self.engine
+            )
+        self.policy_mean = quantize_head(agent.actor.policy_mean, self.engine)
+        self.policy_std = agent.actor.policy_std.detach().cpu().clone()
+        self.value = quantize_head(agent.critic.value, self.engine)
+        return self
+
+    def encode(self, encoder, state):
+        if state.dim() == 3:
+            state = state.unsqueeze(1)
+        return encoder(state.float().cpu().contiguous())
+
+    @torch.no_grad()
+    def choose_dists_and_values(self, state, use_grad=False):
+        features = self.encode(self.actor_encoder, state)
+        critic_features = features
+        if self.critic_encoder is not self.actor_encoder:
+            critic_features = self.encode(self.critic_encoder, state)
+        action_mean = self.policy_mean(features).to(self.device)
+        action_std = torch.exp(self.policy_std).to(self.device).expand_as(action_mean)
+        dist = torch.distributions.Normal(action_mean, action_std)
+        return dist, self.value(critic_features).to(self.device)
+
+    @torch.no_grad()
+    def get_value(self, state, use_grad=False):
+        return self.value(self.encode(self.critic_encoder, state)).to(self.device)
+
+    @torch.no_grad()
+    def divergence(self, agent, states):
+        """
+        같은 상태에서 float32 Agent 대비 행동 분포의 KL(float || int8) 평균과 최댓값, 가치의 최대 절대 오차입니다.
+        """
+        dists, values = agent.choose_dists_and_values(states, use_grad=False)
+        quantized_dists, quantized_values = self.choose_dists_and_values(states)
+        kl = torch.distributions.kl_divergence(dists, quantized_dists).sum(dim=1)
+        return {
+            "kl_mean": kl.mean().item(),
+            "kl_max": kl.max().item(),
+            "value_error": (values - quantized_values).abs().max().item(),
+        }
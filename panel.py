@@ -0,0 +1,448 @@
+"""
+OpenFOAM 없이 프로세스 안에서 airfoil의 Cl, Cd, Cm을 계산하는 저충실도 solver입니다.
+상수 세기 source + 균일 vortex 패널법(Hess-Smith)으로 비점성 유동을 풀고, 표면 속도로
+적분 경계층(층류 Thwaites, Michel 천이, 난류 Head)을 계산하여 변위 두께만큼 유동을 한 번 보정합니다.
+항력은 뒷전의 운동량 두께로 Squire-Young 식을 사용하고, 난류 박리 이후 표면은 압력이 회복되지 않고
+박리 지점의 압력을 유지한다고 보아 박리 압력 항력을 더합니다.
+모든 airfoil을 같은 패널 수로 다시 나누므로 여러 airfoil을 NumPy 배열 연산으로 한 번에 계산합니다.
+
+    Cl, Cd, Cm = panel_coefficients([points, other_points], [5.0, 5.0])
+    env = make_env(solver="panel")  # 밀리초 단위 보상 (사전 학습, 선별, CI)
+"""
+
+import time
+
+import numpy as np
+
+from metrics import SimulationRecord
+
+PANELS = 120
+KINEMATIC_VISCOSITY = 1.5e-5  # 공기의 동점성 계수 (m^2/s), main_verification.py와 동일
+THWAITES_SEPARATION = -0.09  # 층류 박리(천이로 처리)가 일어나는 Thwaites 압력 구배 변수
+TURBULENT_SEPARATION_H = 2.4  # Head 방법에서 난류 박리로 보는 형상 계수
+MAXIMUM_H = 3.0
+TRAILING_EDGE_RELIEF = 0.02  # 경계층 계산에서 뒷전 감속을 무시할 표면 길이 비율
+DISPLACEMENT_SMOOTHING = 0.02  # 변위 두께를 평활화할 호 길이 폭 (시위 대비)
+
+
+def resample_airfoils(points_list, panels=PANELS):
+    """
+    뒷전(윗면) -> 앞전 -> 뒷전(아랫면) 순서의 좌표를 호 길이에 대한 cosine 간격으로 다시 나누어
+    (airfoil 수, panels + 1, 2) 배열로 만듭니다. 앞전과 뒷전 근처에 패널이 모입니다.
+    """
+    side = panels // 2
+    spacing = 0.5 * (1 - np.cos(np.linspace(0, np.pi, side + 1)))
+    nodes = np.empty((len(points_list), 2 * side + 1, 2))
+    for index, points in enumerate(points_list):
+        points = np.asarray(points, dtype=np.float64)
+        # 앞전처럼 겹친 점을 지워 호 길이가 엄격히 증가하도록 합니다.
+        keep = np.r_[True, np.linalg.norm(np.diff(points, axis=0), axis=1) > 1e-12]
+        points = points[keep]
+        x, y = points[:, 0], points[:, 1]
+        if np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)) < 0:
+            # 시계 방향(아랫면부터)으로 주어진 좌표는 뒤집습니다.
+            points = points[::-1]
+        arc = np.r_[0, np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))]
+        leading_edge = np.argmin(points[:, 0])
+        upper = arc[leading_edge] * spacing
+        lower = arc[leading_edge] + (arc[-1] - arc[leading_edge]) * spacing[1:]
+        samples = np.r_[upper, lower]
+        nodes[index, :, 0] = np.interp(samples, arc, points[:, 0])
+        nodes[index, :, 1] = np.interp(samples, arc, points[:, 1])
+    return nodes
+
+
+def panel_geometry(nodes):
+    start, end = nodes[:, :-1], nodes[:, 1:]
+    delta = end - start
+    lengths = np.linalg.norm(delta, axis=-1)
+    tangents = delta / lengths[..., None]
+    # 반시계 방향 좌표이므로 진행 방향의 오른쪽이 바깥쪽 법선입니다.
+    normals = np.stack([tangents[..., 1], -tangents[..., 0]], axis=-1)
+    return start, (start + end) / 2, lengths, tangents, normals
+
+
+def influence_coefficients(start, midpoints, lengths, tangents):
+    """
+    패널 j의 단위 세기 source가 제어점 i에 유도하는 속도의 법선/접선 성분 (airfoil, i, j)을 계산합니다.
+    같은 패널의 단위 vortex가 유도하는 속도는 이를 90도 돌린 것(법선 = source 접선, 접선 = -source 법선)입니다.
+    자기 패널의 영향은 바깥쪽에서 본 극한값(source 법선 방향 1/2)입니다.
+    """
+    dx = midpoints[:, :, None, 0] - start[:, None, :, 0]
+    dy = midpoints[:, :, None, 1] - start[:, None, :, 1]
+    tx, ty = tangents[:, None, :, 0], tangents[:, None, :, 1]
+    # 패널 j의 좌표계(접선, 왼쪽 법선)에서 본 제어점 i의 위치
+    x = dx * tx + dy * ty
+    y = dy * tx - dx * ty
+    length = lengths[:, None, :]
+    log_ratio = np.log(
+        (x**2 + y**2) / np.maximum((x - length) ** 2 + y**2, 1e-300)
+    ) / (4 * np.pi)
+    angle = np.arctan2(y * length, x * (x - length) + y**2) / (2 * np.pi)
+    diagonal = np.arange(midpoints.shape[1])
+    log_ratio[:, diagonal, diagonal] = 0.0
+    angle[:, diagonal, diagonal] = -0.5
+
+    # 패널 i와 j의 방향 차이에 대한 cos, sin
+    cos = tangents[:, :, None, 0] * tx + tangents[:, :, None, 1] * ty
+    sin = tangents[:, :, None, 1] * tx - tangents[:, :, None, 0] * ty
+    normal = log_ratio * sin - angle * cos
+    tangential = log_ratio * cos + angle * sin
+    return normal, tangential
+
+
+def solve_inviscid(nodes, alpha):
+    """
+    비투과 조건과 Kutta 조건으로 패널 세기를 구하고
+    제어점의 접선 속도(자유류 속도로 무차원화, 반시계 방향이 양수)를 반환합니다.
+    """
+    start, midpoints, lengths, tangents, normals = panel_geometry(nodes)
+    normal, tangential = influence_coefficients(start, midpoints, lengths, tangents)
+    batch, panels = lengths.shape
+    freestream = np.stack([np.cos(alpha), np.sin(alpha)], axis=-1)[:, None, :]
+    freestream_tangential = np.einsum("bik,bik->bi", freestream, tangents)
+
+    matrix = np.empty((batch, panels + 1, panels + 1))
+    matrix[:, :panels, :panels] = normal
+    matrix[:, :panels, panels] = tangential.sum(axis=2)
+    rhs = np.empty((batch, panels + 1))
+    rhs[:, :panels] = -np.einsum("bik,bik->bi", freestream, normals)
+    # Kutta 조건: 뒷전 양쪽 패널의 접선 속도 크기가 같고 방향이 반대
+    ends = [0, panels - 1]
+    matrix[:, panels, :panels] = tangential[:, ends].sum(axis=1)
+    matrix[:, panels, panels] = -normal[:, ends].sum(axis=(1, 2))
+    rhs[:, panels] = -freestream_tangential[:, ends].sum(axis=1)
+    strengths = np.linalg.solve(matrix, rhs[..., None])[..., 0]
+
+    return (
+        freestream_tangential
+        + np.einsum("bij,bj->bi", tangential, strengths[:, :panels])
+        - normal.sum(axis=2) * strengths[:, panels, None]
+    )
+
+
+def surface_stations(midpoints, lengths, tangential_velocity):
+    """
+    정체점에서 윗면과 아랫면 뒷전까지의 표면 거리와 가장자리 속도를 (2 x airfoil, station) 배열로 만듭니다.
+    앞의 airfoil 수만큼의 행은 윗면, 나머지는 아랫면입니다. 첫 station은 정체점(속도 0)이며,
+    표면마다 station 수가 다른 부분은 뒷전 패널을 반복하여 채웁니다. panel 배열은 각 station의 패널 번호입니다.
+    """
+    batch, panels = lengths.shape
+    arc = np.cumsum(lengths, axis=1) - lengths / 2
+    rows = np.arange(batch)
+    # 윗면(뒷전 -> 앞전 방향 패널)에서는 유동이 패널 방향과 반대이므로 속도가 음수입니다.
+    first_lower = np.clip(np.argmax(tangential_velocity >= 0, axis=1), 1, panels - 1)
+    before, after = (
+        tangential_velocity[rows, first_lower - 1],
+        tangential_velocity[rows, first_lower],
+    )
+    fraction = np.clip(-before / np.where(after - before == 0, 1, after - before), 0, 1)
+    stagnation = arc[rows, first_lower - 1] + fraction * (
+        arc[rows, first_lower] - arc[rows, first_lower - 1]
+    )
+
+    steps = np.arange(max(first_lower.max(), (panels - first_lower).max()))
+    panel = np.r_[
+        np.maximum(first_lower[:, None] - 1 - steps, 0),
+        np.minimum(first_lower[:, None] + steps, panels - 1),
+    ]
+    surface_rows = np.r_[rows, rows][:, None]
+    distance = np.abs(arc[surface_rows, panel] - np.r_[stagnation, stagnation][:, None])
+    speed = np.abs(tangential_velocity[surface_rows, panel])
+    zeros = np.zeros((2 * batch, 1))
+    return np.c_[zeros, distance], np.c_[zeros, speed], panel
+
+
+def shape_factor_from_entrainment(H1):
+    return np.where(
+        H1 >= 5.3,
+        1.1 + 0.86 * np.maximum(H1 - 3.3, 1e-6) ** -0.777,
+        0.6778 + 1.1536 * np.maximum(H1 - 3.3, 1e-6) ** -0.326,
+    )
+
+
+def entrainment_shape_factor(H):
+    return np.where(
+        H <= 1.6,
+        3.3 + 0.8234 * np.maximum(H - 1.1, 1e-6) ** -1.287,
+        3.3 + 1.5501 * np.maximum(H - 0.6778, 1e-6) ** -3.064,
+    )
+
+
+def boundary_layer(distance, speed, reynolds):
+    """
+    한 표면의 경계층을 station 순서로 계산합니다. (길이는 시위, 속도는 자유류 속도로 무차원화)
+    층류 구간은 Thwaites 방법, 천이는 Michel 기준(또는 층류 박리), 난류 구간은 Head 방법을 사용합니다.
+    난류 박리(H > TURBULENT_SEPARATION_H)가 일어나면 그 지점의 값을 뒷전까지 유지합니다.
+    운동량 두께 theta, 형상 계수 H, 마지막 station(또는 박리 지점)의 가장자리 속도, 천이 station,
+    난류 박리 station(박리가 없으면 station 수)을 반환합니다.
+    """
+    batch, stations = distance.shape
+    # 비점성 해는 뒷전에서 급격히 감속하지만 실제로는 후류가 이를 완화하므로,
+    # 마지막 TRAILING_EDGE_RELIEF 구간에서는 그 직전의 가장자리 속도를 유지합니다.
+    relief = distance >= (1 - TRAILING_EDGE_RELIEF) * distance[:, -1:]
+    relief[:, 0] = False
+    start = np.argmax(relief, axis=1)
+    speed = np.where(
+        relief, speed[np.arange(batch), np.maximum(start - 1, 0)][:, None], speed
+    )
+    step = np.diff(distance, axis=1)
+    moving = step > 1e-12
+    gradient = np.zeros_like(speed)
+    gradient[:, 1:] = np.where(
+        moving, np.diff(speed, axis=1) / np.where(moving, step, 1), 0
+    )
+
+    integral = np.zeros_like(speed)
+    integral[:, 1:] = np.cumsum(
+        0.5 * (speed[:, 1:] ** 5 + speed[:, :-1] ** 5) * step, axis=1
+    )
+    safe_speed = np.maximum(speed, 1e-6)
+    theta_squared = 0.45 / reynolds[:, None] * integral / safe_speed**6
+    # 정체점에서는 Hiemenz 유동의 극한값을 사용합니다.
+    theta_squared[:, 0] = 0.075 / (reynolds * np.maximum(gradient[:, 1], 1e-6))
+    theta_laminar = np.sqrt(theta_squared)
+    pressure_gradient = np.clip(
+        theta_squared * reynolds[:, None] * gradient, -0.1, 0.25
+    )
+    H_laminar = np.where(
+        pressure_gradient >= 0,
+        2.61 - 3.75 * pressure_gradient + 5.24 * pressure_gradient**2,
+        2.088 + 0.0731 / (pressure_gradient + 0.14),
+    )
+
+    x_reynolds = np.maximum(reynolds[:, None] * speed * distance, 1.0)
+    theta_reynolds = reynolds[:, None] * speed * theta_laminar
+    transition_criterion = (
+        theta_reynolds > 1.174 * (1 + 22400 / x_reynolds) * x_reynolds**0.46
+    ) | (pressure_gradient <= THWAITES_SEPARATION)
+    transition_criterion[:, 0] = False
+    transition_criterion[:, -1] = True
+    transition = np.argmax(transition_criterion, axis=1)
+
+    theta, H = theta_laminar.copy(), H_laminar.copy()
+    rows = np.arange(batch)
+    turbulent_theta = theta_laminar[rows, transition]
+    turbulent_H = np.full(batch, 1.4)
+    entrainment = (
+        speed[rows, transition]
+        * turbulent_theta
+        * entrainment_shape_factor(turbulent_H)
+    )
+    separated = np.zeros(batch, dtype=bool)
+    separation = np.full(batch, stations)
+    edge_speed = speed[:, -1].copy()
+    for k in range(1, stations):
+        # 난류 박리 이후에는 경계층을 더 진행하지 않고 박리 지점의 값을 유지합니다.
+        active = (k > transition) & ~separated
+        ds = step[:, k - 1]
+        ue = np.maximum(speed[:, k - 1], 1e-6)
+        theta_reynolds = np.maximum(reynolds * ue * turbulent_theta, 1.0)
+        skin_friction = 0.246 * 10 ** (-0.678 * turbulent_H) * theta_reynolds**-0.268
+        H1 = entrainment_shape_factor(turbulent_H)
+        # 압력 구배 항 d(theta)/ds = -(H + 2) theta / ue due/ds는 구간마다 정확히 적분합니다.
+        # (급가속 구간에서 explicit Euler가 운동량 두께를 과도하게 줄이는 것을 막습니다.)
+        new_theta = (
+            turbulent_theta * (ue / np.maximum(speed[:, k], 1e-6)) ** (turbulent_H + 2)
+            + ds * skin_friction / 2
+        )
+        new_theta = np.maximum(new_theta, 1e-9)
+        new_entrainment = (
+            entrainment + ds * ue * 0.0306 * np.maximum(H1 - 3, 1e-6) ** -0.6169
+        )
+        new_H = np.clip(
+            shape_factor_from_entrainment(
+                new_entrainment / (np.maximum(speed[:, k], 1e-6) * new_theta)
+            ),
+            1.1,
+            MAXIMUM_H,
+        )
+        turbulent_theta = np.where(active, new_theta, turbulent_theta)
+        turbulent_H = np.where(active, new_H, turbulent_H)
+        entrainment = np.where(active, new_entrainment, entrainment)
+        newly_separated = active & (turbulent_H > TURBULENT_SEPARATION_H)
+        edge_speed = np.where(newly_separated, speed[:, k], edge_speed)
+        separation = np.where(newly_separated, k, separation)
+        separated |= newly_separated
+        theta[:, k] = np.where(k > transition, turbulent_theta, theta[:, k])
+        H[:, k] = np.where(k > transition, turbulent_H, H[:, k])
+    return theta, H, edge_speed, transition, separation
+
+
+def force_coefficients(nodes, tangential_velocity, alpha):
+    """
+    표면 압력을 적분하여 Cl, 압력 항력, 1/4 시위점에 대한 Cm(머리 들림이 양수)을 계산합니다.
+    """
+    _, midpoints, lengths, _, normals = panel_geometry(nodes)
+    pressure = 1 - tangential_velocity**2
+    force = -(pressure * lengths)[..., None] * normals
+    x = nodes[..., 0]
+    leading_edge = nodes[np.arange(len(nodes)), np.argmin(x, axis=1)]
+    chord = x.max(axis=1) - x.min(axis=1)
+    reference = leading_edge + np.stack([0.25 * chord, np.zeros_like(chord)], axis=1)
+    arm = midpoints - reference[:, None, :]
+    Fx, Fy = force[..., 0].sum(axis=1), force[..., 1].sum(axis=1)
+    moment = -(arm[..., 0] * force[..., 1] - arm[..., 1] * force[..., 0]).sum(axis=1)
+    Cl = (Fy * np.cos(alpha) - Fx * np.sin(alpha)) / chord
+    Cd_pressure = (Fx * np.cos(alpha) + Fy * np.sin(alpha)) / chord
+    return Cl, Cd_pressure, moment / chord**2
+
+
+def panel_coefficients(
+    points_list,
+    angles_of_attack,
+    freestream_velocity=222.22,
+    viscosity=KINEMATIC_VISCOSITY,
+    panels=PANELS,
+    viscous=True,
+    details=False,
+):
+    """
+    여러 airfoil의 (Cl, Cd, Cm) 배열을 계산합니다. angles_of_attack 단위는 도(degree)입니다.
+    viscous=False이면 비점성 해(Cd는 압력 항력)를 반환하고, details=True이면 천이 위치 등을 담은 dict를 함께 반환합니다.
+    """
+    nodes = resample_airfoils(points_list, panels)
+    batch = len(nodes)
+    alpha = np.radians(np.broadcast_to(angles_of_attack, (batch,)).astype(np.float64))
+    x = nodes[..., 0]
+    chord = x.max(axis=1) - x.min(axis=1)
+    reynolds = (
+        np.broadcast_to(freestream_velocity, (batch,)) * chord / viscosity
+    ).astype(np.float64)
+
+    _, midpoints, lengths, _, normals = panel_geometry(nodes)
+    tangential_velocity = solve_inviscid(nodes, alpha)
+    Cl, Cd, Cm = force_coefficients(nodes, tangential_velocity, alpha)
+    if not viscous:
+        return (Cl, Cd, Cm, {}) if details else (Cl, Cd, Cm)
+
+    # 윗면과 아랫면을 하나의 배열(앞 batch행: 윗면)로 묶어 경계층을 함께 계산합니다.
+    surface_rows = np.r_[np.arange(batch), np.arange(batch)]
+    surface_chord = chord[surface_rows][:, None]
+    distance, speed, panel = surface_stations(midpoints, lengths, tangential_velocity)
+    theta, H, edge_speed, transition, separation = boundary_layer(
+        distance / surface_chord, speed, reynolds[surface_rows]
+    )
+    # Squire-Young: 뒷전(또는 박리 지점)의 운동량 두께를 후류 끝까지 외삽한 항력
+    friction_drag = 2 * theta[:, -1] * edge_speed ** ((H[:, -1] + 5) / 2)
+    friction_drag = friction_drag[:batch] + friction_drag[batch:]
+    # 뭉툭한 뒷전의 base 항력 (Hoerner): 0.135 (h/c)^(4/3) / Cd_f^(1/3)
+    gap = np.linalg.norm(nodes[:, 0] - nodes[:, -1], axis=1) / chord
+    base_drag = 0.135 * gap ** (4 / 3) / np.maximum(friction_drag, 1e-4) ** (1 / 3)
+
+    # 패널마다 처음 등장한 station의 변위 두께를 사용합니다. (뒷전 이후 반복된 station 제외)
+    first = np.c_[np.ones((2 * batch, 1), dtype=bool), np.diff(panel, axis=1) != 0]
+    displacement = np.zeros_like(lengths)
+    displacement[
+        np.broadcast_to(surface_rows[:, None], first.shape)[first], panel[first]
+    ] = (theta[:, 1:] * H[:, 1:] * surface_chord)[first]
+    transition_distance = (
+        distance[np.arange(2 * batch), transition] / surface_chord[:, 0]
+    )
+    info = {
+        "upper_transition": transition_distance[:batch],
+        "lower_transition": transition_distance[batch:],
+        "upper_separated": separation[:batch] < distance.shape[1],
+        "lower_separated": separation[batch:] < distance.shape[1],
+        "friction_drag": friction_drag,
+        "base_drag": base_drag,
+    }
+
+    # 변위 두께만큼 표면을 바깥쪽으로 옮긴 물체(displacement body)에서 다시 풀어 Cl, Cm을 보정합니다.
+    # 뒷전 근처의 짧은 패널이 급격한 변위 차이로 뒤집히지 않도록 호 길이 방향으로 평활화합니다.
+    arc = (np.cumsum(lengths, axis=1) - lengths / 2) / chord[:, None]
+    weights = np.exp(
+        -(((arc[:, :, None] - arc[:, None, :]) / DISPLACEMENT_SMOOTHING) ** 2)
+    )
+    displacement = np.einsum("bij,bj->bi", weights, displacement) / weights.sum(axis=2)
+    node_displacement = np.c_[
+        displacement[:, :1],
+        (displacement[:, 1:] + displacement[:, :-1]) / 2,
+        displacement[:, -1:],
+    ]
+    node_normals = np.concatenate(
+        [normals[:, :1], normals[:, 1:] + normals[:, :-1], normals[:, -1:]], axis=1
+    )
+    node_normals /= np.linalg.norm(node_normals, axis=-1, keepdims=True)
+    displaced = nodes + node_displacement[..., None] * node_normals
+    tangential_velocity = solve_inviscid(displaced, alpha)
+    Cl, attached_drag, Cm = force_coefficients(displaced, tangential_velocity, alpha)
+
+    # 박리 압력 항력: 박리 이후 표면에서는 압력이 회복되지 않고 박리 지점의 압력을 유지한다고 보고
+    # (압력 plateau), 회복된 비점성 압력과의 차이로 생기는 항력을 더합니다. Cl, Cm은 그대로 둡니다.
+    downstream = first & (np.arange(1, distance.shape[1]) >= separation[:, None])
+    separation_panel = panel[
+        np.arange(2 * batch), np.minimum(separation, distance.shape[1] - 1) - 1
+    ]
+    plateau_speed = np.abs(tangential_velocity[surface_rows, separation_panel])
+    plateau_velocity = tangential_velocity.copy()
+    downstream_rows = np.broadcast_to(surface_rows[:, None], first.shape)[downstream]
+    downstream_panels = panel[downstream]
+    plateau_velocity[downstream_rows, downstream_panels] = (
+        np.sign(tangential_velocity[downstream_rows, downstream_panels])
+        * np.broadcast_to(plateau_speed[:, None], first.shape)[downstream]
+    )
+    _, separated_drag, _ = force_coefficients(displaced, plateau_velocity, alpha)
+    pressure_drag = np.maximum(separated_drag - attached_drag, 0)
+    info["pressure_drag"] = pressure_drag
+    Cd = friction_drag + base_drag + pressure_drag
+    return (Cl, Cd, Cm, info) if details else (Cl, Cd, Cm)
+
+
+class PanelEvaluator:
+    """
+    panel_coefficients로 airfoil을 평가하는 evaluator입니다. 다른 evaluator와 같은 인터페이스로
+    SimulationRecord를 반환하며, evaluate_batch로 여러 airfoil을 한 번에 계산할 수 있습니다.
+    fidelity, end_time은 OpenFOAM 전용이므로 무시합니다.
+    """
+
+    def __init__(self, panels=PANELS, viscosity=KINEMATIC_VISCOSITY, viscous=True):
+        self.panels = panels
+        self.viscosity = viscosity
+        self.viscous = viscous
+        self.fidelity = None
+
+    def evaluate(self, points, angle_of_attack, freestream_velocity=222.22, **options):
+        return self.evaluate_batch([points], [angle_of_attack], freestream_velocity)[0]
+
+    async def evaluate_async(
+        self,
+        points,
+        angle_of_attack,
+        freestream_velocity=222.22,
+        fidelity=None,
+        end_time=None,
+    ):
+        return self.evaluate(points, angle_of_attack, freestream_velocity)
+
+    def evaluate_batch(self, points_list, angles_of_attack, freestream_velocity=222.22):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        Cl, Cd, Cm = panel_coefficients(
+            points_list,
+            angles_of_attack,
+            freestream_velocity,
+            viscosity=self.viscosity,
+            panels=self.panels,
+            viscous=self.viscous,
+        )
+        wall_time = (time.perf_counter() - wall_start) / len(points_list)
+        cpu_time = (time.process_time() - cpu_start) / len(points_list)
+        records = []
+        for i in range(len(points_list)):
+            record = SimulationRecord(None)
+            record.Cl, record.Cd, record.Cm = float(Cl[i]), float(Cd[i]), float(Cm[i])
+            record.add_stage("panel", wall_time, cpu_time)
+            records.append(record)
+        return records
+
+
+if __name__ == "__main__":
+    from NACA import naca0012, naca4412
+
+    for name, airfoil in (("0012", naca0012), ("4412", naca4412)):
+        points = np.array([airfoil["x"], airfoil["y"]]).T
+        angles = np.arange(-4.0, 12.1, 2.0)
+        Cl, Cd, Cm = panel_coefficients([points] * len(angles), angles)
+        print(f"NACA {name}")
+        for row in zip(angles, Cl, Cd, Cm):
+            print("  AoA {:5.1f}  Cl {:7.4f}  Cd {:7.5f}  Cm {:7.4f}".format(*row))
@@ -0,0 +1,234 @@
+"""
+여러 설계가 대기 중일 때 케이스를 메시 생성 -> 풀이 -> 후처리 세 단계의 파이프라인으로 실행합니다.
+case i를 솔버(MPI rank)가 푸는 동안 남는 코어에서 case i+1의 dict 생성, blockMesh, decomposePar를 실행하고,
+case i-1의 reconstructPar, 결과 파싱, 정리를 진행하여 솔버가 직렬 단계를 기다리지 않게 합니다.
+
+    evaluator = PipelinedEvaluator(solver="fake")
+    records = evaluator.evaluate_many([(points, 5.0), (other_points, 5.0)])
+"""
+
+import asyncio
+import os
+import subprocess
+import tempfile
+import time
+
+from OPENFOAM_MAKER import make_block_mesh_dict
+from archive import history_file
+from convergence import case_descriptors
+from metrics import SimulationRecord
+from simulation import (
+    ARTIFACTS,
+    SIMULATION_DIRECTORY,
+    finish_case_async,
+    measure_stage,
+    mesh_case_async,
+    prepare_case_directory,
+    remove_forceCoeffs,
+    run_parallel_simulation,
+    stage_case_directory,
+)
+
+
+class PipelinedEvaluator:
+    """
+    case_root/pipeline<i> 케이스 디렉토리 depth개를 돌려 쓰며 세 단계를 겹쳐 실행합니다.
+    단계마다 동시에 실행할 케이스 수를 mesh_workers, solver_slots, finish_workers로 제한하고,
+    depth(기본값: 세 값의 합)는 동시에 진행 중인 케이스 수의 상한입니다.
+    evaluate_async를 동시에 여러 번 호출하면(evaluate_many 등) 들어온 순서대로 파이프라인에 들어갑니다.
+    한 번에 하나의 이벤트 루프에서만 사용합니다.
+    OpenFOAM 명령이 실패한 케이스는 record.failed가 True인 record로 반환합니다.
+    """
+
+    def __init__(
+        self,
+        case_root="~/pipeline_cases",
+        template_directory=SIMULATION_DIRECTORY,
+        solver="openfoam",
+        fidelity=1.0,
+        end_time=200,
+        scratch_root=None,
+        artifacts=ARTIFACTS,
+        mesh_workers=1,
+        solver_slots=1,
+        finish_workers=1,
+        depth=None,
+        history_directory=None,
+    ):
+        self.case_root = os.path.expanduser(case_root)
+        self.template_directory = template_directory
+        self.solver = solver
+        self.fidelity = fidelity
+        self.end_time = end_time
+        self.scratch_root = scratch_root
+        self.artifacts = artifacts
+        self.mesh_workers = mesh_workers
+        self.solver_slots = solver_slots
+        self.finish_workers = finish_workers
+        self.depth = depth or mesh_workers + solver_slots + finish_workers
+        # 지정하면 케이스마다 forceCoeffs 수렴 이력을 이 디렉토리에 .npz로 저장
+        self.history_directory = history_directory
+        self.case_directories = self.prepare_case_directories()
+        self._loop = None
+        # 솔버가 실제로 돌고 있던 시간(slot 단위 합)과 파이프라인이 진행 중이던 시간
+        self.cases = 0
+        self.solver_busy_time = 0.0
+        self.busy_time = 0.0
+        self._active = 0
+        self._busy_start = None
+
+    def prepare_case_directories(self):
+        case_directories = []
+        for index in range(self.depth):
+            case_directory = os.path.join(self.case_root, f"pipeline{index}")
+            if self.solver == "fake":
+                from fake_openfoam import make_case
+
+                make_case(case_directory)
+            else:
+                prepare_case_directory(case_directory, self.template_directory)
+            case_directories.append(case_directory)
+        return case_directories
+
+    def _bind_loop(self):
+        # asyncio의 Queue와 Semaphore는 처음 사용한 이벤트 루프에 묶이므로 루프가 바뀌면 새로 만듭니다.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self.free_cases = asyncio.Queue()
+            for case_directory in self.case_directories:
+                self.free_cases.put_nowait(case_directory)
+            self.mesh_semaphore = asyncio.Semaphore(self.mesh_workers)
+            self.solver_semaphore = asyncio.Semaphore(self.solver_slots)
+            self.finish_semaphore = asyncio.Semaphore(self.finish_workers)
+
+    def evaluate(self, points, angle_of_attack, freestream_velocity=222.22, **options):
+        return asyncio.run(
+            self.evaluate_async(points, angle_of_attack, freestream_velocity, **options)
+        )
+
+    def evaluate_many(self, designs, **options):
+        """
+        designs는 (points, angle_of_attack[, freestream_velocity]) 튜플의 목록입니다.
+        """
+        return asyncio.run(self.evaluate_many_async(designs, **options))
+
+    async def evaluate_many_async(self, designs, **options):
+        return await asyncio.gather(
+            *(self.evaluate_async(*design, **options) for design in designs)
+        )
+
+    async def evaluate_async(
+        self,
+        points,
+        angle_of_attack,
+        freestream_velocity=222.22,
+        fidelity=None,
+        end_time=None,
+    ):
+        self._bind_loop()
+        fidelity = self.fidelity if fidelity is None else fidelity
+        end_time = self.end_time if end_time is None else end_time
+
+        case_directory = await self.free_cases.get()
+        self._enter()
+        record = SimulationRecord(case_directory)
+        run_directory = case_directory
+        try:
+            async with self.mesh_semaphore:
+                if self.scratch_root is not None:
+                    os.makedirs(self.scratch_root, exist_ok=True)
+                    with measure_stage(record, "stage"):
+                        run_directory = stage_case_directory(
+                            case_directory, self.scratch_root
+                        )
+                with tempfile.TemporaryDirectory(
+                    prefix="airfoil_dicts_", dir=self.scratch_root
+                ) as source_directory:
+                    with measure_stage(record, "dicts"):
+                        make_block_mesh_dict(
+                            points[:, 0],
+                            points[:, 1],
+                            angle_of_attack=angle_of_attack,
+                            freestream_velocity=freestream_velocity,
+                            output_directory=source_directory,
+                            fidelity=fidelity,
+                            end_time=end_time,
+                        )
+                    await mesh_case_async(
+                        run_directory,
+                        source_directory,
+                        run_directory,
+                        False,
+                        record,
+                        self.solver,
+                    )
+
+            async with self.solver_semaphore:
+                solver_start = time.perf_counter()
+                await run_parallel_simulation(
+                    run_directory, run_directory, False, record, self.solver
+                )
+                self.solver_busy_time += time.perf_counter() - solver_start
+
+            async with self.finish_semaphore:
+                await finish_case_async(
+                    run_directory,
+                    run_directory,
+                    False,
+                    record,
+                    self.solver,
+                    history_path=(
+                        None
+                        if self.history_directory is None
+                        else history_file(
+                            self.history_directory,
+                            points,
+                            angle_of_attack,
+                            freestream_velocity,
+                            fidelity,
+                            end_time,
+                        )
+                    ),
+                    persistent_directory=(
+                        case_directory if self.scratch_root is not None else None
+                    ),
+                    artifacts=self.artifacts,
+                )
+        except subprocess.CalledProcessError as error:
+            # 다음 설계가 이번 케이스의 forceCoeffs.dat를 읽지 않도록 지웁니다.
+            remove_forceCoeffs(run_directory)
+            record.fail(error)
+        finally:
+            self._leave()
+            self.free_cases.put_nowait(case_directory)
+
+        record.fidelity = fidelity
+        record.end_time = end_time
+        record.descriptors = case_descriptors(
+            points, angle_of_attack, freestream_velocity, fidelity
+        )
+        self.cases += 1
+        return record
+
+    def _enter(self):
+        if self._active == 0:
+            self._busy_start = time.perf_counter()
+        self._active += 1
+
+    def _leave(self):
+        self._active -= 1
+        if self._active == 0:
+            self.busy_time += time.perf_counter() - self._busy_start
+
+    def statistics(self):
+        """
+        solver_utilization은 케이스가 진행 중이던 시간 동안 솔버 slot이 사용된 비율입니다.
+        """
+        return {
+            "cases": self.cases,
+            "busy_time": self.busy_time,
+            "solver_busy_time": self.solver_busy_time,
+            "solver_utilization": self.solver_busy_time
+            / max(self.busy_time * self.solver_slots, 1e-12),
+        }
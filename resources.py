@@ -0,0 +1,200 @@
+"""
+학습 프로세스의 PyTorch, OpenFOAM 솔버(MPI rank), airfoil 형상/SDF 계산이 같은 코어를 두고 경쟁하지 않도록
+사용 가능한 CPU 코어를 물리 코어 단위로 나눕니다.
+
+    partition = CorePartition(torch_cores=4, geometry_cores=1).apply()
+    print(partition.report())
+
+apply() 이후 simulation.run_command는 mpirun을 taskset으로 solver 코어에서 시작하고,
+blockMesh/decomposePar/reconstructPar 등 직렬 유틸리티를 geometry 코어에 고정합니다.
+"""
+
+import os
+
+# 케이스 하나를 나눌 부분 수이자 MPI rank 수 (simulation에서도 사용)
+NUMBER_OF_PROCESSORS = 20
+
+_active_partition = None
+
+
+def active_partition():
+    """
+    apply()로 적용된 CorePartition입니다. 없으면 None입니다.
+    """
+    return _active_partition
+
+
+def physical_cores(cpus):
+    """
+    논리 CPU를 물리 코어(SMT 형제) 단위로 묶습니다. topology 정보가 없으면 CPU마다 하나의 코어로 봅니다.
+    """
+    cores = {}
+    for cpu in sorted(cpus):
+        path = f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list"
+        try:
+            with open(path) as f:
+                siblings = parse_cpu_list(f.read())
+        except OSError:
+            siblings = [cpu]
+        key = min(siblings)
+        cores.setdefault(key, []).append(cpu)
+    return list(cores.values())
+
+
+def parse_cpu_list(text):
+    """
+    "0-3,8,10-11" 형식의 CPU 목록을 정수 목록으로 바꿉니다.
+    """
+    cpus = []
+    for part in text.strip().split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.extend(range(int(start), int(end) + 1))
+        elif part:
+            cpus.append(int(part))
+    return cpus
+
+
+def format_cpu_list(cpus):
+    """
+    parse_cpu_list의 반대입니다. 연속된 CPU는 "0-3"처럼 범위로 씁니다.
+    """
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(
+        str(start) if start == end else f"{start}-{end}" for start, end in ranges
+    )
+
+
+class CorePartition:
+    """
+    물리 코어를 geometry(형상/SDF 계산과 직렬 OpenFOAM 유틸리티), torch, solver(MPI rank) 순서로 나눕니다.
+    torch_cores가 None이면 solver_cores개를 solver에 남기고 나머지(최소 1개)를 torch에 줍니다.
+    케이스를 이 호스트에서 실행하지 않으면 (farm) solver_cores=0, ranks=0으로 모든 코어를 torch에 줍니다.
+    코어가 부족해 solver 몫이 rank 수(ranks)보다 적으면 rank를 코어에 고정하지 않고 solver 코어 안에서 나눠 쓰며,
+    solver 몫이 하나도 없으면 torch 코어를 같이 사용합니다.
+    """
+
+    def __init__(
+        self,
+        torch_cores=None,
+        geometry_cores=1,
+        solver_cores=NUMBER_OF_PROCESSORS,
+        ranks=NUMBER_OF_PROCESSORS,
+        interop_threads=1,
+        cpus=None,
+    ):
+        cores = physical_cores(cpus if cpus is not None else os.sched_getaffinity(0))
+        geometry = cores[: max(0, min(geometry_cores, len(cores) - 1))]
+        rest = cores[len(geometry) :]
+        if torch_cores is None:
+            torch_cores = len(rest) - solver_cores
+        # solver 몫을 남기느라 torch가 1개 코어로 줄었는지 (report에서 경고)
+        self.torch_starved = torch_cores < 1 and len(rest) > 1
+        torch_group = rest[: min(max(1, torch_cores), len(rest))]
+        solver = rest[len(torch_group) :][:solver_cores]
+
+        self.geometry_cores = geometry
+        self.torch_cores = torch_group
+        self.solver_cores = solver or torch_group
+        self.shared_solver_cores = not solver
+        self.ranks = ranks
+        self.interop_threads = interop_threads
+        # 직렬 유틸리티는 geometry 코어가 없으면 torch 코어에서 실행합니다.
+        self.geometry_cpus = sorted(sum(geometry or torch_group, []))
+        self.torch_cpus = sorted(sum(torch_group, []))
+        self.solver_cpus = sorted(sum(self.solver_cores, []))
+
+    @property
+    def bind_ranks(self):
+        return not self.shared_solver_cores and len(self.solver_cores) >= self.ranks
+
+    def mpi_options(self):
+        """
+        mpirun(Open MPI)에 추가할 rank 배치 옵션입니다.
+        """
+        if not self.bind_ranks:
+            return ["--bind-to", "none"]
+        # --cpu-set이 배치 정책을 정하므로 --map-by를 함께 쓰면 Open MPI가 충돌로 종료합니다.
+        return ["--cpu-set", format_cpu_list(self.solver_cpus), "--bind-to", "core"]
+
+    def apply(self):
+        """
+        torch/OpenCV 스레드 수를 정하고 현재 프로세스를 torch와 geometry 코어에 고정한 뒤
+        이 분할을 프로세스 전체에 적용합니다. (이후 실행하는 OpenFOAM 명령에도 적용)
+        solver 코어가 이 프로세스에서 사용할 수 없거나, rank를 고정하는데 torch/geometry 코어와 겹치면
+        ValueError를 발생시킵니다.
+        """
+        global _active_partition
+        unreachable = set(self.solver_cpus) - os.sched_getaffinity(0)
+        if self.ranks and unreachable:
+            raise ValueError(
+                f"solver cpus {format_cpu_list(unreachable)} are not available"
+                " to this process"
+            )
+        if self.bind_ranks and set(self.solver_cpus) & (
+            set(self.torch_cpus) | set(self.geometry_cpus)
+        ):
+            raise ValueError("bound solver cpus overlap the torch/geometry cpus")
+        import cv2
+        import torch
+
+        torch.set_num_threads(len(self.torch_cores))
+        try:
+            torch.set_num_interop_threads(self.interop_threads)
+        except RuntimeError:
+            # 병렬 작업이 이미 시작된 뒤에는 inter-op 스레드 수를 바꿀 수 없습니다.
+            pass
+        cv2.setNumThreads(max(1, len(self.geometry_cores)))
+        os.sched_setaffinity(0, set(self.torch_cpus) | set(self.geometry_cpus))
+        _active_partition = self
+        return self
+
+    def report(self):
+        import torch
+
+        rows = [
+            (
+                "torch",
+                self.torch_cores,
+                self.torch_cpus,
+                f"intra-op {torch.get_num_threads()},"
+                f" inter-op {torch.get_num_interop_threads()}",
+            ),
+            (
+                "geometry",
+                self.geometry_cores,
+                self.geometry_cpus,
+                "SDF, blockMesh, decomposePar, reconstructPar",
+            ),
+            (
+                "solver",
+                self.solver_cores,
+                self.solver_cpus,
+                f"{self.ranks} MPI ranks,"
+                f" {'bound to cores' if self.bind_ranks else 'not bound'}",
+            ),
+        ]
+        lines = ["CPU partition"]
+        for name, cores, cpus, note in rows:
+            lines.append(
+                f"  {name:<9}{len(cores):>3} cores  cpus {format_cpu_list(cpus):<16}"
+                f"  ({note})"
+            )
+        if self.torch_starved:
+            lines.append(
+                "  warning: reserving solver cores left torch 1 core,"
+                " set torch_cores or solver_cores"
+            )
+        if self.shared_solver_cores and self.ranks:
+            lines.append("  warning: no cores left for the solver, sharing torch cores")
+        elif self.ranks and not self.bind_ranks:
+            lines.append(
+                f"  warning: {self.ranks} ranks oversubscribe"
+                f" {len(self.solver_cores)} solver cores"
+            )
+        return "\n".join(lines)
@@ -1,141 +1,739 @@
+import asyncio
+import contextlib
+import glob
+import hashlib
 import os
+import re
+import resource
+import shutil
+import signal
 import subprocess
+import sys
+import tempfile
+import time
 
+from OPENFOAM_MAKER import make_block_mesh_dict
+from convergence import RESIDUAL_TOLERANCE, case_descriptors, parse_residuals
+from metrics import SimulationRecord
+from forcecoeffs import ForceCoeffsReader, save_history, tail_statistics
+from resources import NUMBER_OF_PROCESSORS, active_partition, format_cpu_list
 
-def run_simulation(verbose=False):
+SIMULATION_DIRECTORY = "~/OpenFOAM/daehwa-11/run/airfoil"
+SOURCE_DIRECTORY = "~/Documents/3D-propeller-Design"
+TAIL_WINDOW = 50  # 계수 평균을 낼 마지막 반복 수
+# scratch 케이스에서 원래 케이스 디렉토리로 되돌려 복사할 결과
+ARTIFACTS = ("forceCoeffs",)
+FAKE_OPENFOAM_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fake_openfoam.py"
+)
+
+
+def run_simulation(
+    verbose=False,
+    case_directory=SIMULATION_DIRECTORY,
+    source_directory=SOURCE_DIRECTORY,
+    solver="openfoam",
+):
     """
     OpenFOAM을 사용하여 시뮬레이션을 실행합니다.
+    solver="fake"이면 OpenFOAM 대신 fake_openfoam.py를 실행합니다.
     """
-    original_directory = setup_simulation_environment()
-    clean_simulation(verbose)
-    move_block_mesh_dict_and_control_dict(verbose)
-    generate_mesh(verbose)
-    remove_processor_directories(verbose)
-    decompose_mesh(verbose)
-    set_permissions(verbose)
-    run_parallel_simulation(verbose)
-    Cm, Cd, Cl = read_force_data()
-    remove_forceCoeffs(verbose)
-    os.chdir(original_directory)  # 원래 디렉토리로 돌아갑니다.
-    return Cm, Cd, Cl
+    return asyncio.run(
+        run_simulation_async(
+            case_directory, source_directory, verbose=verbose, solver=solver
+        )
+    )
 
 
-def setup_simulation_environment():
+async def run_simulation_async(
+    case_directory=SIMULATION_DIRECTORY,
+    source_directory=SOURCE_DIRECTORY,
+    verbose=False,
+    log_directory=None,
+    solver="openfoam",
+    history_path=None,
+    scratch_root=None,
+    artifacts=ARTIFACTS,
+    processors=NUMBER_OF_PROCESSORS,
+    record=None,
+):
     """
-    시뮬레이션 디렉토리로 작업 디렉토리를 변경합니다.
+    OpenFOAM 시뮬레이션을 비동기로 실행합니다.
+    작업 디렉토리를 바꾸지 않으므로 여러 케이스를 동시에 실행할 수 있습니다.
+    각 단계의 출력은 log_directory(기본값: 케이스 디렉토리)의 log.<단계> 파일에 기록됩니다.
+    단계별 wall time, CPU time, 최대 메모리 사용량을 담은 SimulationRecord를 반환합니다.
+    Cm, Cd, Cl은 마지막 TAIL_WINDOW 반복의 평균이며, history_path가 주어지면
+    forceCoeffs 수렴 이력을 .npz로 저장한 뒤 forceCoeffs.dat를 삭제합니다.
+    scratch_root(예: /dev/shm)가 주어지면 그 아래에 준비한 케이스에서 실행하고,
+    artifacts에 지정한 결과("forceCoeffs", "fields", "logs")만 원래 케이스 디렉토리로 복사합니다.
+    processors는 메시를 나눌 부분 수이자 MPI rank 수입니다.
+    OpenFOAM 명령이 0이 아닌 코드로 끝나면 subprocess.CalledProcessError를 발생시킵니다.
+    record를 넘기면 실패하더라도 그때까지의 단계 기록이 그 record에 남습니다.
     """
-    simulation_directory = "~/OpenFOAM/daehwa-11/run/airfoil"
-    original_directory = os.getcwd()  # 현재 작업 디렉토리를 저장합니다.
-    os.chdir(os.path.expanduser(simulation_directory))
-    return original_directory  # 원래 디렉토리를 반환합니다.
+    case_directory = os.path.expanduser(case_directory)
+    source_directory = os.path.expanduser(source_directory)
+    if record is None:
+        record = SimulationRecord(case_directory)
+    persistent_directory = case_directory
+    if scratch_root is not None:
+        with measure_stage(record, "stage"):
+            case_directory = stage_case_directory(case_directory, scratch_root)
+    log_directory = os.path.expanduser(log_directory or case_directory)
 
+    try:
+        await mesh_case_async(
+            case_directory,
+            source_directory,
+            log_directory,
+            verbose,
+            record,
+            solver,
+            processors=processors,
+        )
+        await run_parallel_simulation(
+            case_directory,
+            log_directory,
+            verbose,
+            record,
+            solver,
+            processors=processors,
+        )
+        await finish_case_async(
+            case_directory,
+            log_directory,
+            verbose,
+            record,
+            solver,
+            history_path=history_path,
+            persistent_directory=(
+                persistent_directory if scratch_root is not None else None
+            ),
+            artifacts=artifacts,
+        )
+    except subprocess.CalledProcessError:
+        # 다음 설계가 이번 케이스의 forceCoeffs.dat를 읽지 않도록 지웁니다.
+        remove_forceCoeffs(case_directory)
+        raise
+    return record
 
-def clean_simulation(verbose):
+
+async def mesh_case_async(
+    case_directory,
+    source_directory,
+    log_directory,
+    verbose,
+    record,
+    solver,
+    processors=NUMBER_OF_PROCESSORS,
+):
     """
-    시뮬레이션 디렉토리를 정리합니다.
+    솔버 실행 전 단계입니다. 케이스를 정리하고 dict 파일을 옮긴 뒤 blockMesh와 decomposePar를 실행합니다.
+    """
+    await clean_simulation(case_directory, log_directory, verbose, record)
+    with measure_stage(record, "move"):
+        move_block_mesh_dict_and_control_dict(source_directory, case_directory)
+    await generate_mesh(case_directory, log_directory, verbose, record, solver)
+    with measure_stage(record, "remove_processors"):
+        remove_processor_directories(case_directory)
+    await decompose_mesh(
+        case_directory, log_directory, verbose, record, solver, processors=processors
+    )
+    with measure_stage(record, "permissions"):
+        set_permissions(case_directory)
+
+
+async def finish_case_async(
+    case_directory,
+    log_directory,
+    verbose,
+    record,
+    solver,
+    history_path=None,
+    persistent_directory=None,
+    artifacts=ARTIFACTS,
+):
     """
-    run_command("sh ./Allclean", verbose)
+    솔버 실행 후 단계입니다. reconstructPar를 실행하고 결과를 record에 읽어 들인 뒤 케이스를 정리합니다.
+    persistent_directory가 주어지면(scratch 케이스) artifacts를 그 디렉토리로 복사합니다.
+    """
+    await reconstruct_case(case_directory, log_directory, verbose, record, solver)
+    with measure_stage(record, "parse"):
+        reader = ForceCoeffsReader(force_coeffs_path(case_directory))
+        if os.path.exists(reader.path):
+            reader.poll()
+        record.set_force_history(reader.history, reader.columns, TAIL_WINDOW)
+        record.cells = read_cell_count(case_directory)
+        solver_log_path = os.path.join(log_directory, "log.foamRun")
+        if os.path.exists(solver_log_path):
+            record.set_residuals(*parse_residuals(solver_log_path), RESIDUAL_TOLERANCE)
+    if history_path is not None and not record.failed:
+        history_path = os.path.expanduser(history_path)
+        os.makedirs(os.path.dirname(history_path) or ".", exist_ok=True)
+        save_history(history_path, record.history, record.columns)
+        record.history_path = history_path
+    if persistent_directory is not None and artifacts:
+        with measure_stage(record, "copy_back"):
+            copy_artifacts(case_directory, persistent_directory, artifacts)
+    remove_forceCoeffs(case_directory)
 
 
-def move_block_mesh_dict_and_control_dict(verbose):
+async def run_simulations_async(
+    case_directories,
+    source_directories,
+    max_concurrency=None,
+    verbose=False,
+    solver="openfoam",
+):
     """
-    blockMeshDict 파일을 적절한 위치로 이동합니다.
+    여러 케이스를 동시에 실행합니다. max_concurrency로 동시에 실행되는 케이스 수를 제한합니다.
     """
-    source_path = "~/Documents/3D-propeller-Design/blockMeshDict"
-    destination_directory = "~/OpenFOAM/daehwa-11/run/airfoil/system"
-    run_command(
-        f"mv {os.path.expanduser(source_path)} {os.path.expanduser(destination_directory)}",
-        verbose,
+    semaphore = asyncio.Semaphore(max_concurrency or len(case_directories))
+
+    async def run_case(case_directory, source_directory):
+        async with semaphore:
+            return await run_simulation_async(
+                case_directory, source_directory, verbose=verbose, solver=solver
+            )
+
+    return await asyncio.gather(
+        *(
+            run_case(case_directory, source_directory)
+            for case_directory, source_directory in zip(
+                case_directories, source_directories
+            )
+        )
     )
 
-    source_path = "~/Documents/3D-propeller-Design/controlDict"
-    run_command(
-        f"mv {os.path.expanduser(source_path)} {os.path.expanduser(destination_directory)}",
-        verbose,
+
+def evaluate_airfoil(
+    points,
+    angle_of_attack,
+    freestream_velocity=222.22,
+    case_directory=SIMULATION_DIRECTORY,
+    verbose=False,
+    solver="openfoam",
+    history_path=None,
+    fidelity=1.0,
+    end_time=200,
+    scratch_root=None,
+    artifacts=ARTIFACTS,
+):
+    """
+    airfoil 좌표로 OpenFOAM 입력 파일을 만들고 시뮬레이션을 실행합니다.
+    """
+    return asyncio.run(
+        evaluate_airfoil_async(
+            points,
+            angle_of_attack,
+            freestream_velocity=freestream_velocity,
+            case_directory=case_directory,
+            verbose=verbose,
+            solver=solver,
+            history_path=history_path,
+            fidelity=fidelity,
+            end_time=end_time,
+            scratch_root=scratch_root,
+            artifacts=artifacts,
+        )
     )
 
-    source_path = "~/Documents/3D-propeller-Design/U"
-    destination_directory = "~/OpenFOAM/daehwa-11/run/airfoil/0"
-    run_command(
-        f"mv {os.path.expanduser(source_path)} {os.path.expanduser(destination_directory)}",
-        verbose,
+
+async def evaluate_airfoil_async(
+    points,
+    angle_of_attack,
+    freestream_velocity=222.22,
+    case_directory=SIMULATION_DIRECTORY,
+    verbose=False,
+    solver="openfoam",
+    history_path=None,
+    fidelity=1.0,
+    end_time=200,
+    scratch_root=None,
+    artifacts=ARTIFACTS,
+):
+    """
+    케이스마다 별도의 임시 디렉토리에 blockMeshDict, controlDict, U를 생성한 뒤
+    해당 케이스 디렉토리에서 시뮬레이션을 비동기로 실행합니다.
+    fidelity는 메시 셀 수의 배율, end_time은 솔버 반복 횟수입니다.
+    OpenFOAM 명령이 실패하면 record.failed가 True이고 계수가 None인 record를 반환합니다.
+    """
+    if scratch_root is not None:
+        os.makedirs(scratch_root, exist_ok=True)
+    with tempfile.TemporaryDirectory(
+        prefix="airfoil_dicts_", dir=scratch_root
+    ) as source_directory:
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        make_block_mesh_dict(
+            points[:, 0],
+            points[:, 1],
+            angle_of_attack=angle_of_attack,
+            freestream_velocity=freestream_velocity,
+            output_directory=source_directory,
+            fidelity=fidelity,
+            end_time=end_time,
+        )
+        dicts_wall_time = time.perf_counter() - wall_start
+        dicts_cpu_time = time.process_time() - cpu_start
+        record = SimulationRecord(os.path.expanduser(case_directory))
+        try:
+            await run_simulation_async(
+                case_directory,
+                source_directory,
+                verbose=verbose,
+                solver=solver,
+                history_path=history_path,
+                scratch_root=scratch_root,
+                artifacts=artifacts,
+                record=record,
+            )
+        except subprocess.CalledProcessError as error:
+            record.fail(error)
+    record.add_stage("dicts", dicts_wall_time, dicts_cpu_time)
+    record.fidelity = fidelity
+    record.end_time = end_time
+    record.descriptors = case_descriptors(
+        points, angle_of_attack, freestream_velocity, fidelity
+    )
+    return record
+
+
+def make_case_files(
+    points, angle_of_attack, freestream_velocity=222.22, fidelity=1.0, end_time=200
+):
+    """
+    blockMeshDict, controlDict, U 파일 내용을 {파일 이름: 내용} dict로 만듭니다.
+    다른 머신의 worker로 케이스를 보낼 때 사용합니다.
+    """
+    with tempfile.TemporaryDirectory(prefix="airfoil_dicts_") as source_directory:
+        make_block_mesh_dict(
+            points[:, 0],
+            points[:, 1],
+            angle_of_attack=angle_of_attack,
+            freestream_velocity=freestream_velocity,
+            output_directory=source_directory,
+            fidelity=fidelity,
+            end_time=end_time,
+        )
+        files = {}
+        for file_name in ("blockMeshDict", "controlDict", "U"):
+            with open(os.path.join(source_directory, file_name)) as f:
+                files[file_name] = f.read()
+    return files
+
+
+def prepare_case_directory(case_directory, template_directory=SIMULATION_DIRECTORY):
+    """
+    템플릿 케이스를 복사하여 새로운 케이스 디렉토리를 만듭니다. 이미 존재하면 그대로 사용합니다.
+    """
+    case_directory = os.path.expanduser(case_directory)
+    if not os.path.isdir(case_directory):
+        shutil.copytree(
+            os.path.expanduser(template_directory),
+            case_directory,
+            ignore=shutil.ignore_patterns("processor*", "postProcessing", "log.*"),
+        )
+    return case_directory
+
+
+def stage_case_directory(case_directory, scratch_root):
+    """
+    케이스 디렉토리를 scratch_root(tmpfs 등) 아래에 한 번만 준비하고 그 경로를 반환합니다.
+    같은 파일 시스템이면 템플릿 파일을 하드 링크하고, 아니면 복사합니다.
+    """
+    scratch_directory = scratch_case_directory(case_directory, scratch_root)
+    if not os.path.isdir(scratch_directory):
+        shutil.copytree(
+            os.path.expanduser(case_directory),
+            scratch_directory,
+            ignore=shutil.ignore_patterns(
+                "processor*", "postProcessing", "log.*", "polyMesh"
+            ),
+            copy_function=link_or_copy,
+        )
+    return scratch_directory
+
+
+def scratch_case_directory(case_directory, scratch_root):
+    """
+    case_directory에 대응하는 scratch 케이스 경로입니다. 이름이 같은 케이스끼리 겹치지 않도록 경로의 해시를 붙입니다.
+    """
+    case_directory = os.path.abspath(os.path.expanduser(case_directory))
+    digest = hashlib.sha1(case_directory.encode()).hexdigest()[:8]
+    return os.path.join(
+        os.path.expanduser(scratch_root),
+        f"{os.path.basename(case_directory)}-{digest}",
+    )
+
+
+def link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+    return destination
+
+
+def copy_artifacts(case_directory, destination_directory, artifacts=ARTIFACTS):
+    """
+    scratch 케이스의 결과 중 artifacts에 지정한 것만 원래 케이스 디렉토리로 복사합니다.
+    "forceCoeffs": postProcessing/forceCoeffs, "fields": 마지막 시간 디렉토리, "logs": log.* 파일
+    """
+    paths = []
+    if "forceCoeffs" in artifacts:
+        paths.append(os.path.join("postProcessing", "forceCoeffs"))
+    if "fields" in artifacts:
+        times = [
+            name
+            for name in os.listdir(case_directory)
+            if name != "0" and re.fullmatch(r"[0-9.eE+-]+", name)
+        ]
+        if times:
+            paths.append(max(times, key=float))
+    if "logs" in artifacts:
+        paths.extend(
+            os.path.basename(path)
+            for path in glob.glob(os.path.join(case_directory, "log.*"))
+        )
+
+    for path in paths:
+        source = os.path.join(case_directory, path)
+        destination = os.path.join(destination_directory, path)
+        if os.path.isdir(source):
+            shutil.copytree(source, destination, dirs_exist_ok=True)
+        elif os.path.exists(source):
+            shutil.copy2(source, destination)
+
+
+async def clean_simulation(case_directory, log_directory, verbose, record=None):
+    """
+    시뮬레이션 디렉토리를 정리합니다.
+    """
+    await run_command(
+        ["sh", "./Allclean"], case_directory, log_directory, verbose, record, "clean"
     )
 
 
-def generate_mesh(verbose):
+def move_block_mesh_dict_and_control_dict(source_directory, case_directory):
+    """
+    blockMeshDict, controlDict, U 파일을 케이스 디렉토리의 적절한 위치로 이동합니다.
+    """
+    for file_name, destination in (
+        ("blockMeshDict", "system"),
+        ("controlDict", "system"),
+        ("U", "0"),
+    ):
+        destination_path = os.path.join(case_directory, destination, file_name)
+        # 하드 링크된 템플릿 파일을 덮어쓰지 않도록 먼저 링크를 끊습니다.
+        if os.path.exists(destination_path):
+            os.remove(destination_path)
+        shutil.move(os.path.join(source_directory, file_name), destination_path)
+
+
+async def generate_mesh(
+    case_directory, log_directory, verbose, record=None, solver="openfoam"
+):
     """
     blockMesh를 사용하여 메시를 생성합니다.
     """
-    run_command("blockMesh", verbose)
+    await run_command(
+        foam_command("blockMesh", solver=solver),
+        case_directory,
+        log_directory,
+        verbose,
+        record,
+        "mesh",
+    )
 
 
-def set_permissions(verbose):
+def set_permissions(case_directory):
     """
     points 파일에 대한 권한을 설정합니다.
     """
-    points_path = "~/OpenFOAM/daehwa-11/run/airfoil/constant/polyMesh/points"
-    run_command(f"chmod 777 {os.path.expanduser(points_path)}", verbose)
+    points_path = os.path.join(case_directory, "constant", "polyMesh", "points")
+    if os.path.exists(points_path):
+        os.chmod(points_path, 0o777)
 
 
-def remove_processor_directories(verbose):
+def remove_processor_directories(case_directory):
     """
     기존의 processor 디렉토리를 삭제합니다.
     """
-    run_command("rm -rf processor*", verbose)
+    for processor_directory in glob.glob(os.path.join(case_directory, "processor*")):
+        shutil.rmtree(processor_directory, ignore_errors=True)
 
 
-def decompose_mesh(verbose):
+def set_number_of_subdomains(case_directory, processors):
     """
-    메시를 여러 부분으로 나누어 병렬 처리를 준비합니다.
+    system/decomposeParDict의 numberOfSubdomains를 processors로 맞춥니다. (값이 다를 때만 다시 씀)
+    scratch 케이스의 파일은 템플릿의 하드 링크일 수 있으므로 새 파일로 바꿔 씁니다.
+    method가 scotch처럼 부분 수만 필요한 dict를 가정합니다. (simple/hierarchical의 n은 바꾸지 않음)
     """
-    run_command("decomposePar", verbose)
+    dict_path = os.path.join(case_directory, "system", "decomposeParDict")
+    if not os.path.exists(dict_path):
+        return
+    with open(dict_path) as f:
+        content = f.read()
+    updated = re.sub(
+        r"(numberOfSubdomains\s+)\d+", rf"\g<1>{processors}", content, count=1
+    )
+    if updated == content:
+        return
+    temporary_path = f"{dict_path}.tmp"
+    with open(temporary_path, "w") as f:
+        f.write(updated)
+    os.replace(temporary_path, dict_path)
 
 
-def run_parallel_simulation(verbose):
+async def decompose_mesh(
+    case_directory,
+    log_directory,
+    verbose,
+    record=None,
+    solver="openfoam",
+    processors=NUMBER_OF_PROCESSORS,
+):
     """
-    병렬로 시뮬레이션을 실행합니다.
+    메시를 processors개 부분으로 나누어 병렬 처리를 준비합니다.
     """
-    run_command(
-        "mpirun --oversubscribe -np 20 foamRun -solver incompressibleFluid -parallel",
+    set_number_of_subdomains(case_directory, processors)
+    await run_command(
+        foam_command("decomposePar", solver=solver),
+        case_directory,
+        log_directory,
         verbose,
+        record,
+        "decompose",
     )
-    run_command("reconstructPar", verbose)
-    run_command("rm -rf processor*", verbose)
 
 
-def read_force_data():
+async def run_parallel_simulation(
+    case_directory,
+    log_directory,
+    verbose,
+    record=None,
+    solver="openfoam",
+    processors=NUMBER_OF_PROCESSORS,
+):
     """
-    forceCoeffs.dat 파일을 읽어 마지막 줄의 시간, 항력 계수, 양력 계수를 반환합니다.
+    processors개 MPI rank로 시뮬레이션을 실행합니다.
     """
-    result_file_path = (
-        "~/OpenFOAM/daehwa-11/run/airfoil/postProcessing/forceCoeffs/0/forceCoeffs.dat"
+    solver_command = foam_command(
+        "foamRun", "-solver", "incompressibleFluid", "-parallel", solver=solver
+    )
+    partition = active_partition()
+    if solver != "fake":
+        solver_command = [
+            "mpirun",
+            "--oversubscribe",
+            *(partition.mpi_options() if partition is not None else []),
+            "-np",
+            str(processors),
+            *solver_command,
+        ]
+    # apply()가 이 프로세스를 torch/geometry 코어로 좁혔으므로 mpirun은 taskset으로 solver 코어에서 시작하고,
+    # --cpu-set은 그 안에서 rank를 배치합니다. (solver 코어에 접근할 수 없으면 taskset이 실패)
+    await run_command(
+        solver_command,
+        case_directory,
+        log_directory,
+        verbose,
+        record,
+        "solve",
+        log_name="foamRun",
+        cpus=partition.solver_cpus if partition is not None else None,
     )
-    with open(os.path.expanduser(result_file_path), "r") as file:
-        lines = file.readlines()
 
-    last_line = lines[-1].split()
-    Cm, Cd, Cl = float(last_line[1]), float(last_line[2]), float(last_line[3])
-    return Cm, Cd, Cl
+
+async def reconstruct_case(
+    case_directory, log_directory, verbose, record=None, solver="openfoam"
+):
+    """
+    processor 디렉토리의 결과를 합친 뒤 processor 디렉토리를 삭제합니다.
+    """
+    await run_command(
+        foam_command("reconstructPar", solver=solver),
+        case_directory,
+        log_directory,
+        verbose,
+        record,
+        "reconstruct",
+    )
+    with measure_stage(record, "cleanup"):
+        remove_processor_directories(case_directory)
 
 
-def remove_forceCoeffs(verbose):
+def read_force_data(case_directory=SIMULATION_DIRECTORY, window=TAIL_WINDOW):
     """
-    forceCoeffs 디렉토리를 삭제합니다.
+    forceCoeffs.dat의 마지막 window개 줄에서 모멘트 계수, 항력 계수, 양력 계수의 평균을 반환합니다.
+    SimulationRecord와 같이 헤더의 열 이름으로 계수를 찾습니다.
     """
-    run_command("rm -rf postProcessing/forceCoeffs/0/forceCoeffs.dat", verbose)
+    reader = ForceCoeffsReader(force_coeffs_path(case_directory))
+    reader.poll()
+    if len(reader.history) == 0:
+        raise ValueError(f"{reader.path} has no rows")
+    coefficients = tail_statistics(reader.history, reader.columns, window)
+    return tuple(coefficients[name]["mean"] for name in ("Cm", "Cd", "Cl"))
 
 
-def run_command(command, verbose):
+def read_cell_count(case_directory=SIMULATION_DIRECTORY):
     """
-    명령어를 실행하고, verbose가 True일 경우 명령어의 출력을 표시합니다.
+    polyMesh/owner 헤더의 note 항목에서 셀 개수를 읽어옵니다.
     """
-    process = subprocess.run(
-        command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    owner_path = os.path.join(
+        os.path.expanduser(case_directory), "constant", "polyMesh", "owner"
     )
+    if not os.path.exists(owner_path):
+        return None
+    with open(owner_path, "rb") as file:
+        for _, line in zip(range(20), file):
+            match = re.search(rb"nCells:\s*(\d+)", line)
+            if match:
+                return int(match.group(1))
+    return None
+
+
+def force_coeffs_path(case_directory=SIMULATION_DIRECTORY):
+    return os.path.join(
+        os.path.expanduser(case_directory),
+        "postProcessing",
+        "forceCoeffs",
+        "0",
+        "forceCoeffs.dat",
+    )
+
+
+def remove_forceCoeffs(case_directory=SIMULATION_DIRECTORY):
+    """
+    forceCoeffs.dat 파일을 삭제합니다.
+    """
+    result_file_path = force_coeffs_path(case_directory)
+    if os.path.exists(result_file_path):
+        os.remove(result_file_path)
+
+
+def foam_command(utility, *arguments, solver="openfoam"):
+    """
+    OpenFOAM 유틸리티 실행 명령을 만듭니다.
+    solver="fake"이면 OpenFOAM 없이 동작하는 fake_openfoam.py로 실행합니다.
+    """
+    if solver == "fake":
+        return [sys.executable, FAKE_OPENFOAM_PATH, utility, *arguments]
+    return [utility, *arguments]
+
+
+@contextlib.contextmanager
+def measure_stage(record, name):
+    """
+    Python 안에서 처리되는 단계(파일 이동, 정리 등)의 wall time과 CPU time을 기록합니다.
+    """
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    yield
+    if record is not None:
+        record.add_stage(
+            name, time.perf_counter() - wall_start, time.process_time() - cpu_start
+        )
+
+
+async def run_command(
+    command,
+    case_directory,
+    log_directory,
+    verbose,
+    record=None,
+    stage=None,
+    log_name=None,
+    cpus=None,
+):
+    """
+    명령어를 케이스 디렉토리에서 실행하고 출력을 log.<명령어> 파일로 스트리밍합니다.
+    verbose가 True일 경우 종료 후 로그를 화면에도 표시합니다.
+    record가 주어지면 stage 이름으로 wall time, CPU time, 최대 메모리 사용량을 기록합니다.
+    종료 코드가 0이 아니면 subprocess.CalledProcessError를 발생시킵니다. (출력은 로그 파일에 남음)
+    cpus가 주어지면 taskset으로 해당 CPU에 고정하여 실행하며, None이면 적용된 CorePartition의 geometry 코어를 사용합니다.
+    """
+    if cpus is None and active_partition() is not None:
+        cpus = active_partition().geometry_cpus
+    log_path = os.path.join(
+        log_directory, f"log.{log_name or os.path.basename(command[-1])}"
+    )
+    stage = stage or os.path.basename(command[-1])
+    if cpus:
+        # 멀티스레드 프로세스의 fork에서 preexec_fn을 실행하면 교착될 수 있으므로
+        # affinity는 exec된 taskset이 지정합니다. (mpirun의 rank도 이 CPU 집합을 물려받음)
+        command = ["taskset", "-c", format_cpu_list(cpus), *command]
+    # fork된 자식의 ru_maxrss는 exec 이전 부모의 메모리 사용량을 포함하므로,
+    # 부모보다 큰 값일 때만 실제 최대 메모리 사용량으로 기록합니다.
+    parent_maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    wall_start = time.perf_counter()
+    with open(log_path, "wb") as log_file:
+        process = subprocess.Popen(
+            command,
+            cwd=case_directory,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            # 취소될 때 mpirun과 rank를 함께 종료할 수 있도록 별도 프로세스 그룹으로 실행합니다.
+            start_new_session=True,
+        )
+    try:
+        returncode, rusage = await wait_for_process(process)
+    except BaseException:
+        # 평가가 취소되거나 중단되면 프로세스 그룹을 종료하고 회수한 뒤 다시 발생시킵니다.
+        kill_process_group(process)
+        raise
+    wall_time = time.perf_counter() - wall_start
+
+    if record is not None:
+        record.add_stage(
+            stage,
+            wall_time,
+            rusage.ru_utime + rusage.ru_stime,
+            # Linux에서 ru_maxrss 단위는 KB
+            rusage.ru_maxrss / 1024 if rusage.ru_maxrss > parent_maxrss else None,
+        )
     if verbose:
-        print(process.stdout.decode())
-        print(process.stderr.decode())
+        with open(log_path, "r", errors="replace") as log_file:
+            print(log_file.read())
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
+    return returncode
+
+
+def kill_process_group(process):
+    """
+    start_new_session으로 실행한 명령의 프로세스 그룹 전체(mpirun과 rank)를 종료하고 zombie가 남지 않도록 회수합니다.
+    """
+    with contextlib.suppress(ProcessLookupError, PermissionError):
+        os.killpg(process.pid, signal.SIGKILL)
+    # wait_for_process의 thread가 먼저 회수했으면 ChildProcessError가 발생합니다.
+    with contextlib.suppress(ChildProcessError):
+        os.wait4(process.pid, 0)
+
+
+async def wait_for_process(process):
+    """
+    이벤트 루프를 막지 않고 프로세스 종료를 기다립니다.
+    os.wait4로 회수하므로 mpirun처럼 자식 프로세스를 띄우는 명령도
+    프로세스 트리 전체의 CPU time과 최대 메모리 사용량을 얻을 수 있습니다.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        pidfd = os.pidfd_open(process.pid)
+    except (AttributeError, OSError):
+        # pidfd를 지원하지 않는 환경에서는 스레드에서 기다립니다.
+        _, status, rusage = await loop.run_in_executor(None, os.wait4, process.pid, 0)
+    else:
+        finished = loop.create_future()
 
+        def on_exit():
+            if not finished.done():
+                finished.set_result(None)
 
-# 예제 사용법:
-# Cd, Cl = run_simulation(verbose=True)
+        loop.add_reader(pidfd, on_exit)
+        try:
+            await finished
+        finally:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+        _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, rusage
@@ -1,5 +1,27 @@
 import torch
 
+# 상태(SDF 이미지)를 저장하는 형식. uint8은 상태마다 [최솟값, 최댓값]을 255 단계로 양자화하고,
+# circles는 이미지 대신 상태를 만든 원 목록만 저장합니다. (mini batch마다 env.render_state로 다시 그림)
+STATE_DTYPES = {
+    "float32": torch.float32,
+    "float16": torch.float16,
+    "uint8": torch.uint8,
+    "circles": None,
+}
+
+
+def dequantize_states(states, scales=None, offsets=None, out=None):
+    """
+    저장된 상태를 float32로 되돌립니다. scales, offsets는 uint8 상태의 (샘플별) 양자화 계수입니다.
+    """
+    if out is None:
+        out = torch.empty(states.shape, device=states.device)
+    out.copy_(states)
+    if scales is not None:
+        shape = (-1,) + (1,) * (states.dim() - 1)
+        out.mul_(scales.view(shape)).add_(offsets.view(shape))
+    return out
+
 
 class TensorManager:
     def __init__(
@@ -9,27 +31,60 @@ class TensorManager:
         state_shape,
         action_dim,
         device,
+        state_dtype="float32",
     ):
         self.env_num = env_num
         self.horizon = horizon
         self.state_shape = state_shape
         self.action_dim = action_dim
         self.device = device
+        self.state_dtype = state_dtype
 
-        self.states_tensor = self.init_tensor(
-            [self.env_num, self.horizon, *self.state_shape], False
-        )
+        self.states_tensor = None
+        # circles 형식에서 (traj_idx * horizon + t)번째 상태를 만든 원 목록
+        self.state_circles = None
+        if state_dtype == "circles":
+            self.state_circles = [None] * (self.env_num * self.horizon)
+        else:
+            self.states_tensor = torch.zeros(
+                [self.env_num, self.horizon, *self.state_shape],
+                dtype=STATE_DTYPES[state_dtype],
+                device=self.device,
+            )
+        # uint8 상태의 양자화 계수 (상태 = 저장값 * scale + offset)
+        self.state_scales_tensor = None
+        self.state_offsets_tensor = None
+        if state_dtype == "uint8":
+            self.state_scales_tensor = self.init_tensor(
+                [self.env_num, self.horizon], False
+            )
+            self.state_offsets_tensor = self.init_tensor(
+                [self.env_num, self.horizon], False
+            )
         self.actions_tensor = self.init_tensor(
             [self.env_num, self.horizon, self.action_dim], False
         )
         self.rewards_tensor = self.init_tensor([self.env_num, self.horizon], False)
         self.values_tensor = self.init_tensor([self.env_num, self.horizon + 1], False)
         self.log_probs_tensor = self.init_tensor([self.env_num, self.horizon], False)
+        # t에서 에피소드가 끝났으면 1 (dones: 종료, 다음 가치로 bootstrap하지 않음,
+        # truncations: 시간 제한 등으로 중단, bootstrap_values_tensor[:, t]로 bootstrap)
+        self.dones_tensor = self.init_tensor([self.env_num, self.horizon], False)
+        self.truncations_tensor = self.init_tensor([self.env_num, self.horizon], False)
+        self.bootstrap_values_tensor = self.init_tensor(
+            [self.env_num, self.horizon], False
+        )
         self.advantages_tensor = self.init_tensor([self.env_num, self.horizon], False)
         self.return_tensor = self.init_tensor([self.env_num, self.horizon], False)
         self.time_step_tensor = torch.arange(
             0, self.horizon, device=self.device
         ).repeat(self.env_num, 1)
+        # reset()이 되돌릴 (env_num, horizon, ...) 모양의 버퍼
+        self._buffers = {
+            name: tensor
+            for name, tensor in vars(self).items()
+            if name.endswith("_tensor") and tensor is not None
+        }
 
     def init_tensor(self, shape, requires_grad):
         return torch.zeros(shape, requires_grad=requires_grad).to(self.device)
@@ -43,17 +98,65 @@ class TensorManager:
         log_probs,
         traj_idx,
         t,
+        circles=None,
     ):
-        self.states_tensor[traj_idx, t, :] = states
+        if self.state_circles is not None:
+            self.state_circles[traj_idx * self.horizon + t] = tuple(circles)
+        else:
+            self.store_state(traj_idx, t, states)
         self.actions_tensor[traj_idx, t] = actions
         self.rewards_tensor[traj_idx, t] = rewards
         self.values_tensor[traj_idx, t] = values.squeeze()
         self.log_probs_tensor[traj_idx, t] = log_probs
 
-    def flatten_tensors(self):
-        self.states_tensor = self.states_tensor.view(
-            self.env_num * self.horizon, *self.state_shape
+    def store_state(self, traj_idx, t, states):
+        if self.state_scales_tensor is None:
+            self.states_tensor[traj_idx, t, :] = states
+            return
+        minimum, maximum = states.min(), states.max()
+        scale = (maximum - minimum).clamp_min(1e-12) / 255
+        self.states_tensor[traj_idx, t, :] = ((states - minimum) / scale).round_()
+        self.state_scales_tensor[traj_idx, t] = scale
+        self.state_offsets_tensor[traj_idx, t] = minimum
+
+    def reset(self):
+        """
+        다음 반복(iteration)에서 같은 버퍼를 다시 쓰도록 flatten 전의 모양으로 되돌립니다.
+        매 스텝 덮어쓰는 값은 그대로 두고, 일부 스텝만 기록하는 종료/중단 표시만 0으로 지웁니다.
+        """
+        for name, tensor in self._buffers.items():
+            setattr(self, name, tensor)
+        self.dones_tensor.zero_()
+        self.truncations_tensor.zero_()
+        return self
+
+    def state_bytes(self):
+        """
+        상태 저장에 쓰는 바이트 수입니다. (양자화 계수 포함, 원 목록은 원마다 float64 3개로 계산)
+        """
+        if self.state_circles is not None:
+            return sum(
+                len(circles) * 3 * 8 for circles in self.state_circles if circles
+            )
+        tensors = [
+            self.states_tensor,
+            self.state_scales_tensor,
+            self.state_offsets_tensor,
+        ]
+        return sum(
+            tensor.numel() * tensor.element_size()
+            for tensor in tensors
+            if tensor is not None
         )
+
+    def flatten_tensors(self):
+        if self.states_tensor is not None:
+            self.states_tensor = self.states_tensor.view(
+                self.env_num * self.horizon, *self.state_shape
+            )
+        if self.state_scales_tensor is not None:
+            self.state_scales_tensor = self.state_scales_tensor.view(-1)
+            self.state_offsets_tensor = self.state_offsets_tensor.view(-1)
         self.actions_tensor = self.actions_tensor.view(
             self.env_num * self.horizon, self.action_dim
         )
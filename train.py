@@ -1,9 +1,20 @@
+import asyncio
 import torch
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from multiprocessing import Pool
 from AirfoilEnv import *
-from tensormanager import TensorManager
+from tensormanager import TensorManager, dequantize_states
+from model.quantization import QuantizedPolicy
 import os
 
+# 양자화된 rollout 정책을 보정할 최근 rollout 상태 수
+CALIBRATION_STATES = 32
+# 보정에 쓰지 않고 float32 대비 차이를 측정할 최근 rollout 상태 수 (보정 상태 사이사이에서 고름)
+HELD_OUT_STATES = 8
+# 측정한 행동 분포 KL(float || int8) 평균이 이 값을 넘으면 다음 rollout은 float32 Agent로 진행
+MAX_ROLLOUT_KL = 0.05
+
 
 class Train:
     def __init__(
@@ -19,8 +30,15 @@ class Train:
         number_of_trajectories,
         epsilon,
         beta=0.01,
+        state_dtype="float32",
+        envs=None,
+        render_workers=1,
+        quantized_rollout=False,
+        max_rollout_divergence=MAX_ROLLOUT_KL,
     ):
-        self.env = env
+        # 함께 진행할 환경 목록 (각 env의 evaluator는 동시 평가를 지원해야 함)
+        self.envs = envs or [env]
+        self.env = self.envs[0]
         self.env_name = env_name
         self.agent = agent
         self.epsilon = epsilon
@@ -39,63 +57,83 @@ class Train:
         self.actor_loss_history = []
         self.critic_loss_history = []
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # rollout 상태 저장 형식 ("float32", "float16", "uint8", "circles"), mini batch에서만 float32로 복원
+        self.state_dtype = state_dtype
+        # circles 형식에서 mini batch 상태를 다시 그릴 thread 수
+        self.render_workers = render_workers
+        self._render_executor = None
+        self.tensor_manager = None
+        # rollout에서 float32 Agent 대신 int8 복사본(model.quantization.QuantizedPolicy)을 사용
+        # 업데이트마다 최근 rollout 상태로 다시 양자화하고, 보정에 쓰지 않은 상태에서 float32 대비 행동 분포 차이를 기록
+        self.quantized_rollout = quantized_rollout
+        self.quantized_policy = None
+        self.recent_states = deque(maxlen=CALIBRATION_STATES + HELD_OUT_STATES)
+        self.rollout_divergence_history = []
+        self.max_rollout_divergence = max_rollout_divergence
+        # choose_mini_batch가 재사용하는 mini batch 버퍼
+        self._mini_batch_shapes = None
+        self._mini_batch_buffers = None
 
     def step(self):
         for _ in range(1, 1 + self.n_iterations):
-            tensor_manager = TensorManager(
-                env_num=self.number_of_trajectories,
-                horizon=self.horizon,
-                state_shape=(240, 340),  # Image shape
-                action_dim=self.agent.n_actions,
-                device=self.device,
-            )
+            tensor_manager = self.get_tensor_manager()
 
             lift_drag_ratio_lst = []
             best_lift_drag_ratio = -np.inf
             best_img = None
+            policy = self.rollout_policy()
 
             with torch.no_grad():
-                for n in range(self.number_of_trajectories):
-                    state = self.env.reset()
-                    state = state.to(self.device)
+                # 환경 len(self.envs)개의 trajectory를 함께 진행하며 상태를 한 번에 추론
+                for first in range(0, self.number_of_trajectories, len(self.envs)):
+                    envs = self.envs[: self.number_of_trajectories - first]
+                    trajectories = slice(first, first + len(envs))
+                    states = torch.stack([env.reset() for env in envs]).to(self.device)
                     # 1 episode (data collection)
                     for t in range(self.horizon):
-                        # Actor
-                        dist = self.agent.choose_dists(state, use_grad=False)
-                        action = self.agent.choose_actions(dist)
-                        scaled_actions = (
-                            self.agent.scale_actions(action.cpu()).numpy().squeeze()
-                        )
-                        log_prob = dist.log_prob(action).sum(dim=1)
-
-                        # Critic
-                        value = self.agent.get_value(state, use_grad=False)
-                        next_state, reward, lift_drag_ratio, img = self.env.step(
-                            scaled_actions, t=t
-                        )
-
-                        tensor_manager.update_tensors(
-                            state,
-                            action,
-                            reward,
-                            value,
-                            log_prob,
-                            n,
-                            t,
+                        # Actor, Critic
+                        dists, values = policy.choose_dists_and_values(
+                            states, use_grad=False
                         )
-
-                        state = next_state.clone().detach().float().to(self.device)
-
-                    next_value = self.agent.get_value(state, use_grad=False)
-                    tensor_manager.values_tensor[n, -1] = next_value.squeeze()
-                
-                    lift_drag_ratio_lst.append(lift_drag_ratio)
-                    if lift_drag_ratio > best_lift_drag_ratio:
-                        best_lift_drag_ratio = lift_drag_ratio
-                        best_img = img  # Save the best airfoil image
-                        file_name = f"best_airfoil_{best_lift_drag_ratio:.2f}.png"
-                        best_img.save(file_name)
-
+                        actions = self.agent.choose_actions(dists)
+                        scaled_actions = self.agent.scale_actions(actions.cpu()).numpy()
+                        log_probs = dists.log_prob(actions).sum(dim=1)
+                        if self.quantized_policy is not None:
+                            self.recent_states.extend(states.cpu())
+
+                        # 상태를 만든 원 목록 (step이 새 원을 추가하기 전)
+                        circles = [list(env.circles) for env in envs]
+                        results = self.step_envs(envs, scaled_actions, t)
+
+                        for i, n in enumerate(range(first, first + len(envs))):
+                            tensor_manager.update_tensors(
+                                states[i],
+                                actions[i],
+                                results[i][1],
+                                values[i],
+                                log_probs[i],
+                                n,
+                                t,
+                                circles=circles[i],
+                            )
+
+                        states = torch.stack(
+                            [next_state.float() for next_state, *_ in results]
+                        ).to(self.device)
+
+                    next_values = policy.get_value(states, use_grad=False)
+                    tensor_manager.values_tensor[trajectories, -1] = next_values[:, 0]
+
+                    for env, (_, _, lift_drag_ratio, img) in zip(envs, results):
+                        lift_drag_ratio_lst.append(lift_drag_ratio)
+                        if lift_drag_ratio > best_lift_drag_ratio:
+                            best_lift_drag_ratio = lift_drag_ratio
+                            # 상태가 이미지가 아니면 (state_type="points") 최고 airfoil만 그림
+                            if img is None:
+                                img = env.airfoil_image(env.circles)
+                            best_img = img  # Save the best airfoil image
+                            file_name = f"best_airfoil_{best_lift_drag_ratio:.2f}.png"
+                            best_img.save(file_name)
 
             tensor_manager.advantages_tensor = self.get_gae(tensor_manager)
             tensor_manager.return_tensor = (
@@ -104,10 +142,85 @@ class Train:
             tensor_manager.flatten_tensors()
             # Train the agent
             actor_loss, critic_loss = self.train(tensor_manager)
+            self.refresh_rollout_policy()
             lift_drag_ratio = sum(lift_drag_ratio_lst) / len(lift_drag_ratio_lst)
 
             self.print_logs(actor_loss, critic_loss, lift_drag_ratio)
 
+    def rollout_policy(self):
+        """
+        rollout에서 사용할 정책입니다. quantized_rollout이면 처음 호출할 때 초기 상태로 보정한 int8 정책을 만듭니다.
+        마지막으로 측정한 KL 평균이 max_rollout_divergence를 넘으면 float32 Agent를 사용합니다.
+        (int8 정책은 계속 갱신하고 측정하므로 차이가 줄어들면 다시 사용)
+        """
+        if not self.quantized_rollout:
+            return self.agent
+        if self.quantized_policy is None:
+            states = torch.stack([env.reset() for env in self.envs])
+            self.quantized_policy = QuantizedPolicy(self.agent, states)
+        if self.rollout_divergence_exceeded():
+            return self.agent
+        return self.quantized_policy
+
+    def rollout_divergence_exceeded(self):
+        return bool(self.rollout_divergence_history) and (
+            self.rollout_divergence_history[-1]["kl_mean"] > self.max_rollout_divergence
+        )
+
+    def refresh_rollout_policy(self):
+        """
+        업데이트된 가중치로 int8 정책을 다시 만들고, 보정에 쓰지 않은 최근 상태에서 float32 Agent 대비 차이를 기록합니다.
+        """
+        if self.quantized_policy is None or len(self.recent_states) < 2:
+            return
+        states = torch.stack(list(self.recent_states))
+        # 상태 (CALIBRATION_STATES // HELD_OUT_STATES + 1)개마다 하나를 측정용으로 남김
+        held_out = (
+            torch.arange(len(states)) % (CALIBRATION_STATES // HELD_OUT_STATES + 1) == 0
+        )
+        self.quantized_policy.refresh(self.agent, states[~held_out])
+        self.rollout_divergence_history.append(
+            self.quantized_policy.divergence(
+                self.agent, states[held_out].to(self.device)
+            )
+        )
+
+    def step_envs(self, envs, actions, t):
+        """
+        envs를 하나의 이벤트 루프에서 동시에 한 스텝 진행하고 env마다 step의 결과를 반환합니다.
+        """
+
+        async def run():
+            return await asyncio.gather(
+                *(env.step_async(action, t=t) for env, action in zip(envs, actions))
+            )
+
+        return asyncio.run(run())
+
+    def get_tensor_manager(self):
+        """
+        첫 반복에서 만든 TensorManager를 reset하여 이후 반복에서도 같은 버퍼를 사용합니다.
+        """
+        if self.tensor_manager is None:
+            self.tensor_manager = TensorManager(
+                env_num=self.number_of_trajectories,
+                horizon=self.horizon,
+                state_shape=self.env.state_shape,  # SDF (240, 340) 또는 표면점 (36, 2)
+                action_dim=self.agent.n_actions,
+                device=self.device,
+                state_dtype=self.state_dtype,
+            )
+        return self.tensor_manager.reset()
+
+    @staticmethod
+    def stored_states(tensor_manager):
+        """
+        (N, 1, H, W) 모양의 저장된 상태입니다. 원 목록만 저장한 경우 None입니다.
+        """
+        if tensor_manager.states_tensor is None:
+            return None
+        return tensor_manager.states_tensor.unsqueeze(1)
+
     def train(
         self,
         tensor_manager,
@@ -124,26 +237,21 @@ class Train:
                 old_log_prob,
             ) in self.choose_mini_batch(
                 self.mini_batch_size,
-                tensor_manager.states_tensor,
+                self.stored_states(tensor_manager),
                 tensor_manager.actions_tensor,
                 tensor_manager.return_tensor,
                 tensor_manager.advantages_tensor,
                 tensor_manager.values_tensor,
                 tensor_manager.log_probs_tensor,
+                state_scales=tensor_manager.state_scales_tensor,
+                state_offsets=tensor_manager.state_offsets_tensor,
+                state_circles=tensor_manager.state_circles,
             ):
-                state, action, return_, adv, old_value, old_log_prob = (
-                    state.squeeze(),
-                    action.squeeze(),
-                    return_.squeeze(),
-                    adv.squeeze(),
-                    old_value.squeeze(),
-                    old_log_prob.squeeze(),
+                new_dist, value = self.agent.choose_dists_and_values(
+                    state, use_grad=True
                 )
-                state = state.unsqueeze(1)
-                value = self.agent.get_value(state, use_grad=True)
                 critic_loss = (return_ - value).pow(2).mean()
 
-                new_dist = self.agent.choose_dists(state, use_grad=True)
                 new_log_prob = new_dist.log_prob(action).sum(dim=1)
                 ratio = (new_log_prob - old_log_prob).exp()
 
@@ -164,22 +272,30 @@ class Train:
         return avg_actor_loss, avg_critic_loss
 
     def get_gae(self, tensor_manager, gamma=0.9, lam=0.95):
+        """
+        모든 환경의 GAE를 시간 역순으로 한 번에 계산합니다. (환경 축은 벡터 연산)
+        horizon 끝(values_tensor[:, -1])과 truncations_tensor가 1인 스텝은 다음 상태의 가치로 bootstrap하고,
+        dones_tensor가 1인 스텝은 bootstrap하지 않습니다. 두 경우 모두 그 뒤의 advantage는 이어지지 않습니다.
+        종료/중단이 없으면 환경과 스텝마다 반복하던 이전 구현과 비트 단위로 같은 값을 반환합니다.
+        """
         rewards = tensor_manager.rewards_tensor
         values = tensor_manager.values_tensor
-        num_env, horizon = rewards.shape
-        advs = torch.zeros_like(rewards).to(rewards.device)
-
-        # Adjusting the values after the end of the episodes
-        for env_idx in range(num_env):
-            gae = 0
-            for t in reversed(range(horizon)):
-                delta = (
-                    rewards[env_idx, t]
-                    + gamma * values[env_idx, t + 1]
-                    - values[env_idx, t]
-                )
-                gae = delta + gamma * lam * gae
-                advs[env_idx, t] = gae
+        not_dones = 1 - tensor_manager.dones_tensor
+        truncations = tensor_manager.truncations_tensor.bool()
+        continues = not_dones * ~truncations
+        next_values = (
+            torch.where(
+                truncations, tensor_manager.bootstrap_values_tensor, values[:, 1:]
+            )
+            * not_dones
+        )
+        advs = torch.empty_like(rewards)
+
+        gae = torch.zeros_like(rewards[:, 0])
+        for t in reversed(range(rewards.shape[1])):
+            delta = rewards[:, t] + gamma * next_values[:, t] - values[:, t]
+            gae = delta + gamma * lam * (continues[:, t] * gae)
+            advs[:, t] = gae
         return advs
 
     def compute_actor_loss(self, ratio, adv):
@@ -198,21 +314,81 @@ class Train:
         advs,
         values,
         log_probs,
+        state_scales=None,
+        state_offsets=None,
+        state_circles=None,
     ):
-        full_batch_size = states.size(0)
-        for _ in range(full_batch_size // mini_batch_size):
-            # 무작위로 mini_batch_size 개의 인덱스를 선택
-            indices = torch.randperm(full_batch_size)[:mini_batch_size].to(
-                states.device
-            )
-            yield (
-                states[indices],
-                actions[indices],
-                returns[indices],
-                advs[indices],
-                values[indices],
-                log_probs[indices],
+        """
+        에폭마다 한 번 섞은 순서대로 모든 샘플을 정확히 한 번씩 mini_batch_size개씩 나눠 반환합니다.
+        (마지막 mini batch는 더 작을 수 있습니다)
+        매번 새 텐서를 만들지 않고 미리 할당한 mini batch 버퍼에 모으므로,
+        반환된 텐서는 다음 mini batch를 요청하기 전까지만 사용해야 합니다.
+        float16/uint8로 저장된 상태는 mini batch로 모은 뒤 float32 버퍼로 복원합니다.
+        state_circles가 주어지면(states는 None) 상태를 원 목록에서 다시 그리며,
+        다음 mini batch의 상태는 현재 mini batch로 학습하는 동안 worker thread에서 미리 그립니다.
+        """
+        tensors = (actions, returns, advs, values, log_probs)
+        if state_circles is None:
+            tensors = (states,) + tensors
+        if state_scales is not None:
+            tensors += (state_scales, state_offsets)
+        specs = [
+            ((mini_batch_size, *tensor.shape[1:]), tensor.dtype, tensor.device)
+            for tensor in tensors
+        ]
+        compact = state_circles is None and states.dtype != torch.float32
+        if compact:
+            specs.append((specs[0][0], torch.float32, states.device))
+        buffers = self.mini_batch_buffers(specs)
+
+        full_batch_size = actions.size(0)
+        permutation = torch.randperm(full_batch_size, device=actions.device)
+        batches = [
+            permutation[start : start + mini_batch_size]
+            for start in range(0, full_batch_size, mini_batch_size)
+        ]
+        if state_circles is not None:
+            rendering = self.render_states(state_circles, batches[0])
+        for k, indices in enumerate(batches):
+            batch = [
+                torch.index_select(tensor, 0, indices, out=buffer[: len(indices)])
+                for tensor, buffer in zip(tensors, buffers)
+            ]
+            if state_circles is not None:
+                rendered = torch.stack([future.result() for future in rendering])
+                if k + 1 < len(batches):
+                    rendering = self.render_states(state_circles, batches[k + 1])
+                batch.insert(0, rendered.to(actions.device))
+            elif compact:
+                batch[0] = dequantize_states(
+                    batch[0], *batch[6:], out=buffers[-1][: len(indices)]
+                )
+            yield tuple(batch[:6])
+
+    def render_states(self, state_circles, indices):
+        """
+        indices번째 원 목록의 상태를 worker thread에서 그리기 시작하고 Future 목록을 반환합니다.
+        """
+        if self._render_executor is None:
+            self._render_executor = ThreadPoolExecutor(
+                max_workers=self.render_workers, thread_name_prefix="render_state"
             )
+        return [
+            self._render_executor.submit(self.env.render_state, state_circles[index])
+            for index in indices.tolist()
+        ]
+
+    def mini_batch_buffers(self, specs):
+        """
+        (모양, dtype, device) 목록에 맞는 버퍼입니다. 목록이 같으면 반복(iteration) 간에 재사용합니다.
+        """
+        if self._mini_batch_shapes != specs:
+            self._mini_batch_shapes = specs
+            self._mini_batch_buffers = [
+                torch.empty(shape, dtype=dtype, device=device)
+                for shape, dtype, device in specs
+            ]
+        return self._mini_batch_buffers
 
     def print_logs(self, actor_loss, critic_loss, sum_of_last_rewards):
 
@@ -224,6 +400,15 @@ class Train:
         critic_loss = (
             critic_loss.item() if torch.is_tensor(critic_loss) else critic_loss
         )
+        if self.quantized_policy is not None and self.rollout_divergence_history:
+            divergence = self.rollout_divergence_history[-1]
+            print(
+                f"int8 rollout divergence: kl_mean {divergence['kl_mean']:.4g},"
+                f" kl_max {divergence['kl_max']:.4g},"
+                f" value_error {divergence['value_error']:.4g}"
+                f" (next rollout:"
+                f" {'float32' if self.rollout_divergence_exceeded() else 'int8'})"
+            )
         self.plot_and_save()
 
     def plot_and_save(self):